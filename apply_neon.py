@@ -6,12 +6,31 @@ import sys
 
 # Import necessary functions from your other modules
 # Ensure neon_styling now has the parameterized functions
-from neon_styling import apply_neon_effect, apply_neon_to_svg, create_neon_circle # Added create_neon_circle if needed
-from input_handlers import (
-    get_contours_from_image,
-    get_contours_from_pdf,
-    get_contours_from_text
+from neon_styling import (
+    DEFAULT_COMPRESS_LEVEL,
+    DEFAULT_IMAGE_QUALITY,
+    autofit_canvas,
+    circle_subpath,
+    encode_image,
+    render_neon_circle,
+    render_neon_effect,
+    render_neon_subpaths,
+    save_image,
+    svg_to_subpaths
 )
+from contour_format import CONTOUR_FILE_EXTENSION, load_contours
+from contour_detection import DETECTION_STRATEGIES, ContourDetector
+from glow_engine import GLOW_ENGINES, RENDER_QUALITIES, parse_glow_layers
+from neon_animation import ANIMATION_FORMATS, ANIMATION_MODES, apply_neon_animation, is_animation_output
+from render_cache import DEFAULT_CACHE_MAX_MB, RenderCache, make_render_key, make_source_key
+from tiled_render import apply_neon_effect_tiled
+from vector_export import is_vector_output, write_neon_vector
+from neon_profile import add_diagnostic_arguments, configure_logging, get_logger, profiled
+# input_handlers (contour detection, pdf2image) and glyph_outlines (fontTools, svgpathtools)
+# are imported inside the functions that need them, so each run only loads the
+# backends for its input kind; see benchmark_startup.py.
+
+log = get_logger("apply_neon")
 
 # Helper function (can be moved to neon_styling if preferred)
 def parse_color_arg(color_str):
@@ -24,27 +43,121 @@ def parse_color_arg(color_str):
     except Exception as e:
         raise argparse.ArgumentTypeError(f"Invalid color format '{color_str}'. Use R,G,B (e.g., '255,0,255'). Error: {e}")
 
-def main():
-    # --- Argument Parsing ---
-    parser = argparse.ArgumentParser(description="Apply neon effect to various input types.")
-    parser.add_argument("input_path", help="Path to the input file (PNG, SVG, PDF, TXT) or 'circle' for test circle.")
-    parser.add_argument("output_path", help="Path to save the output neon PNG image.")
+def parse_page_range(range_str):
+    """Parses 'all', 'N', 'N-M' or 'N-' (0-indexed, inclusive) into (first, last or None)."""
+    try:
+        if range_str.lower() == 'all':
+            return (0, None)
+        if '-' in range_str:
+            first_str, last_str = range_str.split('-', 1)
+            first = int(first_str) if first_str else 0
+            last = int(last_str) if last_str else None
+        else:
+            first = last = int(range_str)
+        if first < 0 or (last is not None and last < first):
+            raise ValueError("Pages must be >= 0 and the range must not be reversed.")
+        return (first, last)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(f"Invalid page range '{range_str}'. Use 'all', 'N', 'N-M' or 'N-'. Error: {e}")
+
+def parse_glow_layers_arg(layers_str):
+    """Parses the --glowlayers string, returns a list of layer dicts or raises error."""
+    try:
+        return parse_glow_layers(layers_str)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(f"Invalid glow layers '{layers_str}'. Use 'neon' or radius:intensity[:color_shift],... (e.g., '2:0.9:0.6,8:0.8,30:0.5'). Error: {e}")
+
+def parse_thresholds_arg(thresholds_str):
+    """Parses 'auto' or 'LOW,HIGH' Canny thresholds, returns (low, high), (None, None) for auto, or raises error."""
+    try:
+        if thresholds_str.lower() == 'auto':
+            return (None, None)
+        low, high = map(int, thresholds_str.split(','))
+        if not (0 <= low <= high):
+            raise ValueError("Thresholds must satisfy 0 <= LOW <= HIGH.")
+        return (low, high)
+    except Exception as e:
+        raise argparse.ArgumentTypeError(f"Invalid thresholds '{thresholds_str}'. Use 'auto' or LOW,HIGH (e.g., '100,200'). Error: {e}")
+
+def add_common_arguments(parser):
+    """
+    Adds the input, canvas and styling options shared by apply_neon.py and batch_neon.py.
 
+    Args:
+        parser (argparse.ArgumentParser): Parser to add the options to.
+    """
     # Input specific args
     parser.add_argument("-p", "--page", type=int, default=0,
                         help="Page number to process for PDF files (0-indexed, default: 0).")
+    parser.add_argument("--pages", type=parse_page_range, default=None,
+                        help="PDF page range to stream ('all', 'N-M', 'N-'; 0-indexed). "
+                             "Writes one output per page as <output>_page<N>.png.")
+    parser.add_argument("--dpi", type=int, default=200,
+                        help="Rasterisation resolution for PDF pages (default: 200).")
     parser.add_argument("-t", "--text", type=str, default=None, # Default None, use file content first
                         help="Text string to use (overrides text file content if provided).")
     parser.add_argument("-f", "--font", type=str, default=None,
                         help="Path to .ttf font file for text rendering.")
     parser.add_argument("-fs", "--fontsize", type=int, default=60,
                         help="Font size for text rendering.")
+    parser.add_argument("--textmode", choices=["raster", "outline"], default="raster",
+                        help="Text rendering: 'raster' (draw with Pillow, then detect contours) or 'outline' "
+                             "(vector glyph outlines straight from the font via fontTools, with kerning).")
+
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Adaptive SVG/outline-text curve flattening: max deviation from the true curve in output pixels "
+                             "(e.g. 0.25). Default: fixed 25 points per curve.")
+    parser.add_argument("--svgstyle", choices=["attributes", "ignore"], default="attributes",
+                        help="SVG tube styling: 'attributes' takes each path's colour and width from its stroke/"
+                             "stroke-width (attribute, style or <style> class rule; black or missing strokes use "
+                             "--color/--linewidth), 'ignore' draws every path with --color/--linewidth.")
+    parser.add_argument("--svgfit", choices=["viewbox", "none"], default="viewbox",
+                        help="SVG placement: 'viewbox' scales the SVG's viewBox (or width/height) to --width/--height "
+                             "honouring preserveAspectRatio, 'none' draws one SVG user unit per pixel. "
+                             "Group and element transforms are applied either way.")
+
+    # Contour detection (PNG/PDF/TXT inputs)
+    parser.add_argument("--detector", choices=DETECTION_STRATEGIES, default=None,
+                        help="Contour detection strategy: 'canny' (edges), 'otsu' or 'adaptive' (threshold, for text "
+                             "and flat artwork), 'alpha' (transparent PNG shapes). Default: canny with the "
+                             "per-input thresholds (100,200 for images, 50,150 for text).")
+    parser.add_argument("--thresholds", type=parse_thresholds_arg, default=None,
+                        help="Canny thresholds as LOW,HIGH or 'auto' (picked from the median brightness). "
+                             "Default: 'auto' when --detector canny is given.")
+
+    # Contour simplification (PNG/PDF/TXT/.ncf contours)
+    parser.add_argument("--simplify", type=float, default=0.0,
+                        help="Douglas-Peucker epsilon in pixels for contour simplification (default: 0 = off).")
+    parser.add_argument("--minarea", type=float, default=0.0,
+                        help="Drop contours enclosing less than this many square pixels (default: 0 = off).")
+    parser.add_argument("--minlength", type=float, default=0.0,
+                        help="Drop contours shorter than this many pixels (default: 0 = off).")
 
     # Canvas size args
     parser.add_argument("--width", type=int, default=400,
                         help="Canvas width for text/PDF/SVG rendering.")
     parser.add_argument("--height", type=int, default=400,
                         help="Canvas height for text/PDF/SVG rendering.")
+    parser.add_argument("--autofit", action="store_true",
+                        help="Size the output to the content's bounding box plus the glow margin instead of "
+                             "--width/--height (or the PDF page/PNG size); text is never clipped.")
+
+    # Tiled rendering for very large canvases
+    parser.add_argument("--tilesize", type=int, default=0,
+                        help="Render PNG/PDF/text contours in tiles of this many pixels and stream the PNG to disk, "
+                             "keeping memory to a few tiles (default: 0 = render the full canvas at once).")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="Threads rendering tiles with --tilesize (default: number of CPU cores).")
+
+    # Animated output
+    parser.add_argument("--animate", choices=ANIMATION_MODES, default=None,
+                        help="Write an animation instead of a still: 'flicker' (random dips), 'poweron' "
+                             "(tubes stutter on one by one) or 'trace' (strokes drawn left to right). "
+                             "Output must be .gif, .png (APNG) or .webp.")
+    parser.add_argument("--frames", type=int, default=60,
+                        help="Number of animation frames (default: 60).")
+    parser.add_argument("--fps", type=float, default=20,
+                        help="Animation frames per second (default: 20).")
 
     # --- NEW Styling Arguments ---
     parser.add_argument("--color", type=str, default="255,0,255", # Default Magenta as string
@@ -55,128 +168,671 @@ def main():
                         help="Radius for the Gaussian blur glow effect.")
     parser.add_argument("--glowalpha", type=float, default=0.5,
                         help="Blending alpha for the glow (0.0=sharp only, 1.0=blur only).")
+    parser.add_argument("--glowengine", choices=GLOW_ENGINES, default="cv2",
+                        help="Glow compositor: 'cv2' (NumPy/OpenCV, default) or 'pil' (original PIL blur-and-blend).")
+    parser.add_argument("--glowlayers", type=parse_glow_layers_arg, default=None,
+                        help="Layered glow instead of --glowradius/--glowalpha: 'neon' for core+halo+bloom, "
+                             "or radius:intensity[:color_shift],... (color_shift 0..1 shifts towards white-hot).")
+    parser.add_argument("--quality", choices=RENDER_QUALITIES, default="normal",
+                        help="Rendering quality: 'draft' (aliased tubes, coarser glow; fast previews), 'normal' "
+                             "(anti-aliased tubes, default) or 'high' (tubes supersampled 3x and area-downsampled).")
     # --- End NEW Styling Arguments ---
 
-    args = parser.parse_args()
+    # Output encoding (still raster images)
+    parser.add_argument("--compresslevel", type=int, choices=range(10), default=DEFAULT_COMPRESS_LEVEL,
+                        metavar="0-9",
+                        help=f"PNG zlib compression level: 0 fastest/largest to 9 slowest/smallest "
+                             f"(default: {DEFAULT_COMPRESS_LEVEL}).")
+    parser.add_argument("--webpquality", type=int, default=DEFAULT_IMAGE_QUALITY,
+                        help=f"Quality for still .webp/.jpg output, 1-100; above 100 WebP is lossless "
+                             f"(default: {DEFAULT_IMAGE_QUALITY}).")
 
-    input_path = args.input_path
-    output_path = args.output_path
-    canvas_size = (args.width, args.height)
+    # Render cache
+    parser.add_argument("--cachedir", type=str, default=None,
+                        help="Directory for the content-based render cache (contours + output PNGs). "
+                             "Inspect with 'python render_cache.py stats DIR'.")
+    parser.add_argument("--cachemaxmb", type=int, default=DEFAULT_CACHE_MAX_MB,
+                        help=f"Render cache size limit in MB; least recently used entries are evicted (default: {DEFAULT_CACHE_MAX_MB}).")
 
-    # Parse color argument safely
-    try:
-         line_color_tuple = parse_color_arg(args.color)
-    except argparse.ArgumentTypeError as e:
-         print(f"Error: {e}")
-         sys.exit(1)
 
+def get_style_params(args):
+    """
+    Builds the styling keyword arguments for neon_styling from parsed arguments.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+
+    Returns:
+        dict: Styling parameters, or raises argparse.ArgumentTypeError on a bad color.
+    """
     # Store styling parameters in a dictionary for easier passing
-    style_params = {
-        "line_color": line_color_tuple, # Pass the parsed tuple
+    return {
+        "line_color": parse_color_arg(args.color), # Pass the parsed tuple
         "line_width": args.linewidth,
         "glow_radius": args.glowradius,
-        "glow_alpha": args.glowalpha
+        "glow_alpha": args.glowalpha,
+        "glow_engine": args.glowengine,
+        "glow_layers": args.glowlayers,
+        "quality": args.quality
     }
 
+
+def get_detector(args, input_kind=None):
+    """
+    Builds the contour detector selected by --detector/--thresholds.
+
+    Args:
+        args (argparse.Namespace): Parsed command-line arguments.
+        input_kind (str, optional): Input kind from get_input_kind(); text is detected without blurring.
+
+    Returns:
+        ContourDetector: The configured detector, or None to use each input handler's default.
+    """
+    if args.detector is None and args.thresholds is None:
+        return None
+    low, high = args.thresholds or (None, None)
+    blur_size = 0 if input_kind in ('txt', 'text') else 5
+    return ContourDetector(args.detector or "canny", low, high, blur_size=blur_size)
+
+
+def get_simplify_params(args):
+    """
+    Builds the simplify_contours keyword arguments from parsed arguments.
+
+    Returns:
+        dict: Simplification parameters, or None if simplification is off.
+    """
+    if args.simplify <= 0 and args.minarea <= 0 and args.minlength <= 0:
+        return None
+    return {"epsilon": args.simplify, "min_area": args.minarea, "min_length": args.minlength}
+
+
+def read_text_input(input_path, text_override=None):
+    """
+    Returns the text to render for a .txt input, falling back to 'Neon!'.
+
+    Args:
+        input_path (str): Path to the text file.
+        text_override (str, optional): Text given on the command line; wins over the file.
+
+    Returns:
+        str: Text content to render.
+    """
+    if text_override is not None: # Use command-line text if provided
+        return text_override
+    try:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            text_content = f.read().strip()
+            if not text_content:
+                log.warning("Text file '%s' is empty. Using default text 'Neon!'.", input_path)
+                text_content = "Neon!" # Fallback if file is empty
+    except Exception as e:
+        log.error("Could not read text file '%s': %s. Using default text 'Neon!'.", input_path, e)
+        text_content = "Neon!" # Fallback on read error
+    return text_content
+
+
+def get_text_content(source, input_kind, args):
+    """
+    Returns the text for a 'txt'/'text' input: --text if given, else the
+    text or UTF-8 bytes passed in, else the text file's content.
+    """
+    if args.text is not None:
+        return args.text
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        text_content = bytes(source).decode("utf-8", errors="replace").strip()
+        return text_content or "Neon!"
+    if input_kind == 'text':
+        return source or "Neon!"
+    return read_text_input(source)
+
+
+def get_encode_params(args):
+    """Returns the save_image()/encode_image() keyword arguments for --compresslevel/--webpquality."""
+    return {"compress_level": args.compresslevel, "quality": args.webpquality}
+
+
+def get_animation_params(args):
+    """Returns apply_neon_animation() options for --animate, or None for a still image."""
+    if not args.animate:
+        return None
+    return {"mode": args.animate, "n_frames": max(1, args.frames), "fps": args.fps}
+
+
+def render_contours(contours, output_path, image_size, style_params, autofit=False, tile_size=0, workers=None,
+                    closed=False, animation=None, encode_params=None, styles=None):
+    """
+    Applies the neon effect to contours: as an animation when animation options
+    are given (see neon_animation), as SVG/PDF vector artwork when output_path
+    ends in .svg/.pdf (see vector_export), tiled when tile_size is set (see
+    tiled_render), otherwise as one full-canvas raster.
+
+    Args:
+        contours (list): Contours in OpenCV layout (int or float).
+        output_path (str): Path to save the output image.
+        image_size (tuple): (width, height) of the canvas.
+        style_params (dict): Styling keyword arguments from get_style_params().
+        autofit (bool): Crop the canvas to the contours plus the glow margin.
+        tile_size (int): Tile edge in pixels, 0 to render the full canvas at once.
+        workers (int, optional): Threads for tiled rendering.
+        closed (bool or list): Closed-loop flag for all contours (or one per contour, tiled/vector/animated only).
+        animation (dict, optional): Options from get_animation_params().
+        encode_params (dict, optional): Raster encoding options from get_encode_params().
+        styles (list, optional): (color or None, width or None) per contour, e.g. SVG stroke
+                                 styles; applied to vector output only.
+
+    Returns:
+        bool: True if the output was written; False if the animated, vector or
+              tiled renderer failed (it logs why). Full-canvas raster errors raise.
+    """
+    encode_params = encode_params or {}
+    vector = is_vector_output(output_path)
+    if not tile_size and not vector and not animation:
+        canvas = render_neon_effect(contours, image_size, autofit=autofit, closed=closed, **style_params)
+        save_image(canvas, output_path, **encode_params)
+        return True
+    if autofit:
+        widest = max([width for _, width in styles or () if width] + [style_params["line_width"]])
+        contours, image_size = autofit_canvas(contours, image_size, widest,
+                                              style_params["glow_radius"], style_params["glow_layers"])
+    if animation:
+        return apply_neon_animation(contours, output_path, image_size=image_size, closed=closed, **animation,
+                                    **style_params)
+    if vector:
+        return write_neon_vector(contours, output_path, image_size=image_size, closed=closed, styles=styles,
+                                 **style_params)
+    return apply_neon_effect_tiled(contours, output_path, image_size=image_size, closed=closed,
+                                   tile_size=tile_size, workers=workers,
+                                   compress_level=encode_params.get("compress_level", DEFAULT_COMPRESS_LEVEL),
+                                   **style_params)
+
+
+def render_pdf_pages(input_path, output_path, page_range, style_params, dpi=200, simplify_params=None,
+                     detector=None, autofit=False, tile_size=0, workers=None, encode_params=None):
+    """
+    Renders every page in page_range of a PDF to its own neon PNG.
+
+    Pages are streamed from a single poppler conversion, so rasterising the
+    next page overlaps contour detection and glow rendering of this one.
+
+    Args:
+        input_path (str): Path to the input PDF file.
+        output_path (str): Base output path; '_page<N>' is inserted before the extension.
+        page_range (tuple): (first_page, last_page or None), 0-indexed.
+        style_params (dict): Styling keyword arguments from get_style_params().
+        dpi (int): Rasterisation resolution.
+        simplify_params (dict, optional): Keyword arguments for simplify_contours.
+        detector (ContourDetector, optional): Contour detection strategy.
+        autofit (bool): Crop each page's output to its contours plus the glow margin.
+        tile_size (int): Render each page in tiles of this size (0 = off).
+        workers (int, optional): Threads for tiled rendering.
+        encode_params (dict, optional): Raster encoding options from get_encode_params().
+
+    Returns:
+        bool: True if every page produced an output image.
+    """
+    from input_handlers import iter_contours_from_pdf, simplify_contours
+
+    base, ext = os.path.splitext(output_path)
+    ext = ext or ".png"
+    first_page, last_page = page_range
+    rendered = 0
+    failed = 0
+
+    for page_num, contours, image_size in iter_contours_from_pdf(input_path, first_page, last_page, dpi=dpi,
+                                                                  detector=detector):
+        if contours is None:
+            failed += 1
+            continue
+        if simplify_params:
+            contours = simplify_contours(contours, **simplify_params)
+        page_output_path = f"{base}_page{page_num}{ext}"
+        log.info("Applying neon effect to %d contours on page %d...", len(contours), page_num)
+        if not render_contours(contours, page_output_path, image_size, style_params, autofit=autofit,
+                               tile_size=tile_size, workers=workers, encode_params=encode_params):
+            failed += 1
+            continue
+        rendered += 1
+
+    log.info("Rendered %d PDF pages (%d failed).", rendered, failed)
+    return rendered > 0 and failed == 0
+
+
+def get_input_kind(input_path, args):
+    """
+    Works out what kind of input is being rendered.
+
+    Returns:
+        str: 'circle', 'svg', 'png', 'pdf', 'txt', 'ncf' (saved contours) or 'text' (direct --text),
+             or None (after printing an error) if the input can't be handled.
+    """
+    if input_path.lower() == 'circle':
+        return 'circle'
+    if os.path.exists(input_path):
+        extension = os.path.splitext(input_path)[1].lower()
+        if extension in (".svg", ".png", ".pdf", ".txt", CONTOUR_FILE_EXTENSION):
+            return extension[1:]
+        log.error("Unsupported file type '%s'. Please use .png, .svg, .pdf, .txt, %s or 'circle'.",
+                  extension, CONTOUR_FILE_EXTENSION)
+        return None
+    # Input path was given but not found (and not 'circle')
+    if args.text is not None:
+        return 'text'
+    log.error("Input path '%s' not found or invalid.", input_path)
+    return None
+
+
+def get_source_key(input_path, input_kind, args):
+    """Builds the render cache key for the contours of an input (only the options that affect them)."""
+    canvas_size = (args.width, args.height)
+    if input_kind == 'circle':
+        return make_source_key(input_path='circle', canvas_size=canvas_size)
+    if input_kind == 'svg':
+        return make_source_key(input_path=input_path, canvas_size=canvas_size,
+                               extra={"tolerance": args.tolerance, "svgfit": args.svgfit})
+    detector = get_detector(args, input_kind) if input_kind != 'ncf' else None
+    extra = {"simplify": get_simplify_params(args), "detector": detector.params() if detector else None}
+    if input_kind in ('png', 'ncf'):
+        return make_source_key(input_path=input_path, extra=extra)
+    if input_kind == 'pdf':
+        return make_source_key(input_path=input_path, page=args.page, dpi=args.dpi, extra=extra)
+    # 'txt' and direct 'text'
+    if args.textmode == 'outline':
+        extra = {"textmode": "outline", "tolerance": args.tolerance}
+    elif args.autofit:
+        extra = dict(extra, autofit=True) # Changes the canvas the text is drawn on
+    return make_source_key(input_path=input_path if input_kind == 'txt' else None, text=args.text,
+                           font_path=args.font, font_size=args.fontsize, canvas_size=canvas_size,
+                           extra=extra)
+
+
+def extract_contours(source, input_kind, args):
+    """
+    Gets the contours for an input (see detect_contours) and applies the
+    optional simplification stage (--simplify/--minarea/--minlength).
+
+    Args:
+        source (str | bytes | np.ndarray): Input file path or in-memory content (see detect_contours).
+        input_kind (str): 'png', 'pdf', 'txt', 'ncf' or 'text' from get_input_kind().
+        args (argparse.Namespace): Parsed options from add_common_arguments().
+
+    Returns:
+        tuple: (list of contours, tuple image_size), contours are None on error.
+    """
+    contours, image_size = detect_contours(source, input_kind, args)
+    simplify_params = get_simplify_params(args)
+    if contours is not None and simplify_params:
+        from input_handlers import simplify_contours
+        contours = simplify_contours(contours, **simplify_params)
+    return contours, image_size
+
+
+def detect_contours(source, input_kind, args):
+    """
+    Runs contour detection for a PNG, PDF page, text file or direct text input,
+    or loads contours saved by 'contour_format.py extract'.
+
+    Args:
+        source (str | bytes | np.ndarray): Path to the input file, or its content in memory:
+            encoded image or PDF bytes, a decoded image array ('png'), text or UTF-8
+            bytes ('txt'/'text'). Contour files ('ncf') must be paths.
+        input_kind (str): 'png', 'pdf', 'txt', 'ncf' or 'text' from get_input_kind().
+        args (argparse.Namespace): Parsed options from add_common_arguments().
+
+    Returns:
+        tuple: (list of contours, tuple image_size), contours are None on error.
+    """
+    from input_handlers import (get_contours_from_image, get_contours_from_pdf, get_contours_from_pdf_bytes,
+                                get_contours_from_text)
+
+    detector = get_detector(args, input_kind)
+    in_memory = not isinstance(source, str)
+
+    if input_kind == 'png':
+        log.info("Input type: PNG")
+        return get_contours_from_image(source, detector=detector, return_size=True)
+
+    if input_kind == 'ncf':
+        log.info("Input type: Contour File")
+        if in_memory:
+            log.error("Contour files can only be loaded from a path.")
+            return None, None
+        try:
+            return load_contours(source)
+        except (OSError, ValueError) as e:
+            log.error("Could not read contour file '%s': %s", source, e)
+            return None, None
+
+    if input_kind == 'pdf':
+        log.info("Input type: PDF")
+        get_contours = get_contours_from_pdf_bytes if in_memory else get_contours_from_pdf
+        contours, pdf_image_size = get_contours(source, page_num=args.page, dpi=args.dpi, detector=detector)
+        return contours, pdf_image_size or (args.width, args.height)
+
+    if input_kind == 'txt':
+        log.info("Input type: Text File")
+    else:
+        log.info("Input type: Direct Text (Input path ignored)")
+    text_content = get_text_content(source, input_kind, args)
+    return get_contours_from_text(
+        text_content,
+        font_path=args.font,
+        font_size=args.fontsize,
+        image_size=get_text_canvas_size(text_content, args),
+        detector=detector
+    )
+
+
+def get_text_canvas_size(text_content, args):
+    """
+    Returns the canvas raster text is drawn on: --width/--height, grown to hold
+    the whole text with --autofit (rendering crops it to the content afterwards).
+    """
+    canvas_size = (args.width, args.height)
+    if not args.autofit:
+        return canvas_size
+    from input_handlers import measure_text
+    text_width, text_height = measure_text(args.font, args.fontsize, text_content)
+    padding = args.fontsize # Room for the bbox offset and descenders the centring ignores
+    return (max(canvas_size[0], int(text_width) + 2 * padding),
+            max(canvas_size[1], int(text_height) + 2 * padding))
+
+
+def get_text_outlines(source, input_kind, args):
+    """
+    Builds vector glyph outlines for text (--textmode outline).
+
+    Returns:
+        tuple: (list of (points, closed) subpaths, tuple image_size), or None
+               if the caller should fall back to raster text (no fontTools, unreadable font).
+    """
+    from glyph_outlines import FONTTOOLS_INSTALLED, get_outlines_from_text
+
+    log.info("Input type: Text (glyph outlines)")
+    if not FONTTOOLS_INSTALLED:
+        log.warning("fontTools is not installed (pip install fonttools). Using raster text mode.")
+        return None
+    text_content = get_text_content(source, input_kind, args)
+    subpaths, image_size = get_outlines_from_text(text_content, font_path=args.font, font_size=args.fontsize,
+                                                  image_size=(args.width, args.height), tolerance=args.tolerance)
+    if subpaths is None:
+        log.warning("Could not build glyph outlines. Using raster text mode.")
+        return None
+    return subpaths, image_size
+
+
+def render_text_outlines(input_path, output_path, input_kind, args, style_params):
+    """
+    Renders text from vector glyph outlines (--textmode outline).
+
+    Returns:
+        bool: Whether the output was written (see render_contours), or None when
+              the caller should fall back to raster text (no fontTools, unreadable font).
+    """
+    outlines = get_text_outlines(input_path, input_kind, args)
+    if outlines is None:
+        return None
+    subpaths, image_size = outlines
+    animation = get_animation_params(args)
+    if args.tilesize or animation or is_vector_output(output_path):
+        return render_contours([points for points, _ in subpaths], output_path, image_size, style_params,
+                               autofit=args.autofit, tile_size=args.tilesize, workers=args.threads,
+                               closed=[closed for _, closed in subpaths], animation=animation,
+                               encode_params=get_encode_params(args))
+    canvas = render_neon_subpaths(subpaths, image_size, autofit=args.autofit, **style_params)
+    save_image(canvas, output_path, **get_encode_params(args))
+    return True
+
+
+def make_render_args(**options):
+    """
+    Returns render options with apply_neon.py's command-line defaults, for library use.
+
+    Keyword arguments override the defaults and use the parsed option names,
+    e.g. make_render_args(color="0,255,255", linewidth=4, glowlayers=parse_glow_layers("neon")).
+
+    Raises:
+        TypeError: For an option apply_neon.py doesn't have.
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    add_common_arguments(parser)
+    args = parser.parse_args([])
+    unknown = sorted(set(options) - set(vars(args)))
+    if unknown:
+        raise TypeError(f"Unknown render option(s): {', '.join(unknown)}")
+    for name, value in options.items():
+        setattr(args, name, value)
+    return args
+
+
+def render_to_array(input_kind, source=None, args=None):
+    """
+    Renders one input to a neon image entirely in memory: nothing is read
+    from or written to disk unless source is a path.
+
+    Covers the still-image part of the CLI; --pages, --tilesize, --animate
+    and the render cache write files and are ignored here.
+
+    Args:
+        input_kind (str): 'circle', 'svg', 'png', 'pdf', 'txt', 'text' or 'ncf'.
+        source (str | bytes | np.ndarray, optional): Input file path, or its content:
+            SVG/PNG/PDF/text bytes, a decoded image array for 'png', or the text
+            itself for 'text'. Ignored for 'circle'.
+        args (argparse.Namespace, optional): Options from make_render_args() or
+            add_common_arguments(). Default: the command-line defaults.
+
+    Returns:
+        np.ndarray: HxWx3 uint8 RGB image, or None if the input produced nothing.
+
+    Raises:
+        argparse.ArgumentTypeError: For an invalid --color.
+    """
+    args = args or make_render_args()
+    style_params = get_style_params(args)
+    canvas_size = (args.width, args.height)
+
+    if input_kind == 'circle':
+        return render_neon_circle(canvas_size, **style_params)
+
+    if input_kind == 'svg':
+        svg_styles = args.svgstyle == 'attributes'
+        parsed = svg_to_subpaths(source, tolerance=args.tolerance, with_styles=svg_styles,
+                                 canvas_size=canvas_size if args.svgfit == 'viewbox' else None)
+        if parsed is None:
+            return None
+        subpaths, styles = parsed if svg_styles else (parsed, None)
+        return render_neon_subpaths(subpaths, canvas_size, autofit=args.autofit, styles=styles, **style_params)
+
+    if input_kind in ('txt', 'text') and args.textmode == 'outline':
+        outlines = get_text_outlines(source, input_kind, args)
+        if outlines is not None:
+            subpaths, image_size = outlines
+            return render_neon_subpaths(subpaths, image_size, autofit=args.autofit, **style_params)
+
+    contours, image_size = extract_contours(source, input_kind, args)
+    if contours is None:
+        return None
+    return render_neon_effect(contours, image_size, autofit=args.autofit, **style_params)
+
+
+def render_to_bytes(input_kind, source=None, args=None, image_format="png"):
+    """
+    Renders one input in memory (see render_to_array) and encodes it.
+
+    Args:
+        image_format (str): 'png', 'webp' or 'jpg'; compression follows
+                            --compresslevel/--webpquality in args.
+
+    Returns:
+        bytes: The encoded image, or None if the input produced nothing.
+    """
+    args = args or make_render_args()
+    canvas = render_to_array(input_kind, source, args)
+    if canvas is None:
+        return None
+    return encode_image(canvas, image_format, **get_encode_params(args))
+
+
+def render_input(input_path, output_path, args):
+    """
+    Renders a single input (PNG, SVG, PDF, TXT, direct text or 'circle') to a neon PNG.
+
+    Unlike main(), this never calls sys.exit, so it can be run repeatedly in one
+    process (see batch_neon.py). With --cachedir, a previously rendered output
+    for the same input content and style is copied instead of re-rendered, and
+    previously extracted contours skip detection.
+
+    Args:
+        input_path (str): Path to the input file or 'circle'.
+        output_path (str): Path to save the output neon PNG image.
+        args (argparse.Namespace): Parsed options from add_common_arguments().
+
+    Returns:
+        bool: True if an output image was written, False otherwise.
+    """
+    canvas_size = (args.width, args.height)
+
+    # Parse color argument safely
+    try:
+        style_params = get_style_params(args)
+    except argparse.ArgumentTypeError as e:
+        log.error("%s", e)
+        return False
+
+    encode_params = get_encode_params(args)
+
     # Ensure output directory exists
     output_dir = os.path.dirname(output_path)
-    if output_dir:
+    if output_dir and not os.path.isdir(output_dir):
         os.makedirs(output_dir, exist_ok=True)
 
     # --- Determine Input Type and Process ---
-    is_file_input = input_path.lower() != 'circle' and os.path.exists(input_path)
-    extension = ""
-    if is_file_input:
-        _, extension = os.path.splitext(input_path)
-        extension = extension.lower()
+    log.info("Processing input: %s", input_path)
+    input_kind = get_input_kind(input_path, args)
+    if input_kind is None:
+        return False
+
+    animation = get_animation_params(args)
+    if animation and not is_animation_output(output_path):
+        log.error("--animate needs an output ending in %s.", ', '.join(ANIMATION_FORMATS))
+        return False
+    if animation and input_kind == 'pdf' and args.pages is not None:
+        log.error("--animate renders a single input; use --page instead of --pages.")
+        return False
+
+    # Multi-page PDFs write one output per page and bypass the render cache
+    if input_kind == 'pdf' and args.pages is not None:
+        log.info("Input type: PDF")
+        success = render_pdf_pages(input_path, output_path, args.pages, style_params, dpi=args.dpi,
+                                   simplify_params=get_simplify_params(args),
+                                   detector=get_detector(args, input_kind), autofit=args.autofit,
+                                   tile_size=args.tilesize, workers=args.threads, encode_params=encode_params)
+        if success:
+            log.info("Processing complete. Outputs saved next to %s", output_path)
+        return success
 
-    print(f"Processing input: {input_path}")
+    cache = None
+    if args.cachedir:
+        cache = RenderCache(args.cachedir, max_bytes=args.cachemaxmb * 1024 * 1024)
+        source_key = get_source_key(input_path, input_kind, args)
+        render_key = make_render_key(source_key, dict(style_params, autofit=args.autofit, tilesize=args.tilesize,
+                                                     output_format=os.path.splitext(output_path)[1].lower(),
+                                                     encoding=encode_params,
+                                                     animation=animation,
+                                                     svgstyle=args.svgstyle if input_kind == 'svg' else None))
+        if cache.fetch_image(render_key, output_path):
+            log.info("Render cache hit. Output saved to %s", output_path)
+            return True
 
-    contours = None
-    image_size_for_effect = canvas_size # Default size
+    # Vector and animated outputs need the paths themselves, not a finished raster
+    path_output = is_vector_output(output_path) or animation is not None
 
     # Handle special 'circle' input
-    if input_path.lower() == 'circle':
-         print("Input type: Test Circle")
-         create_neon_circle(output_path, size=canvas_size, **style_params)
-         print(f"Processing complete. Output saved to {output_path}")
-         sys.exit(0)
-
-    # Handle file inputs
-    elif is_file_input:
-        if extension == ".svg":
-            print("Input type: SVG")
-            apply_neon_to_svg(input_path, output_path, canvas_size=canvas_size, **style_params)
-            print(f"Processing complete. Output saved to {output_path}")
-            sys.exit(0) # Exit after SVG processing
-
-        elif extension == ".png":
-            print("Input type: PNG")
-            try:
-                from PIL import Image
-                with Image.open(input_path) as img:
-                    image_size_for_effect = img.size
-            except Exception as e:
-                 print(f"Warning: Could not read PNG size, using default {canvas_size}. Error: {e}")
-            contours = get_contours_from_image(input_path)
-
-        elif extension == ".pdf":
-            print("Input type: PDF")
-            contours, pdf_image_size = get_contours_from_pdf(input_path, page_num=args.page)
-            if pdf_image_size:
-                 image_size_for_effect = pdf_image_size
-
-        elif extension == ".txt":
-            print("Input type: Text File")
-            text_content = args.text # Use command-line text if provided
-            if text_content is None: # Only read file if --text wasn't used
-                 try:
-                     with open(input_path, 'r', encoding='utf-8') as f:
-                         text_content = f.read().strip()
-                         if not text_content:
-                              print(f"Warning: Text file '{input_path}' is empty. Using default text 'Neon!'.")
-                              text_content = "Neon!" # Fallback if file is empty
-                 except Exception as e:
-                     print(f"Error reading text file '{input_path}': {e}. Using default text 'Neon!'.")
-                     text_content = "Neon!" # Fallback on read error
-
-            contours, text_image_size = get_contours_from_text(
-                text_content,
-                font_path=args.font,
-                font_size=args.fontsize,
-                image_size=canvas_size
-            )
-            image_size_for_effect = text_image_size
+    written = True
+    if input_kind == 'circle' and path_output:
+        log.info("Input type: Test Circle")
+        points, closed = circle_subpath(canvas_size, style_params["line_width"])
+        written = render_contours([points], output_path, canvas_size, style_params, autofit=args.autofit,
+                                  closed=closed, animation=animation)
 
-        else:
-            print(f"Error: Unsupported file type '{extension}'. Please use .png, .svg, .pdf, .txt or 'circle'.")
-            sys.exit(1)
-
-    # Handle case where input path was given but not found (and not 'circle')
-    elif not is_file_input and args.text is not None:
-         print("Input type: Direct Text (Input path ignored)")
-         text_content = args.text
-         contours, text_image_size = get_contours_from_text(
-             text_content,
-             font_path=args.font,
-             font_size=args.fontsize,
-             image_size=canvas_size
-         )
-         image_size_for_effect = text_image_size
-    else:
-        print(f"Error: Input path '{input_path}' not found or invalid.")
-        sys.exit(1)
+    elif input_kind == 'svg' and path_output:
+        log.info("Input type: SVG")
+        parsed = svg_to_subpaths(input_path, tolerance=args.tolerance, with_styles=True,
+                                 canvas_size=canvas_size if args.svgfit == 'viewbox' else None)
+        if parsed is None:
+            return False
+        subpaths, styles = parsed
+        if args.svgstyle != 'attributes':
+            styles = None
+        elif animation and any(color or width for color, width in styles):
+            log.info("Note: Per-path SVG stroke styles are not applied to animations; "
+                     "using --color/--linewidth for every path.")
+        written = render_contours([points for points, _ in subpaths], output_path, canvas_size, style_params,
+                                  autofit=args.autofit, closed=[closed for _, closed in subpaths],
+                                  animation=animation, styles=styles)
 
+    elif input_kind in ('circle', 'svg'):
+        log.info("Input type: Test Circle" if input_kind == 'circle' else "Input type: SVG")
+        canvas = render_to_array(input_kind, input_path, args)
+        if canvas is None:
+            return False
+        save_image(canvas, output_path, **encode_params)
+
+    elif (input_kind in ('txt', 'text') and args.textmode == 'outline'
+          and (outlines_written := render_text_outlines(input_path, output_path, input_kind, args,
+                                                        style_params)) is not None):
+        written = outlines_written # Rendered from glyph outlines
 
-    # --- Apply Neon Effect (for PNG, PDF, TXT derived contours) ---
-    if contours is not None:
-        print(f"Applying neon effect to {len(contours)} contours...")
-        # Pass the styling parameters using dictionary unpacking
-        apply_neon_effect(contours, output_path, image_size=image_size_for_effect, **style_params)
-        print(f"Processing complete. Output saved to {output_path}")
     else:
-        print("No contours found or error occurred during contour detection. No output generated.")
-        sys.exit(1)
+        # Saved contour files are already cheap to load, so only detection results are cached
+        use_contour_cache = cache is not None and input_kind != 'ncf'
+        cached = cache.fetch_contours(source_key) if use_contour_cache else None
+        if cached is not None:
+            log.info("Render cache hit for contours, skipping detection.")
+            contours, image_size_for_effect = cached
+        else:
+            contours, image_size_for_effect = extract_contours(input_path, input_kind, args)
+            if use_contour_cache:
+                cache.store_contours(source_key, contours, image_size_for_effect)
+
+        # --- Apply Neon Effect (for PNG, PDF, TXT derived contours) ---
+        if contours is None:
+            log.error("No contours found or error occurred during contour detection. No output generated.")
+            return False
+        log.info("Applying neon effect to %d contours...", len(contours))
+        # Pass the styling parameters using dictionary unpacking
+        written = render_contours(contours, output_path, image_size_for_effect, style_params,
+                                  autofit=args.autofit, tile_size=args.tilesize, workers=args.threads,
+                                  animation=animation, encode_params=encode_params)
+
+    if not written:
+        log.error("Rendering failed. No output generated for %s.", input_path)
+        return False
+    if cache is not None:
+        cache.store_image(render_key, output_path)
+    log.info("Processing complete. Output saved to %s", output_path)
+    return True
+
+
+def main():
+    # --- Argument Parsing ---
+    parser = argparse.ArgumentParser(description="Apply neon effect to various input types.")
+    parser.add_argument("input_path", help="Path to the input file (PNG, SVG, PDF, TXT, .ncf contour file) or 'circle' for test circle.")
+    parser.add_argument("output_path", help="Path to save the output neon image (.png raster, .svg/.pdf vector artwork, "
+                                            "or .gif/.png/.webp animation with --animate).")
+    add_common_arguments(parser)
+    add_diagnostic_arguments(parser)
+
+    args = parser.parse_args()
+    configure_logging(args.loglevel)
+    if args.textmode == "outline":
+        from glyph_outlines import outline_font_error
+        if font_error := outline_font_error(args.font):
+            parser.error(font_error)
+
+    with profiled(args.profile, args.cprofile, input=args.input_path, output=args.output_path):
+        success = render_input(args.input_path, args.output_path, args)
+    sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,252 @@
+# batch_neon.py
+
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Importing apply_neon pulls in OpenCV and Pillow once per worker process instead
+# of once per sign; the SVG, PDF and font backends load on a worker's first input
+# of that kind and stay loaded for the rest of the batch.
+from apply_neon import add_common_arguments, render_input
+from neon_profile import add_diagnostic_arguments, configure_logging, get_logger
+
+log = get_logger("batch_neon")
+
+
+def read_manifest(manifest_path):
+    """
+    Reads a CSV manifest of jobs.
+
+    Each non-empty line is `input_path[,output_path]`. Lines starting with '#'
+    are ignored. Relative output paths are resolved later against the output dir.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+
+    Returns:
+        list: List of (input_path, output_path or None) tuples.
+    """
+    jobs = []
+    with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            input_path = row[0].strip()
+            output_path = row[1].strip() if len(row) > 1 and row[1].strip() else None
+            jobs.append((input_path, output_path))
+    return jobs
+
+
+def expand_inputs(patterns):
+    """
+    Expands glob patterns into input paths, keeping 'circle' and literal paths as-is.
+
+    Args:
+        patterns (list): Glob patterns or plain paths.
+
+    Returns:
+        list: List of (input_path, None) tuples in a stable order.
+    """
+    jobs = []
+    for pattern in patterns:
+        if pattern.lower() == 'circle':
+            jobs.append((pattern, None))
+            continue
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            # Keep the literal path so the failure shows up in the summary
+            log.warning("Pattern '%s' matched no files.", pattern)
+            matches = [pattern]
+        jobs.extend((match, None) for match in matches)
+    return jobs
+
+
+def _unused_path(path, used):
+    """Returns path, or path with the first free numeric suffix ('x_1.png', 'x_2.png', ...) if it is taken."""
+    root, extension = os.path.splitext(path)
+    suffix = 1
+    while path in used:
+        path = f"{root}_{suffix}{extension}"
+        suffix += 1
+    return path
+
+
+def assign_output_paths(jobs, output_dir):
+    """
+    Gives every job an output path inside output_dir, avoiding name collisions.
+
+    Outputs without an explicit path are named after the input, extension
+    included ('sign.svg' -> 'sign_svg_neon.png'), so inputs that differ only
+    by extension never share an output. Explicit paths are claimed first;
+    any name that is still taken (the same file name in two folders, or the
+    same explicit path twice) gets a numeric suffix.
+
+    Args:
+        jobs (list): List of (input_path, output_path or None) tuples.
+        output_dir (str): Directory for outputs without an explicit path.
+
+    Returns:
+        list: List of (input_path, output_path) tuples, in the order of jobs.
+    """
+    explicit = [output_path if output_path is None or os.path.isabs(output_path)
+                else os.path.join(output_dir, output_path) for _, output_path in jobs]
+    used = set()
+    resolved = [None] * len(jobs)
+    for index, output_path in enumerate(explicit):
+        if output_path is None:
+            continue
+        unique_path = _unused_path(output_path, used)
+        if unique_path != output_path:
+            log.warning("Output path '%s' is used by more than one job; writing '%s' instead.",
+                        output_path, unique_path)
+        used.add(unique_path)
+        resolved[index] = (jobs[index][0], unique_path)
+    for index, (input_path, _) in enumerate(jobs):
+        if resolved[index] is not None:
+            continue
+        stem, extension = os.path.splitext(os.path.basename(input_path))
+        stem = "_".join(part for part in (stem or "output", extension[1:].lower()) if part)
+        output_path = _unused_path(os.path.join(output_dir, f"{stem}_neon.png"), used)
+        used.add(output_path)
+        resolved[index] = (input_path, output_path)
+    return resolved
+
+
+def run_job(input_path, output_path, args):
+    """
+    Worker entry point: renders one job and never lets an error escape.
+
+    Returns:
+        tuple: (input_path, output_path, success, error message or None, seconds)
+    """
+    start = time.perf_counter()
+    try:
+        success = render_input(input_path, output_path, args)
+        error = None if success else "No output generated."
+    except (Exception, SystemExit) as e: # A failing job must not kill the batch; Ctrl+C still stops it
+        success = False
+        error = f"{type(e).__name__}: {e}"
+        traceback.print_exc()
+    return input_path, output_path, success, error, time.perf_counter() - start
+
+
+def run_batch(jobs, args, workers=None):
+    """
+    Renders jobs across a process pool and collects per-job results.
+
+    Args:
+        jobs (list): List of (input_path, output_path) tuples.
+        args (argparse.Namespace): Shared options from add_common_arguments().
+        workers (int, optional): Pool size. Defaults to the number of CPU cores.
+
+    Returns:
+        list: Result tuples from run_job(), in completion order.
+    """
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(jobs)))
+    results = []
+
+    if workers == 1:
+        # Avoid pool start-up cost for a single job or an explicit --workers 1
+        for input_path, output_path in jobs:
+            results.append(run_job(input_path, output_path, args))
+        return results
+
+    # Spawned (non-forked) workers start without the parent's log handler
+    with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging,
+                             initargs=(getattr(args, "loglevel", "info"),)) as executor:
+        futures = {
+            executor.submit(run_job, input_path, output_path, args): (input_path, output_path)
+            for input_path, output_path in jobs
+        }
+        try:
+            for future in as_completed(futures):
+                input_path, output_path = futures[future]
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # The worker process itself died (e.g. killed by the OS)
+                    results.append((input_path, output_path, False, f"Worker failed: {e}", 0.0))
+        except KeyboardInterrupt:
+            # Drop the queued jobs; leaving the with block would otherwise wait for all of them.
+            # Cancelling the futures here too doesn't depend on the pool's manager thread seeing the flag in time.
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+    return results
+
+
+def print_summary(results, elapsed):
+    """Prints throughput (of jobs that wrote an output) and the list of failed jobs."""
+    succeeded = [r for r in results if r[2]]
+    failed = [r for r in results if not r[2]]
+    rate = len(succeeded) / elapsed if elapsed > 0 else 0.0
+
+    print("\n--- Batch Summary ---")
+    print(f"Jobs: {len(results)}  Succeeded: {len(succeeded)}  Failed: {len(failed)}")
+    print(f"Wall time: {elapsed:.2f}s  Throughput: {rate:.2f} rendered jobs/s")
+    if results:
+        busy = sum(r[4] for r in results)
+        print(f"Mean job time: {busy / len(results):.3f}s")
+    if failed:
+        print("Failures:")
+        for input_path, _, _, error, _ in failed:
+            print(f"  {input_path}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply neon effect to many inputs in one process pool.")
+    parser.add_argument("inputs", nargs="*",
+                        help="Input files or glob patterns (e.g. 'signs/*.svg'), or 'circle'.")
+    parser.add_argument("-o", "--output-dir", required=True,
+                        help="Directory to write the output neon PNG images to.")
+    parser.add_argument("-m", "--manifest", type=str, default=None,
+                        help="CSV file with one 'input_path[,output_path]' job per line.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Number of worker processes (default: number of CPU cores).")
+    add_common_arguments(parser)
+    add_diagnostic_arguments(parser, profile=False)
+
+    args = parser.parse_args()
+    configure_logging(args.loglevel)
+    if args.textmode == "outline":
+        from glyph_outlines import outline_font_error
+        if font_error := outline_font_error(args.font):
+            parser.error(font_error)
+
+    jobs = []
+    if args.manifest:
+        try:
+            jobs.extend(read_manifest(args.manifest))
+        except OSError as e:
+            print(f"Error: Could not read manifest '{args.manifest}': {e}")
+            sys.exit(1)
+    jobs.extend(expand_inputs(args.inputs))
+
+    if not jobs:
+        print("Error: No inputs given. Pass files/glob patterns or --manifest.")
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = assign_output_paths(jobs, args.output_dir)
+
+    print(f"Rendering {len(jobs)} jobs...")
+    start = time.perf_counter()
+    try:
+        results = run_batch(jobs, args, workers=args.workers)
+    except KeyboardInterrupt:
+        print("\nInterrupted; queued jobs were cancelled.")
+        sys.exit(130)
+    print_summary(results, time.perf_counter() - start)
+
+    sys.exit(0 if all(r[2] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
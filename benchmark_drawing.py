@@ -0,0 +1,80 @@
+# benchmark_drawing.py
+
+# Compares the original per-point PIL drawing loop from apply_neon_effect with
+# the batched cv2.polylines drawing in neon_styling.draw_contours.
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from input_handlers import get_contours_from_image, get_contours_from_pdf
+from neon_styling import draw_contours
+
+
+def draw_contours_pil(image_size, contours, color, line_width):
+    """The drawing loop apply_neon_effect used before batched drawing."""
+    img = Image.new("RGB", image_size, (0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for contour in contours:
+        points = [tuple(point[0]) for point in contour]
+        if len(points) > 1:
+            draw.line(points, fill=color, width=line_width)
+        elif len(points) == 1:
+            draw.point(points[0], fill=color)
+    return img
+
+
+def draw_contours_cv2(image_size, contours, color, line_width):
+    canvas = np.zeros((image_size[1], image_size[0], 3), dtype=np.uint8)
+    return draw_contours(canvas, contours, color, line_width)
+
+
+def tile_contours(contours, image_size, copies):
+    """Repeats a contour set with small offsets to build a dense workload."""
+    tiled = []
+    for i in range(copies):
+        shift = np.array([(i * 7) % max(1, image_size[0] // 4), (i * 13) % max(1, image_size[1] // 4)], dtype=np.int32)
+        tiled.extend(contour + shift for contour in contours)
+    return tiled
+
+
+def time_drawing(name, contours, image_size, repeat, line_width=5):
+    color = (255, 0, 255)
+    n_points = sum(len(contour) for contour in contours)
+    results = {}
+    for label, func in (("pil", draw_contours_pil), ("cv2", draw_contours_cv2)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(image_size, contours, color, line_width)
+            timings.append(time.perf_counter() - start)
+        results[label] = min(timings)
+    print(f"{name}: {len(contours)} contours, {n_points} points, canvas {image_size[0]}x{image_size[1]}")
+    for label, best in results.items():
+        print(f"  {label}: {best * 1000:8.2f} ms  {len(contours) / best:12.0f} contours/s")
+    print(f"  speedup: {results['pil'] / results['cv2']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark contour drawing: PIL per-point loop vs batched cv2.polylines.")
+    parser.add_argument("--png", default="example.png")
+    parser.add_argument("--pdf", default="example.pdf")
+    parser.add_argument("--copies", type=int, default=2000,
+                        help="How many times to tile the PNG contours for the dense workload.")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    png_contours = get_contours_from_image(args.png)
+    if png_contours is not None:
+        with Image.open(args.png) as png_image:
+            png_size = png_image.size
+        time_drawing(args.png, png_contours, png_size, args.repeat)
+        dense = tile_contours(png_contours, png_size, args.copies)
+        time_drawing(f"{args.png} x{args.copies}", dense, png_size, args.repeat)
+
+    pdf_contours, pdf_size = get_contours_from_pdf(args.pdf)
+    if pdf_contours is not None:
+        time_drawing(f"{args.pdf} page 0", pdf_contours, pdf_size, args.repeat)
+    else:
+        print(f"Skipping {args.pdf} (PDF could not be rasterised).")
@@ -0,0 +1,97 @@
+# benchmark_startup.py
+
+# Measures apply_neon.py cold start per input kind with `python -X importtime`:
+# each run is a fresh interpreter, once as shipped (backends imported lazily on
+# first use) and once with every backend imported up front, the way apply_neon
+# loaded them before imports were deferred.
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modules apply_neon used to import for every run, whatever the input
+EAGER_IMPORTS = ("svgpathtools", "pdf2image", "fontTools.ttLib", "input_handlers", "glyph_outlines")
+# Backends worth reporting when a run loads them
+HEAVY_MODULES = ("cv2", "svgpathtools", "scipy", "pdf2image", "fontTools")
+
+# (label, input, extra apply_neon.py options)
+STARTUP_CASES = (
+    ("circle", "circle", []),
+    ("svg", "example.svg", []),
+    ("png", "example.png", []),
+    ("pdf", "example.pdf", []),
+    ("txt", "example.txt", []),
+    ("txt outline", "example.txt", ["--textmode", "outline"]),
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output.
+
+    Returns:
+        tuple: (total import time in seconds of the top-level imports, set of imported module names)
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "): # Nested imports are indented below their importer
+            total_us += int(cumulative)
+    return total_us / 1e6, modules
+
+
+def time_startup(input_path, options, output_path, eager=False):
+    """
+    Runs apply_neon.py once in a fresh interpreter.
+
+    Returns:
+        tuple: (wall time s, import time s, set of imported modules, exit code)
+    """
+    preload = "".join(f"import {module}; " for module in EAGER_IMPORTS) if eager else ""
+    argv = ["apply_neon.py", input_path, output_path] + options
+    code = f"import runpy, sys; {preload}sys.argv = {argv!r}; runpy.run_path('apply_neon.py', run_name='__main__')"
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    import_time, modules = parse_importtime(result.stderr)
+    return wall, import_time, modules, result.returncode
+
+
+def best_startup(input_path, options, output_path, repeat, eager=False):
+    """Best (lowest wall time) of repeat runs, as returned by time_startup."""
+    return min((time_startup(input_path, options, output_path, eager) for _ in range(repeat)),
+               key=lambda run: run[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark apply_neon.py cold start per input kind: "
+                                                 "lazy backend imports vs importing everything up front.")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Fresh interpreters per case and mode; the fastest is reported.")
+    parser.add_argument("--kinds", nargs="*", default=None,
+                        help=f"Cases to run (default: all of {', '.join(label for label, _, _ in STARTUP_CASES)}).")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory(prefix="neon_startup_") as temp_dir:
+        output_path = os.path.join(temp_dir, "out.png")
+        print(f"{'input':<12} {'imports lazy':>12} {'eager':>8} {'wall lazy':>10} {'eager':>8} {'saved':>8}  backends loaded")
+        for label, input_path, options in STARTUP_CASES:
+            if args.kinds and label not in args.kinds:
+                continue
+            lazy_wall, lazy_imports, modules, returncode = best_startup(input_path, options, output_path,
+                                                                         args.repeat)
+            eager_wall, eager_imports, _, _ = best_startup(input_path, options, output_path, args.repeat,
+                                                           eager=True)
+            loaded = [name for name in HEAVY_MODULES if name in modules]
+            note = "" if returncode == 0 else "  (render failed)"
+            print(f"{label:<12} {lazy_imports * 1000:10.0f}ms {eager_imports * 1000:6.0f}ms "
+                  f"{lazy_wall * 1000:8.0f}ms {eager_wall * 1000:6.0f}ms {(eager_wall - lazy_wall) * 1000:6.0f}ms  "
+                  f"{', '.join(loaded) or '-'}{note}")
@@ -0,0 +1,461 @@
+# benchmark_suite.py
+
+# Reproducible benchmarks of the render entry points on the sample inputs and on
+# generated large workloads, checked against a saved baseline.
+#
+# Every case runs in a fresh interpreter (so its peak RSS is its own and import
+# costs are paid once, outside the timed runs) and reports its best time over
+# --repeat runs as throughput. The synthetic inputs are generated from a fixed
+# seed, so a run on the same machine always measures the same work. Save a
+# baseline on a known-good tree with --save-baseline; later runs compare against
+# it and exit with status 1 when a case gets slower or uses more memory than the
+# tolerances allow. Baselines are machine-specific: save one per machine.
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from neon_profile import peak_rss_mb
+
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+# Synthetic workload sizes
+CANVAS_4K = (3840, 2160)
+CANVAS_8K = (7680, 4320)
+MANY_CONTOURS_GRID = (120, 84) # Columns x rows of separate blobs on a 4K image: 10,080 contours
+SVG_PATHS, SVG_SEGMENTS_PER_PATH = 200, 500 # 100,000 segments
+SEED = 1234
+
+# A case fails the check when its best time exceeds the baseline by more than
+# --tolerance (relative) plus TIME_SLACK_SECONDS, or its peak RSS by more than
+# --rsstolerance plus RSS_SLACK_MB; the slack keeps tiny cases from flagging noise.
+TIME_SLACK_SECONDS = 0.005
+RSS_SLACK_MB = 5.0
+
+BENCHMARK_CASES = {}
+
+
+def benchmark_case(name, description, requires_pdf=False, requires_font=False):
+    """
+    Registers a case setup function: setup(input_dir, output_dir) -> (run, units, unit).
+
+    Cases that requires_font are also given the --font path: setup(input_dir, output_dir, font_path).
+    """
+    def register(setup):
+        BENCHMARK_CASES[name] = (setup, description, requires_pdf, requires_font)
+        return setup
+    return register
+
+
+def pdf_available():
+    """True if PDFs can be rasterised here (pdf2image and poppler's pdftoppm)."""
+    try:
+        import pdf2image # noqa: F401
+    except ImportError:
+        return False
+    return shutil.which("pdftoppm") is not None
+
+
+def outline_font_problem(font_path=None):
+    """Why outline text can't be rendered here with this font (None if it can)."""
+    from glyph_outlines import FONTTOOLS_INSTALLED, outline_font_error
+    if not FONTTOOLS_INSTALLED:
+        return "Outline text needs fontTools (pip install fonttools)."
+    return outline_font_error(font_path)
+
+
+# --- Synthetic inputs ---
+
+def make_many_contours_image(path, size=CANVAS_4K, grid=MANY_CONTOURS_GRID, seed=SEED):
+    """Writes a black image with one small filled blob per grid cell (about 10k separate contours)."""
+    import cv2
+    rng = np.random.default_rng(seed)
+    cols, rows = grid
+    cell_w, cell_h = size[0] // cols, size[1] // rows
+    image = np.zeros((size[1], size[0]), dtype=np.uint8)
+    radius = max(2, min(cell_w, cell_h) // 3)
+    for row in range(rows):
+        for col in range(cols):
+            center = (col * cell_w + cell_w // 2 + int(rng.integers(-2, 3)),
+                      row * cell_h + cell_h // 2 + int(rng.integers(-2, 3)))
+            if rng.random() < 0.5:
+                cv2.circle(image, center, radius, 255, -1)
+            else:
+                cv2.rectangle(image, (center[0] - radius, center[1] - radius),
+                              (center[0] + radius, center[1] + radius), 255, -1)
+    cv2.imwrite(path, image)
+
+
+def make_many_segments_svg(path, size=CANVAS_4K, paths=SVG_PATHS, segments=SVG_SEGMENTS_PER_PATH, seed=SEED):
+    """Writes an SVG of random-walk paths mixing lines, quadratic and cubic curves (paths x segments in all)."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'viewBox="0 0 {width} {height}">']
+    for _ in range(paths):
+        x, y = rng.uniform(0, width), rng.uniform(0, height)
+        commands = [f"M{x:.1f},{y:.1f}"]
+        for kind, step in zip(rng.integers(0, 3, segments), rng.uniform(-40, 40, (segments, 6))):
+            points = np.clip(step + np.tile([x, y], 3), 0, np.tile([width, height], 3))
+            x, y = points[4], points[5]
+            if kind == 0:
+                commands.append(f"L{x:.1f},{y:.1f}")
+            elif kind == 1:
+                commands.append(f"Q{points[0]:.1f},{points[1]:.1f} {x:.1f},{y:.1f}")
+            else:
+                commands.append("C" + " ".join(f"{px:.1f},{py:.1f}" for px, py in points.reshape(3, 2)))
+        lines.append(f'<path d="{" ".join(commands)}" fill="none" stroke="#00ffff"/>')
+    lines.append("</svg>")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+SYNTHETIC_INPUTS = {
+    "many_contours.png": make_many_contours_image,
+    "many_segments.svg": make_many_segments_svg,
+}
+
+
+def prepare_inputs(input_dir):
+    """Generates any missing synthetic inputs into input_dir."""
+    os.makedirs(input_dir, exist_ok=True)
+    for name, make in SYNTHETIC_INPUTS.items():
+        path = os.path.join(input_dir, name)
+        if not os.path.exists(path):
+            print(f"Generating {path}...")
+            make(path)
+
+
+# --- Cases ---
+
+def _image_megapixels(path):
+    from PIL import Image
+    with Image.open(path) as image:
+        return image.size[0] * image.size[1] / 1e6
+
+
+def _check_image_file(path):
+    """Raises RuntimeError unless path is a readable image, so a failed render is never timed as a fast one."""
+    from PIL import Image
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (OSError, SyntaxError) as e:
+        raise RuntimeError(f"No valid output at {path}: {e}")
+
+
+def _checked(render, what):
+    """Wraps an in-memory render so that producing nothing fails the case."""
+    def run():
+        if render() is None:
+            raise RuntimeError(f"{what} produced nothing")
+    return run
+
+
+def _render_input_case(input_path, output_dir, megapixels, **options):
+    from apply_neon import make_render_args, render_input
+    args = make_render_args(**options)
+    output_path = os.path.join(output_dir, "out.png")
+
+    def run():
+        if os.path.exists(output_path):
+            os.remove(output_path) # The previous run's output must not pass for this one's
+        if not render_input(input_path, output_path, args):
+            raise RuntimeError(f"render_input failed for {input_path}")
+        _check_image_file(output_path)
+    return run, megapixels, "Mpx"
+
+
+@benchmark_case("cli_circle", "render_input: circle at the default 400x400")
+def case_cli_circle(input_dir, output_dir):
+    return _render_input_case("circle", output_dir, 0.16)
+
+
+@benchmark_case("cli_png", "render_input: example.png")
+def case_cli_png(input_dir, output_dir):
+    return _render_input_case("example.png", output_dir, _image_megapixels("example.png"))
+
+
+@benchmark_case("cli_svg", "render_input: example.svg at the default 400x400")
+def case_cli_svg(input_dir, output_dir):
+    return _render_input_case("example.svg", output_dir, 0.16)
+
+
+@benchmark_case("cli_pdf", "render_input: example.pdf page 1 at 200 dpi", requires_pdf=True)
+def case_cli_pdf(input_dir, output_dir):
+    from input_handlers import get_contours_from_pdf
+    _, image_size = get_contours_from_pdf("example.pdf")
+    return _render_input_case("example.pdf", output_dir, image_size[0] * image_size[1] / 1e6)
+
+
+@benchmark_case("cli_txt", "render_input: example.txt, raster text")
+def case_cli_txt(input_dir, output_dir):
+    return _render_input_case("example.txt", output_dir, 0.16)
+
+
+@benchmark_case("cli_txt_outline", "render_input: example.txt, outline text", requires_font=True)
+def case_cli_txt_outline(input_dir, output_dir, font_path):
+    # render_input quietly falls back to raster text when the font can't be read; fail instead of timing that
+    font_problem = outline_font_problem(font_path)
+    if font_problem:
+        raise RuntimeError(font_problem)
+    return _render_input_case("example.txt", output_dir, 0.16, textmode="outline", font=font_path)
+
+
+@benchmark_case("bytes_png", "render_to_bytes: example.png bytes to PNG bytes, in memory")
+def case_bytes_png(input_dir, output_dir):
+    from apply_neon import make_render_args, render_to_bytes
+    with open("example.png", "rb") as f:
+        data = f.read()
+    args = make_render_args()
+    return (_checked(lambda: render_to_bytes("png", data, args), "render_to_bytes"),
+            _image_megapixels("example.png"), "Mpx")
+
+
+@benchmark_case("bytes_svg", "render_to_bytes: example.svg bytes to PNG bytes, in memory")
+def case_bytes_svg(input_dir, output_dir):
+    from apply_neon import make_render_args, render_to_bytes
+    with open("example.svg", "rb") as f:
+        data = f.read()
+    args = make_render_args()
+    return _checked(lambda: render_to_bytes("svg", data, args), "render_to_bytes"), 0.16, "Mpx"
+
+
+@benchmark_case("detect_10k", "get_contours_from_image: 4K image of ~10k blobs")
+def case_detect_10k(input_dir, output_dir):
+    from input_handlers import get_contours_from_image
+    path = os.path.join(input_dir, "many_contours.png")
+    count = len(get_contours_from_image(path))
+    return lambda: get_contours_from_image(path), count, "contours"
+
+
+@benchmark_case("cli_10k", "render_input: 4K image of ~10k blobs, detect and draw")
+def case_cli_10k(input_dir, output_dir):
+    path = os.path.join(input_dir, "many_contours.png")
+    return _render_input_case(path, output_dir, _image_megapixels(path))
+
+
+@benchmark_case("flatten_100k", "svg_to_subpaths: 100k-segment SVG, parse and flatten")
+def case_flatten_100k(input_dir, output_dir):
+    from neon_styling import svg_to_subpaths
+    path = os.path.join(input_dir, "many_segments.svg")
+    return lambda: svg_to_subpaths(path, canvas_size=CANVAS_4K), SVG_PATHS * SVG_SEGMENTS_PER_PATH, "segments"
+
+
+@benchmark_case("cli_svg_100k", "render_input: 100k-segment SVG onto a 4K canvas")
+def case_cli_svg_100k(input_dir, output_dir):
+    path = os.path.join(input_dir, "many_segments.svg")
+    return _render_input_case(path, output_dir, CANVAS_4K[0] * CANVAS_4K[1] / 1e6,
+                              width=CANVAS_4K[0], height=CANVAS_4K[1])
+
+
+@benchmark_case("canvas_4k", "render_to_array: circle on a 4K canvas with the 'neon' glow layers")
+def case_canvas_4k(input_dir, output_dir):
+    from apply_neon import make_render_args, render_to_array
+    from glow_engine import parse_glow_layers
+    args = make_render_args(width=CANVAS_4K[0], height=CANVAS_4K[1], linewidth=12, glowradius=40,
+                            glowlayers=parse_glow_layers("neon"))
+    return _checked(lambda: render_to_array("circle", None, args), "render_to_array"), \
+        CANVAS_4K[0] * CANVAS_4K[1] / 1e6, "Mpx"
+
+
+@benchmark_case("canvas_8k", "render_to_array: circle on an 8K canvas")
+def case_canvas_8k(input_dir, output_dir):
+    from apply_neon import make_render_args, render_to_array
+    args = make_render_args(width=CANVAS_8K[0], height=CANVAS_8K[1], linewidth=20, glowradius=60)
+    return _checked(lambda: render_to_array("circle", None, args), "render_to_array"), \
+        CANVAS_8K[0] * CANVAS_8K[1] / 1e6, "Mpx"
+
+
+@benchmark_case("tiled_8k", "apply_neon_effect_tiled: ~10k blobs scaled to 8K, 1024px tiles")
+def case_tiled_8k(input_dir, output_dir):
+    from input_handlers import get_contours_from_image
+    from tiled_render import apply_neon_effect_tiled
+    contours = [contour * 2 for contour in get_contours_from_image(os.path.join(input_dir, "many_contours.png"))]
+    output_path = os.path.join(output_dir, "tiled.png")
+
+    def run():
+        if not apply_neon_effect_tiled(contours, output_path, image_size=CANVAS_8K, tile_size=1024):
+            raise RuntimeError("apply_neon_effect_tiled failed")
+        _check_image_file(output_path)
+    return run, CANVAS_8K[0] * CANVAS_8K[1] / 1e6, "Mpx"
+
+
+# --- Running and checking ---
+
+def run_case(name, input_dir, repeat, warmup=1, font_path=None):
+    """
+    Runs one case in this process (the child side of measure_case).
+
+    Returns:
+        dict: best/median seconds, units, unit, throughput (units per second) and peak_rss_mb.
+    """
+    setup, _, _, requires_font = BENCHMARK_CASES[name]
+    with tempfile.TemporaryDirectory(prefix="neon_bench_") as output_dir:
+        run, units, unit = setup(input_dir, output_dir, font_path) if requires_font else setup(input_dir, output_dir)
+        for _ in range(warmup):
+            run()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {"best_seconds": round(best, 6), "median_seconds": round(float(np.median(timings)), 6),
+            "units": units, "unit": unit, "throughput": round(units / best, 3) if best > 0 else None,
+            "peak_rss_mb": peak_rss_mb(), "peak_rss_children_mb": peak_rss_mb(children=True)}
+
+
+def measure_case(name, input_dir, repeat, warmup=1, font_path=None):
+    """
+    Runs one case in a fresh interpreter.
+
+    Returns:
+        dict: The run_case result, or {'error': message} if the case failed.
+    """
+    command = [sys.executable, os.path.abspath(__file__), "--run-case", name, "--inputdir", input_dir,
+               "--repeat", str(repeat), "--warmup", str(warmup)]
+    if font_path:
+        command += ["--font", font_path]
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {result.returncode}"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare_to_baseline(name, result, baseline, tolerance, rss_tolerance):
+    """
+    Checks one case against its baseline entry.
+
+    Returns:
+        list: Regression messages (empty if the case is within tolerance or has no baseline).
+    """
+    base = baseline.get(name)
+    if not base or "error" in result:
+        return []
+    problems = []
+    time_limit = base["best_seconds"] * (1 + tolerance) + TIME_SLACK_SECONDS
+    if result["best_seconds"] > time_limit:
+        problems.append(f"{name}: {result['best_seconds'] * 1000:.1f}ms vs baseline "
+                        f"{base['best_seconds'] * 1000:.1f}ms ({(result['best_seconds'] / base['best_seconds'] - 1) * 100:+.0f}%)")
+    if result.get("peak_rss_mb") is not None and base.get("peak_rss_mb") is not None:
+        rss_limit = base["peak_rss_mb"] * (1 + rss_tolerance) + RSS_SLACK_MB
+        if result["peak_rss_mb"] > rss_limit:
+            problems.append(f"{name}: peak RSS {result['peak_rss_mb']:.0f}MB vs baseline {base['peak_rss_mb']:.0f}MB")
+    return problems
+
+
+def format_change(result, base):
+    """Time change against the baseline as a signed percentage, or '' without one."""
+    if not base or "error" in result:
+        return ""
+    return f"{(result['best_seconds'] / base['best_seconds'] - 1) * 100:+.0f}%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the neon render entry points on the sample inputs and "
+                                                 "generated large inputs, and fail on regressions against a saved baseline.")
+    parser.add_argument("cases", nargs="*",
+                        help=f"Cases to run (default: all of {', '.join(BENCHMARK_CASES)}).")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Timed runs per case after one warm-up run; the fastest is reported (default: 5).")
+    parser.add_argument("--warmup", type=int, default=1, help=argparse.SUPPRESS)
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE,
+                        help=f"Baseline JSON to compare against or save to (default: {DEFAULT_BASELINE}).")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Write this run's results to --baseline (merged with cases not run) instead of checking.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction (default: 0.25).")
+    parser.add_argument("--rsstolerance", type=float, default=0.2,
+                        help="Allowed peak RSS growth against the baseline, as a fraction (default: 0.2).")
+    parser.add_argument("--inputdir", type=str, default=None,
+                        help="Directory for the generated inputs, reused between runs (default: a temporary directory).")
+    parser.add_argument("--font", type=str, default=None,
+                        help="Real .ttf/.otf font for the outline text case (default: the bundled arial.ttf, "
+                             "a placeholder; the case is skipped unless it is replaced, and fails if this font "
+                             "can't be read).")
+    parser.add_argument("--json", type=str, default=None, metavar="PATH",
+                        help="Also write this run's results as JSON to PATH.")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit.")
+    parser.add_argument("--run-case", type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.list:
+        for name, (_, description, _, _) in BENCHMARK_CASES.items():
+            print(f"{name:<16} {description}")
+        sys.exit(0)
+
+    if args.font:
+        args.font = os.path.abspath(args.font) # Cases run from the repo directory
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.inputdir, args.repeat, args.warmup, args.font)))
+        sys.exit(0)
+
+    unknown = [name for name in args.cases if name not in BENCHMARK_CASES]
+    if unknown:
+        parser.error(f"Unknown case(s): {', '.join(unknown)}")
+    selected = args.cases or list(BENCHMARK_CASES)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["cases"]
+    elif not args.save_baseline:
+        print(f"No baseline at {args.baseline}; reporting only (save one with --save-baseline).")
+
+    with tempfile.TemporaryDirectory(prefix="neon_bench_inputs_") as temp_dir:
+        input_dir = os.path.abspath(args.inputdir or temp_dir)
+        prepare_inputs(input_dir)
+        has_pdf = pdf_available()
+        # Without --font the outline case is skipped like cli_pdf when the placeholder font can't be used
+        font_problem = None if args.font else outline_font_problem()
+
+        results = {}
+        regressions = []
+        print(f"{'case':<16} {'best':>10} {'median':>10} {'throughput':>22} {'peak RSS':>9} {'vs base':>8}")
+        for name in selected:
+            _, description, requires_pdf, requires_font = BENCHMARK_CASES[name]
+            if requires_pdf and not has_pdf:
+                print(f"{name:<16} skipped: PDF rasterising needs pdf2image and poppler")
+                continue
+            if requires_font and font_problem:
+                print(f"{name:<16} skipped: outline text needs fontTools and a real font (pass --font)")
+                continue
+            result = measure_case(name, input_dir, args.repeat, args.warmup, args.font)
+            results[name] = result
+            if "error" in result:
+                print(f"{name:<16} FAILED: {result['error']}")
+                regressions.append(f"{name}: failed ({result['error']})")
+                continue
+            rss = "-" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f}MB"
+            print(f"{name:<16} {result['best_seconds'] * 1000:8.1f}ms {result['median_seconds'] * 1000:8.1f}ms "
+                  f"{result['throughput']:>12,.1f} {result['unit'] + '/s':<9} {rss:>9} "
+                  f"{format_change(result, baseline.get(name)):>8}")
+            if not args.save_baseline:
+                regressions.extend(compare_to_baseline(name, result, baseline, args.tolerance, args.rsstolerance))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "cases": results}, f, indent=2)
+            f.write("\n")
+
+    if args.save_baseline:
+        saved = dict(baseline, **{name: result for name, result in results.items() if "error" not in result})
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "cases": saved}, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline for {len(saved)} case(s) to {args.baseline}.")
+    elif regressions:
+        print("\nRegressions against the baseline:")
+        for message in regressions:
+            print(f"  {message}")
+        sys.exit(1)
@@ -0,0 +1,28 @@
+# conftest.py
+
+# Fixtures shared by the renderer tests: a few tubes to draw, and an output path
+# no renderer can write to.
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def contours():
+    """A closed quadrilateral and an open line, as OpenCV (N, 1, 2) int32 contours on an image_size canvas."""
+    return [np.array([[[20, 30]], [[180, 40]], [[150, 170]], [[30, 150]]], dtype=np.int32),
+            np.array([[[90, 20]], [[100, 190]]], dtype=np.int32)]
+
+
+@pytest.fixture
+def image_size():
+    return (200, 210)
+
+
+@pytest.fixture
+def unwritable_path(tmp_path):
+    """Returns a function giving an output path with the given name where a directory is in the way."""
+    def make(name):
+        path = tmp_path / "unwritable" / name
+        path.mkdir(parents=True)
+        return str(path)
+    return make
@@ -0,0 +1,283 @@
+# contour_detection.py
+
+# Ensure necessary libraries are installed: pip install opencv-python numpy
+import cv2
+import numpy as np
+
+from neon_profile import count_contours, get_logger, stage
+
+log = get_logger("contour_detection")
+
+DETECTION_STRATEGIES = ("canny", "otsu", "adaptive", "alpha")
+
+# Spread around the median brightness used for automatic Canny thresholds
+AUTO_THRESHOLD_SIGMA = 0.33
+# Neighbourhood (pixels, odd) and offset for the adaptive threshold strategy
+ADAPTIVE_BLOCK_SIZE = 31
+ADAPTIVE_OFFSET = 5
+# Alpha values above this count as "inside" for the alpha strategy
+ALPHA_CUTOFF = 127
+
+
+def auto_canny_thresholds(gray, sigma=AUTO_THRESHOLD_SIGMA):
+    """
+    Picks Canny thresholds around the median brightness of an image.
+
+    Args:
+        gray (np.ndarray): HxW uint8 image.
+        sigma (float): Relative spread of the low/high thresholds around the median.
+
+    Returns:
+        tuple: (low, high) thresholds.
+    """
+    median = float(np.median(gray))
+    low = int(max(0, (1.0 - sigma) * median))
+    high = int(min(255, (1.0 + sigma) * median))
+    if high <= low:
+        # Flat artwork (e.g. all-black background) has no spread; any real step is an edge
+        high = low + 1
+    return low, high
+
+
+def binarize_foreground(mask):
+    """Flips a thresholded mask if it marked the background, so shapes are always white."""
+    # The border is almost always background; if most of it is white, invert
+    border = np.concatenate((mask[0], mask[-1], mask[:, 0], mask[:, -1]))
+    if np.count_nonzero(border) > border.size // 2:
+        cv2.bitwise_not(mask, dst=mask)
+    return mask
+
+
+class ContourDetector:
+    """
+    Contour detection shared by every raster input (PNG, PDF pages, rendered text).
+
+    Strategies:
+        'canny'    - Gaussian blur, Canny edges, contours of the edge map. Thresholds are
+                     fixed (low/high) or picked from the median brightness when None.
+        'otsu'     - Global Otsu threshold, contours of the shapes. Good for text and flat artwork.
+        'adaptive' - Local Gaussian-weighted threshold, for uneven lighting (scans, photos of signs).
+        'alpha'    - Shapes from the alpha channel of a transparent PNG. Falls back to 'otsu'
+                     when the image has no alpha channel.
+
+    More strategies can be added with register_strategy().
+    """
+
+    _strategies = {}
+
+    def __init__(self, strategy="canny", low_threshold=None, high_threshold=None, blur_size=5,
+                 retrieval_mode=cv2.RETR_EXTERNAL, fallback_to_auto=True):
+        """
+        Args:
+            strategy (str): One of DETECTION_STRATEGIES (or a registered strategy).
+            low_threshold (int, optional): Canny low threshold. None (with high_threshold) = auto.
+            high_threshold (int, optional): Canny high threshold. None (with low_threshold) = auto.
+            blur_size (int): Gaussian blur kernel size before detection (0 = no blur).
+            retrieval_mode (int): cv2.findContours retrieval mode.
+            fallback_to_auto (bool): Retry 'canny' with automatic thresholds when fixed ones find nothing.
+
+        Raises:
+            ValueError: If the strategy is unknown.
+        """
+        if strategy not in self._strategies:
+            raise ValueError(f"Unknown detection strategy '{strategy}'. Use one of: {', '.join(self._strategies)}.")
+        self.strategy = strategy
+        self.low_threshold = low_threshold
+        self.high_threshold = high_threshold
+        self.blur_size = blur_size
+        self.retrieval_mode = retrieval_mode
+        self.fallback_to_auto = fallback_to_auto
+
+    @classmethod
+    def register_strategy(cls, name, func):
+        """
+        Adds a detection strategy.
+
+        Args:
+            name (str): Strategy name used by ContourDetector(strategy=name).
+            func (callable): func(detector, gray, alpha) -> HxW uint8 mask/edge map
+                             (alpha is the alpha channel or None).
+        """
+        cls._strategies[name] = func
+
+    @property
+    def needs_alpha(self):
+        return self.strategy == "alpha"
+
+    def params(self):
+        """Returns the options that change the detected contours (for cache keys)."""
+        return {
+            "strategy": self.strategy,
+            "low": self.low_threshold,
+            "high": self.high_threshold,
+            "blur": self.blur_size,
+            "mode": self.retrieval_mode,
+        }
+
+    # --- Strategies ---
+    def _blur(self, gray):
+        if self.blur_size and self.blur_size > 1:
+            with stage("blur"):
+                return cv2.GaussianBlur(gray, (self.blur_size, self.blur_size), 0)
+        return gray
+
+    def _canny(self, gray, alpha=None):
+        blurred = self._blur(gray)
+        if self.low_threshold is None or self.high_threshold is None:
+            low, high = auto_canny_thresholds(blurred)
+        else:
+            low, high = self.low_threshold, self.high_threshold
+        with stage("canny"):
+            return cv2.Canny(blurred, low, high)
+
+    def _otsu(self, gray, alpha=None):
+        blurred = self._blur(gray)
+        with stage("threshold"):
+            _, mask = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            return binarize_foreground(mask)
+
+    def _adaptive(self, gray, alpha=None):
+        block_size = min(ADAPTIVE_BLOCK_SIZE, (min(gray.shape[:2]) // 2) * 2 - 1)
+        if block_size < 3:
+            return self._otsu(gray)
+        blurred = self._blur(gray)
+        with stage("threshold"):
+            mask = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY, block_size, ADAPTIVE_OFFSET)
+            return binarize_foreground(mask)
+
+    def _alpha(self, gray, alpha=None):
+        if alpha is None:
+            log.warning("Image has no alpha channel. Using 'otsu' detection instead.")
+            return self._otsu(gray)
+        with stage("threshold"):
+            _, mask = cv2.threshold(alpha, ALPHA_CUTOFF, 255, cv2.THRESH_BINARY)
+        return mask
+
+    # --- Detection ---
+    def detect(self, gray, alpha=None):
+        """
+        Detects contours in a grayscale image.
+
+        Args:
+            gray (np.ndarray): HxW uint8 image.
+            alpha (np.ndarray, optional): HxW uint8 alpha channel (used by the 'alpha' strategy).
+
+        Returns:
+            list: List of detected contours (OpenCV format).
+        """
+        mask = self._strategies[self.strategy](self, gray, alpha)
+        with stage("find_contours"):
+            contours, _ = cv2.findContours(mask, self.retrieval_mode, cv2.CHAIN_APPROX_SIMPLE)
+
+        fixed_thresholds = self.low_threshold is not None and self.high_threshold is not None
+        if not contours and self.strategy == "canny" and fixed_thresholds and self.fallback_to_auto:
+            blurred = self._blur(gray)
+            with stage("canny"):
+                edges = cv2.Canny(blurred, *auto_canny_thresholds(blurred))
+            with stage("find_contours"):
+                contours, _ = cv2.findContours(edges, self.retrieval_mode, cv2.CHAIN_APPROX_SIMPLE)
+            log.info("Note: Canny %s/%s found no shapes; automatic thresholds found %d.",
+                     self.low_threshold, self.high_threshold, len(contours))
+        count_contours(contours, "detected")
+        return list(contours)
+
+    def load_image(self, image_path):
+        """
+        Reads an image straight into grayscale (plus its alpha channel for the 'alpha' strategy).
+
+        Returns:
+            tuple: (gray HxW uint8, alpha HxW uint8 or None), or (None, None) if unreadable.
+        """
+        with stage("decode"):
+            if not self.needs_alpha:
+                return cv2.imread(image_path, cv2.IMREAD_GRAYSCALE), None
+            return self._split_alpha(cv2.imread(image_path, cv2.IMREAD_UNCHANGED))
+
+    def decode_image(self, data):
+        """
+        Decodes an encoded image (PNG, JPEG, WebP, ... bytes) like load_image, without touching disk.
+
+        Returns:
+            tuple: (gray HxW uint8, alpha HxW uint8 or None), or (None, None) if undecodable.
+        """
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        if buffer.size == 0:
+            return None, None
+        with stage("decode"):
+            if not self.needs_alpha:
+                return cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE), None
+            return self._split_alpha(cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED))
+
+    @staticmethod
+    def split_array(image):
+        """
+        Converts an in-memory RGB/RGBA/grayscale array (Pillow channel order) to (gray uint8, alpha uint8 or None).
+        """
+        image = np.asarray(image)
+        if image.ndim == 3 and image.shape[2] in (3, 4):
+            # Reverse the colour channels so the BGR conversions in _split_alpha apply
+            image = np.ascontiguousarray(image[:, :, [2, 1, 0, 3][:image.shape[2]]])
+        elif image.ndim != 2:
+            return None, None
+        return ContourDetector._split_alpha(image)
+
+    @staticmethod
+    def _split_alpha(image):
+        """Converts an IMREAD_UNCHANGED image to (gray uint8, alpha uint8 or None)."""
+        if image is None:
+            return None, None
+        if image.dtype != np.uint8:
+            image = cv2.convertScaleAbs(image, alpha=255.0 / np.iinfo(image.dtype).max)
+        if image.ndim == 2:
+            return image, None
+        if image.shape[2] == 4:
+            return cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY), image[:, :, 3]
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY), None
+
+    def detect_file(self, image_path):
+        """
+        Loads an image file and detects contours in it.
+
+        Returns:
+            tuple: (list of contours, tuple image_size) or (None, None) if the image can't be read.
+        """
+        gray, alpha = self.load_image(image_path)
+        if gray is None:
+            return None, None
+        return self.detect(gray, alpha), (gray.shape[1], gray.shape[0])
+
+    def detect_bytes(self, data):
+        """
+        Decodes an encoded image in memory and detects contours in it.
+
+        Returns:
+            tuple: (list of contours, tuple image_size) or (None, None) if the image can't be decoded.
+        """
+        gray, alpha = self.decode_image(data)
+        if gray is None:
+            return None, None
+        return self.detect(gray, alpha), (gray.shape[1], gray.shape[0])
+
+    def detect_array(self, image):
+        """
+        Detects contours in a decoded HxW, HxWx3 (RGB) or HxWx4 (RGBA) image array.
+
+        Returns:
+            tuple: (list of contours, tuple image_size) or (None, None) for an unsupported array shape.
+        """
+        gray, alpha = self.split_array(image)
+        if gray is None:
+            return None, None
+        return self.detect(gray, alpha), (gray.shape[1], gray.shape[0])
+
+
+ContourDetector.register_strategy("canny", ContourDetector._canny)
+ContourDetector.register_strategy("otsu", ContourDetector._otsu)
+ContourDetector.register_strategy("adaptive", ContourDetector._adaptive)
+ContourDetector.register_strategy("alpha", ContourDetector._alpha)
+
+
+# Detector each input handler used before detection became configurable
+IMAGE_DETECTOR = ContourDetector("canny", 100, 200, blur_size=5)
+TEXT_DETECTOR = ContourDetector("canny", 50, 150, blur_size=0)
@@ -0,0 +1,167 @@
+# contour_format.py
+
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+# Neon contour file (.ncf) layout, little-endian:
+#   header   magic, version, dtype code, image width, image height, contour count, point count
+#   offsets  int64[contour count + 1]   start index of each contour in `points`
+#   points   int32/float32[point count, 2]   (x, y) for every contour, back to back
+# Everything after the header is 8-byte aligned, so the arrays can be memory-mapped in place.
+CONTOUR_FILE_MAGIC = b"NEONCNT\x00"
+CONTOUR_FILE_VERSION = 1
+CONTOUR_FILE_EXTENSION = ".ncf"
+
+_HEADER = struct.Struct("<8sIIIIQQ")
+_DTYPES = {0: np.dtype("<i4"), 1: np.dtype("<f4")}
+_DTYPE_CODES = {np.dtype("<i4"): 0, np.dtype("<f4"): 1}
+
+
+def pack_contours(contours, dtype=np.int32):
+    """
+    Flattens a list of contours into one points array plus offsets.
+
+    Args:
+        contours (list): Contours in OpenCV (N, 1, 2) or plain (N, 2) layout.
+        dtype: np.int32 for pixel contours, np.float32 for sub-pixel paths.
+
+    Returns:
+        tuple: (points (P, 2) array, offsets int64 array of length len(contours) + 1)
+    """
+    lengths = [len(contour) for contour in contours]
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    points = np.empty((int(offsets[-1]), 2), dtype=dtype)
+    for contour, start, end in zip(contours, offsets[:-1], offsets[1:]):
+        points[start:end] = np.asarray(contour).reshape(-1, 2)
+    return points, offsets
+
+
+def unpack_contours(points, offsets):
+    """
+    Splits a flat points array back into OpenCV-style (N, 1, 2) contour views (no copies).
+
+    Returns:
+        list: List of contours.
+    """
+    return [points[start:end].reshape(-1, 1, 2) for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def write_packed_contours(f, points, offsets, image_size):
+    """Writes already packed contours (see pack_contours) to an open binary file."""
+    dtype = points.dtype.newbyteorder("<")
+    if dtype not in _DTYPE_CODES:
+        raise ValueError(f"Unsupported contour dtype {points.dtype}; use int32 or float32.")
+    header = _HEADER.pack(CONTOUR_FILE_MAGIC, CONTOUR_FILE_VERSION, _DTYPE_CODES[dtype],
+                          int(image_size[0]), int(image_size[1]), len(offsets) - 1, len(points))
+    f.write(header)
+    f.write(offsets.astype("<i8", copy=False).tobytes())
+    f.write(points.astype(dtype, copy=False).tobytes())
+
+
+def save_contours(path, contours, image_size, dtype=np.int32):
+    """
+    Writes contours and the size of the image they were detected on to a .ncf file.
+
+    Args:
+        path (str): Output file path.
+        contours (list): Contours in OpenCV (N, 1, 2) or plain (N, 2) layout.
+        image_size (tuple): (width, height) of the source image/canvas.
+        dtype: np.int32 (default) or np.float32.
+    """
+    points, offsets = pack_contours(contours, dtype)
+    with open(path, 'wb') as f:
+        write_packed_contours(f, points, offsets, image_size)
+
+
+def load_contours(path, mmap=True):
+    """
+    Reads a .ncf file.
+
+    Args:
+        path (str): Path to the .ncf file.
+        mmap (bool): Memory-map the arrays instead of reading them into memory.
+
+    Returns:
+        tuple: (list of contours, tuple image_size). Contours are views into one points array.
+
+    Raises:
+        ValueError: If the file is not a contour file or is truncated.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError(f"'{path}' is too short to be a contour file.")
+    magic, version, dtype_code, width, height, n_contours, n_points = _HEADER.unpack(header)
+    if magic != CONTOUR_FILE_MAGIC:
+        raise ValueError(f"'{path}' is not a neon contour file.")
+    if version != CONTOUR_FILE_VERSION or dtype_code not in _DTYPES:
+        raise ValueError(f"Unsupported contour file version {version} / dtype {dtype_code} in '{path}'.")
+
+    dtype = _DTYPES[dtype_code]
+    offsets_bytes = (n_contours + 1) * 8
+    expected_size = _HEADER.size + offsets_bytes + n_points * 2 * dtype.itemsize
+    if os.path.getsize(path) < expected_size:
+        raise ValueError(f"Contour file '{path}' is truncated.")
+
+    if mmap and n_points > 0:
+        offsets = np.memmap(path, dtype="<i8", mode='r', offset=_HEADER.size, shape=(n_contours + 1,))
+        points = np.memmap(path, dtype=dtype, mode='r', offset=_HEADER.size + offsets_bytes, shape=(n_points, 2))
+    else:
+        with open(path, 'rb') as f:
+            f.seek(_HEADER.size)
+            offsets = np.frombuffer(f.read(offsets_bytes), dtype="<i8")
+            points = np.frombuffer(f.read(n_points * 2 * dtype.itemsize), dtype=dtype).reshape(n_points, 2)
+    return unpack_contours(points, offsets), (width, height)
+
+
+def main():
+    # Local import: apply_neon imports this module for .ncf inputs
+    from apply_neon import add_common_arguments, extract_contours, get_input_kind, render_input
+    from neon_profile import add_diagnostic_arguments, configure_logging, profiled
+
+    parser = argparse.ArgumentParser(description="Run contour detection and neon rendering as separate stages.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    extract_parser = subparsers.add_parser("extract", help="Detect contours in a PNG/PDF/TXT input and save them.")
+    extract_parser.add_argument("input_path", help="Path to the input file (PNG, PDF, TXT), or any path with --text.")
+    extract_parser.add_argument("contour_path", help=f"Path to write the contour file ({CONTOUR_FILE_EXTENSION}).")
+
+    render_parser = subparsers.add_parser("render", help="Render a saved contour file with neon styling.")
+    render_parser.add_argument("contour_path", help=f"Path to a contour file ({CONTOUR_FILE_EXTENSION}).")
+    render_parser.add_argument("output_path", help="Path to save the output neon PNG image.")
+
+    for subparser in (extract_parser, render_parser):
+        add_common_arguments(subparser)
+        add_diagnostic_arguments(subparser)
+    args = parser.parse_args()
+    configure_logging(args.loglevel)
+
+    if args.command == "render":
+        with profiled(args.profile, args.cprofile, input=args.contour_path, output=args.output_path):
+            success = render_input(args.contour_path, args.output_path, args)
+        sys.exit(0 if success else 1)
+
+    input_kind = get_input_kind(args.input_path, args)
+    if input_kind not in ('png', 'pdf', 'txt', 'text'):
+        print("Error: 'extract' supports PNG, PDF and TXT inputs (or --text).")
+        sys.exit(1)
+    with profiled(args.profile, args.cprofile, input=args.input_path, output=args.contour_path):
+        contours, image_size = extract_contours(args.input_path, input_kind, args)
+    if contours is None:
+        print("No contours found or error occurred during contour detection. Nothing saved.")
+        sys.exit(1)
+
+    output_dir = os.path.dirname(args.contour_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    save_contours(args.contour_path, contours, image_size)
+    print(f"Saved {len(contours)} contours ({image_size[0]}x{image_size[1]}) to {args.contour_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# glyph_outlines.py
+
+# Ensure necessary libraries are installed: pip install fonttools svgpathtools numpy
+import os
+from functools import lru_cache
+
+import numpy as np
+from svgpathtools import CubicBezier, Line, Path, QuadraticBezier
+
+from neon_styling import path_to_subpaths
+from neon_profile import get_logger, stage
+
+log = get_logger("glyph_outlines")
+
+# Attempt to import fontTools, handle if not installed
+try:
+    from fontTools.pens.basePen import BasePen
+    from fontTools.ttLib import TTFont, TTLibError
+    FONTTOOLS_INSTALLED = True
+except ImportError:
+    BasePen = object
+    FONTTOOLS_INSTALLED = False
+
+# Font used when none is given; the arial.ttf in the repo is a placeholder, so outline text needs a real --font
+DEFAULT_FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arial.ttf")
+# Points per glyph curve when no flattening tolerance is given
+GLYPH_CURVE_STEPS = 8
+# Cache sizes: loaded fonts, and flattened glyphs per (font, size, glyph, tolerance)
+FONT_CACHE_SIZE = 16
+GLYPH_CACHE_SIZE = 4096
+
+
+class _PathPen(BasePen):
+    """fontTools pen that collects a glyph outline as svgpathtools segments, in pixels with y down."""
+
+    def __init__(self, glyph_set, scale):
+        super().__init__(glyph_set)
+        self.scale = scale
+        self.segments = []
+        self.start = None
+        self.current = None
+
+    def _point(self, pt):
+        return complex(pt[0] * self.scale, -pt[1] * self.scale)
+
+    def _moveTo(self, pt):
+        self.start = self.current = self._point(pt)
+
+    def _lineTo(self, pt):
+        end = self._point(pt)
+        if end != self.current:
+            self.segments.append(Line(self.current, end))
+        self.current = end
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        end = self._point(pt3)
+        self.segments.append(CubicBezier(self.current, self._point(pt1), self._point(pt2), end))
+        self.current = end
+
+    def _qCurveToOne(self, pt1, pt2):
+        end = self._point(pt2)
+        self.segments.append(QuadraticBezier(self.current, self._point(pt1), end))
+        self.current = end
+
+    def _closePath(self):
+        if self.current is not None and self.current != self.start:
+            self.segments.append(Line(self.current, self.start))
+        self.current = self.start
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_font(font_path):
+    """
+    Opens a TrueType/OpenType font once per process.
+
+    Returns:
+        tuple: (TTFont, glyph set, cmap dict, kerning dict {(left, right): value in font units}).
+
+    Raises:
+        RuntimeError: If fontTools is not installed.
+        OSError/TTLibError: If the font can't be read.
+    """
+    if not FONTTOOLS_INSTALLED:
+        raise RuntimeError("fontTools is required for outline text but not installed (pip install fonttools).")
+    font = TTFont(font_path, lazy=True)
+    return font, font.getGlyphSet(), font.getBestCmap() or {}, _read_kerning(font)
+
+
+def outline_font_error(font_path=None):
+    """
+    Checks that outline text can use a font, loading it into the cache if so.
+
+    Args:
+        font_path (str, optional): Path to a .ttf/.otf font. Defaults to DEFAULT_FONT_PATH.
+
+    Returns:
+        str: Why the font can't be used, or None if it can (or fontTools, which
+             outline text falls back without, isn't installed to check it).
+    """
+    font_path = font_path or DEFAULT_FONT_PATH
+    if not FONTTOOLS_INSTALLED:
+        return None
+    try:
+        font = load_font(font_path)[0]
+        font["head"], font["hhea"], font["hmtx"] # Read lazily: make sure the tables layout needs are there
+    except Exception as e:
+        return f"Can't read font '{font_path}' for outline text ({e}). Pass a real .ttf/.otf font with --font."
+    return None
+
+
+def _read_kerning(font):
+    """Collects pair kerning from the legacy 'kern' table and the GPOS 'kern' feature."""
+    pairs = {}
+    if "kern" in font:
+        for table in font["kern"].kernTables:
+            if getattr(table, "format", 0) == 0 and hasattr(table, "kernTable"):
+                pairs.update(table.kernTable)
+    if "GPOS" not in font or font["GPOS"].table.FeatureList is None:
+        return pairs
+
+    gpos = font["GPOS"].table
+    lookup_indices = set()
+    for record in gpos.FeatureList.FeatureRecord:
+        if record.FeatureTag == "kern":
+            lookup_indices.update(record.Feature.LookupListIndex)
+
+    glyph_order = font.getGlyphOrder()
+    for index in sorted(lookup_indices):
+        lookup = gpos.LookupList.Lookup[index]
+        for subtable in lookup.SubTable:
+            if lookup.LookupType == 9: # Extension: unwrap
+                subtable = subtable.ExtSubTable
+            if getattr(subtable, "LookupType", 2) != 2:
+                continue
+            coverage = subtable.Coverage.glyphs
+            if subtable.Format == 1:
+                for first, pair_set in zip(coverage, subtable.PairSet):
+                    for record in pair_set.PairValueRecord:
+                        value = getattr(record.Value1, "XAdvance", 0) if record.Value1 else 0
+                        if value:
+                            pairs.setdefault((first, record.SecondGlyph), value)
+            elif subtable.Format == 2:
+                class1 = subtable.ClassDef1.classDefs if subtable.ClassDef1 else {}
+                class2 = subtable.ClassDef2.classDefs
+                seconds = {}
+                for glyph in glyph_order:
+                    seconds.setdefault(class2.get(glyph, 0), []).append(glyph)
+                for first in coverage:
+                    row = subtable.Class1Record[class1.get(first, 0)].Class2Record
+                    for class_index, record in enumerate(row):
+                        value = getattr(record.Value1, "XAdvance", 0) if record.Value1 else 0
+                        if not value:
+                            continue
+                        for second in seconds.get(class_index, ()):
+                            pairs.setdefault((first, second), value)
+    return pairs
+
+
+@lru_cache(maxsize=GLYPH_CACHE_SIZE)
+def glyph_subpaths(font_path, font_size, glyph_name, tolerance=None):
+    """
+    Flattens one glyph into polylines at the origin (baseline at y=0, y down), cached.
+
+    Curves go through the same sampler as SVG paths (neon_styling.path_to_subpaths),
+    so --tolerance means the same thing for text and SVG input.
+
+    Args:
+        font_path (str): Path to the .ttf/.otf font.
+        font_size (float): Pixels per em (same meaning as PIL's truetype size).
+        glyph_name (str): Glyph name in the font.
+        tolerance (float, optional): Adaptive flattening tolerance in pixels.
+
+    Returns:
+        tuple: ((points (N, 2) float64 read-only array, closed bool), ...)
+    """
+    font, glyph_set, _, _ = load_font(font_path)
+    pen = _PathPen(glyph_set, font_size / font["head"].unitsPerEm)
+    glyph_set[glyph_name].draw(pen)
+    if not pen.segments:
+        return ()
+    subpaths = path_to_subpaths(Path(*pen.segments), GLYPH_CURVE_STEPS, tolerance)
+    for points, _ in subpaths:
+        points.flags.writeable = False # Shared by every use of the glyph
+    return tuple(subpaths)
+
+
+def layout_text(text_string, font_path, font_size, line_spacing=1.0):
+    """
+    Places glyphs for (multi-line) text: advances, pair kerning and centred lines.
+
+    Returns:
+        list: (glyph_name, x, y) pen positions in pixels; y is the baseline of the line.
+    """
+    font, glyph_set, cmap, kerning = load_font(font_path)
+    scale = font_size / font["head"].unitsPerEm
+    hhea = font["hhea"]
+    line_height = (hhea.ascent - hhea.descent + hhea.lineGap) * scale * line_spacing
+    hmtx = font["hmtx"]
+
+    placed = []
+    for line_index, line in enumerate(text_string.split("\n")):
+        names = [cmap.get(ord(char), ".notdef") for char in line]
+        names = [name if name in glyph_set else ".notdef" for name in names]
+        x = 0.0
+        line_glyphs = []
+        for i, name in enumerate(names):
+            if i > 0:
+                x += kerning.get((names[i - 1], name), 0) * scale
+            line_glyphs.append((name, x))
+            x += hmtx[name][0] * scale
+        # Centre each line on x = 0
+        placed.extend((name, gx - x / 2.0, line_index * line_height) for name, gx in line_glyphs)
+    return placed
+
+
+def get_outlines_from_text(text_string, font_path=None, font_size=60, image_size=(400, 400), tolerance=None):
+    """
+    Builds neon subpaths for text straight from the font's vector glyph outlines.
+
+    No raster or edge pass is involved: each glyph is flattened once per
+    (font, size, glyph, tolerance) and re-used at every occurrence, kerning
+    pairs are applied, and '\\n' starts a new centred line. The text block
+    is centred on the canvas.
+
+    Args:
+        text_string (str): The text to render.
+        font_path (str, optional): Path to a .ttf/.otf font. Defaults to DEFAULT_FONT_PATH.
+        font_size (int): Font size in pixels per em.
+        image_size (tuple): (width, height) of the canvas.
+        tolerance (float, optional): Adaptive curve flattening tolerance in pixels.
+
+    Returns:
+        tuple: (list of (points (N, 2) float64, closed bool), tuple image_size) or (None, None) if error.
+    """
+    font_path = font_path or DEFAULT_FONT_PATH
+    try:
+        placed = layout_text(text_string, font_path, font_size)
+        subpaths = []
+        with stage("flatten"):
+            for name, x, y in placed:
+                offset = np.array([x, y])
+                subpaths.extend((points + offset, closed)
+                                for points, closed in glyph_subpaths(font_path, font_size, name, tolerance))
+    except Exception as e:
+        log.error("Could not build glyph outlines with font '%s': %s", font_path, e)
+        return None, None
+
+    if subpaths:
+        all_points = np.concatenate([points for points, _ in subpaths])
+        low, high = all_points.min(axis=0), all_points.max(axis=0)
+        shift = (np.array(image_size, dtype=float) - (low + high)) / 2.0
+        subpaths = [(points + shift, closed) for points, closed in subpaths]
+
+    log.info("Built %d glyph outlines from %d glyphs.", len(subpaths), len(placed))
+    return subpaths, image_size
@@ -7,99 +7,402 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
+import re
 import tempfile # For handling temporary images from PDF/Text
+import threading
+from functools import lru_cache
 
-# Attempt to import pdf2image, handle if not installed
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_INSTALLED = True
-except ImportError:
-    PDF2IMAGE_INSTALLED = False
-    print("Warning: pdf2image library not found. PDF processing will be unavailable.")
-    print("Install it using: pip install pdf2image")
-    print("Also ensure Poppler is installed and in your system PATH.")
+from contour_detection import IMAGE_DETECTOR, TEXT_DETECTOR
+from neon_profile import get_logger, stage
+
+log = get_logger("input_handlers")
+
+# pdf2image is imported on the first PDF input (see load_pdf2image), not with this module
+_pdf2image = None
+
+
+def load_pdf2image():
+    """
+    Imports pdf2image on first use, so inputs other than PDF never load it or print its install warning.
+
+    Returns:
+        module: The pdf2image module, or None (after printing install instructions) if it isn't installed.
+    """
+    global _pdf2image
+    if _pdf2image is None:
+        try:
+            import pdf2image
+            _pdf2image = pdf2image
+        except ImportError:
+            _pdf2image = False
+            log.warning("pdf2image library not found. PDF processing will be unavailable.\n"
+                        "Install it using: pip install pdf2image\n"
+                        "Also ensure Poppler is installed and in your system PATH.")
+    return _pdf2image or None
 
 # --- Refactored PNG Contour Detection ---
-def get_contours_from_image(image_path):
+def get_contours_from_image(image, detector=None, return_size=False):
     """
-    Detects contours in an image file (e.g., PNG).
+    Detects contours in an image (e.g., PNG) without writing anything to disk.
 
     Args:
-        image_path (str): Path to the input image file.
+        image (str | bytes | np.ndarray): Path to an image file, encoded image bytes,
+                                          or a decoded grayscale/RGB/RGBA array.
+        detector (ContourDetector, optional): Detection strategy. Default: Canny 100/200.
+        return_size (bool): Also return the image's (width, height).
 
     Returns:
         list: List of detected contours (OpenCV format), or None if error.
+              With return_size, a tuple (contours, image_size) with both None on error.
     """
-    # Load the image using OpenCV
-    image = cv2.imread(image_path, cv2.IMREAD_COLOR)
-    if image is None:
-        print(f"Error: Could not load image at {image_path}")
-        return None # Return None on error
-
-    # --- Contour Detection Logic (same as before) ---
-    # Convert to grayscale
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    # Apply Gaussian blur to reduce noise
-    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-    # Apply Canny edge detection
-    edges = cv2.Canny(blurred, 100, 200) # Adjust thresholds as needed
-    # Find contours
-    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-    print(f"Detected {len(contours)} shapes in the image '{os.path.basename(image_path)}'.")
-    return contours
+    detector = detector or IMAGE_DETECTOR
+    # Loaded straight into grayscale (plus alpha for the 'alpha' strategy)
+    if isinstance(image, np.ndarray):
+        contours, image_size = detector.detect_array(image)
+        image_name = "in-memory image"
+    elif isinstance(image, (bytes, bytearray, memoryview)):
+        contours, image_size = detector.detect_bytes(image)
+        image_name = "in-memory image"
+    else:
+        contours, image_size = detector.detect_file(image)
+        image_name = f"image '{os.path.basename(image)}'"
+    if contours is None:
+        log.error("Could not load %s", image_name)
+        return (None, None) if return_size else None # Return None on error
+
+    log.info("Detected %d shapes in the %s.", len(contours), image_name)
+    return (contours, image_size) if return_size else contours
 
 # --- PDF Handler ---
-def get_contours_from_pdf(pdf_path, page_num=0):
+def get_contours_from_pdf(pdf_path, page_num=0, dpi=200, detector=None):
     """
     Converts the first page of a PDF to an image and detects contours.
 
     Args:
         pdf_path (str): Path to the input PDF file.
         page_num (int): The page number to process (0-indexed). Default is 0 (first page).
+        dpi (int): Rasterisation resolution.
+        detector (ContourDetector, optional): Detection strategy. Default: Canny 100/200.
 
     Returns:
         tuple: (list of contours, tuple image_size) or (None, None) if error.
                Image size (width, height) is needed for apply_neon_effect.
     """
-    if not PDF2IMAGE_INSTALLED:
-        print("Error: pdf2image is required for PDF processing but not installed.")
+    pdf2image = load_pdf2image()
+    if pdf2image is None:
+        log.error("pdf2image is required for PDF processing but not installed.")
         return None, None
 
     try:
         # Convert the specified page of the PDF to a PIL Image
         # Use first=page_num+1 and last=page_num+1 for 1-based indexing in pdf2image
-        images = convert_from_path(pdf_path, first_page=page_num + 1, last_page=page_num + 1)
+        with stage("rasterise_pdf"):
+            images = pdf2image.convert_from_path(pdf_path, dpi=dpi, first_page=page_num + 1,
+                                                 last_page=page_num + 1, grayscale=True)
+        return _detect_pdf_page(images, page_num, os.path.basename(pdf_path), detector)
 
-        if not images:
-            print(f"Error: Could not convert page {page_num} from PDF '{pdf_path}'.")
-            return None, None
+    except Exception as e:
+        log.error("Could not process PDF file '%s': %s", pdf_path, e)
+        # Check if it's a Poppler error
+        if "poppler" in str(e).lower():
+            log.error("This might indicate Poppler is not installed or not in the system PATH.")
+        return None, None
 
-        pil_image = images[0]
-        image_size = pil_image.size # Get (width, height)
 
-        # Convert PIL image to OpenCV format (BGR)
-        open_cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+def get_contours_from_pdf_bytes(pdf_bytes, page_num=0, dpi=200, detector=None):
+    """
+    Like get_contours_from_pdf, for a PDF document held in memory.
 
-        # --- Use the same contour detection logic ---
-        gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        edges = cv2.Canny(blurred, 100, 200)
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    The rasterised page never goes to disk; poppler itself still reads the
+    document from a temporary file that pdf2image creates and removes.
 
-        print(f"Detected {len(contours)} shapes in page {page_num} of PDF '{os.path.basename(pdf_path)}'.")
-        return contours, image_size
+    Returns:
+        tuple: (list of contours, tuple image_size) or (None, None) if error.
+    """
+    pdf2image = load_pdf2image()
+    if pdf2image is None:
+        log.error("pdf2image is required for PDF processing but not installed.")
+        return None, None
+
+    try:
+        with stage("rasterise_pdf"):
+            images = pdf2image.convert_from_bytes(pdf_bytes, dpi=dpi, first_page=page_num + 1,
+                                                  last_page=page_num + 1, grayscale=True)
+        return _detect_pdf_page(images, page_num, "<in-memory PDF>", detector)
 
     except Exception as e:
-        print(f"Error processing PDF file '{pdf_path}': {e}")
-        # Check if it's a Poppler error
+        log.error("Could not process in-memory PDF: %s", e)
         if "poppler" in str(e).lower():
-             print("This might indicate Poppler is not installed or not in the system PATH.")
+            log.error("This might indicate Poppler is not installed or not in the system PATH.")
+        return None, None
+
+
+def _detect_pdf_page(images, page_num, pdf_name, detector):
+    """Detects contours on the single rasterised page pdf2image returned, as (contours, image_size)."""
+    if not images:
+        log.error("Could not convert page %d from PDF '%s'.", page_num, pdf_name)
         return None, None
 
+    pil_image = images[0]
+    image_size = pil_image.size # Get (width, height)
+
+    # Poppler already rasterised in grayscale, so no colour conversion is needed
+    with stage("decode"):
+        gray = np.asarray(pil_image.convert('L'))
+    contours = (detector or IMAGE_DETECTOR).detect(gray)
+
+    log.info("Detected %d shapes in page %d of PDF '%s'.", len(contours), page_num, pdf_name)
+    return contours, image_size
+
+
+# --- Streaming Multi-Page PDF Handler ---
+def _list_rasterised_pages(folder):
+    """Returns sorted (1-based page number, path) pairs for pages pdftoppm has written."""
+    pages = []
+    for name in os.listdir(folder):
+        match = re.search(r'-(\d+)\.\w+$', name)
+        if match:
+            pages.append((int(match.group(1)), os.path.join(folder, name)))
+    return sorted(pages)
+
+
+# Pages pdftoppm rasterises per run; the next run only starts once the caller
+# has used up all but this many pages, so at most twice as many wait on disk.
+PDF_LOOKAHEAD_PAGES = 4
+
+
+def iter_pdf_pages(pdf_path, first_page=0, last_page=None, dpi=200, paths_only=False, poll_interval=0.05):
+    """
+    Streams rasterised PDF pages from poppler running ahead of the caller.
+
+    The page range is rasterised into a temporary directory by a background
+    thread, PDF_LOOKAHEAD_PAGES pages per pdftoppm run. Each page is yielded
+    as soon as poppler has moved on to the next one, so rasterisation of later
+    pages overlaps whatever the caller does with the current page. Only one
+    page is held in memory at a time, its file is deleted once the caller
+    advances, and poppler stops running ahead when the caller falls behind.
+    Closing the generator early stops the thread after its current run and
+    waits for it before the temporary directory is removed.
+
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        first_page (int): First page to process (0-indexed). Default is 0.
+        last_page (int, optional): Last page to process (0-indexed, inclusive). Default is the last page.
+        dpi (int): Rasterisation resolution.
+        paths_only (bool): Yield the path of the rasterised page instead of a PIL Image.
+                           The file is only valid until the next page is requested.
+        poll_interval (float): Seconds to wait between checks for newly written pages.
+
+    Yields:
+        tuple: (page_num (0-indexed), PIL Image or str path)
+    """
+    pdf2image = load_pdf2image()
+    if pdf2image is None:
+        log.error("pdf2image is required for PDF processing but not installed.")
+        return
+
+    with tempfile.TemporaryDirectory(prefix="neon_pdf_") as temp_dir:
+        # Page numbers here are 1-based, as pdf2image uses them
+        state = {"done_through": 0, "consumed": first_page}
+        progress = threading.Condition()
+        stop = threading.Event()
+
+        def rasterise():
+            try:
+                end = last_page + 1 if last_page is not None else pdf2image.pdfinfo_from_path(pdf_path)["Pages"]
+                start = first_page + 1
+                while start <= end:
+                    with progress:
+                        progress.wait_for(lambda: stop.is_set()
+                                          or start - 1 - state["consumed"] <= PDF_LOOKAHEAD_PAGES)
+                    if stop.is_set():
+                        return
+                    run_end = min(end, start + PDF_LOOKAHEAD_PAGES - 1)
+                    # Timed per run, overlapping the pages' detection
+                    with stage("rasterise_pdf"):
+                        pdf2image.convert_from_path(pdf_path, dpi=dpi, output_folder=temp_dir,
+                                                    first_page=start, last_page=run_end,
+                                                    output_file="page", paths_only=True)
+                    state["done_through"] = run_end
+                    start = run_end + 1
+            except Exception as e:
+                state["error"] = e
+
+        worker = threading.Thread(target=rasterise, daemon=True)
+        worker.start()
+
+        yielded = set()
+        try:
+            while True:
+                finished = not worker.is_alive() # Check before listing so the listing is complete
+                pending = [page for page in _list_rasterised_pages(temp_dir) if page[0] not in yielded]
+                # While poppler runs, the newest file may still be being written (unless its run is done)
+                complete = finished or (pending and pending[-1][0] <= state["done_through"])
+                ready = pending if complete else pending[:-1]
+
+                for page_number, page_path in ready:
+                    yielded.add(page_number)
+                    if paths_only:
+                        yield page_number - 1, page_path
+                    else:
+                        with Image.open(page_path) as page_image:
+                            with stage("decode"):
+                                page_image.load()
+                            yield page_number - 1, page_image
+                    os.remove(page_path)
+                    with progress:
+                        state["consumed"] = page_number
+                        progress.notify()
+
+                if finished and len(pending) == len(ready):
+                    break
+                if not ready:
+                    worker.join(poll_interval)
+        finally:
+            # Also runs when the caller stops early: poppler must be done before the directory goes
+            stop.set()
+            with progress:
+                progress.notify()
+            worker.join()
+
+        if "error" in state:
+            e = state["error"]
+            log.error("Could not process PDF file '%s': %s", pdf_path, e)
+            if "poppler" in str(e).lower():
+                log.error("This might indicate Poppler is not installed or not in the system PATH.")
+
+
+def iter_contours_from_pdf(pdf_path, first_page=0, last_page=None, dpi=200, detector=None):
+    """
+    Detects contours on a range of PDF pages, one page at a time.
+
+    Pages come from iter_pdf_pages() in paths_only mode and are read straight
+    into grayscale, so no RGB copy of the page is ever made.
+
+    Args:
+        pdf_path (str): Path to the input PDF file.
+        first_page (int): First page to process (0-indexed). Default is 0.
+        last_page (int, optional): Last page to process (0-indexed, inclusive). Default is the last page.
+        dpi (int): Rasterisation resolution.
+        detector (ContourDetector, optional): Detection strategy. Default: Canny 100/200.
+
+    Yields:
+        tuple: (page_num, list of contours, tuple image_size). Contours are None if the page could not be read.
+    """
+    detector = detector or IMAGE_DETECTOR
+    for page_num, page_path in iter_pdf_pages(pdf_path, first_page, last_page, dpi=dpi, paths_only=True):
+        contours, image_size = detector.detect_file(page_path)
+        if contours is None:
+            log.error("Could not read rasterised page %d of PDF '%s'.", page_num, pdf_path)
+            yield page_num, None, None
+            continue
+
+        log.info("Detected %d shapes in page %d of PDF '%s'.", len(contours), page_num, os.path.basename(pdf_path))
+        yield page_num, contours, image_size
+
 
 # --- Text Handler ---
-def get_contours_from_text(text_string, font_path=None, font_size=60, image_size=(400, 400)):
+# Loaded fonts and text measurements are kept per process: name-sign jobs
+# render thousands of short strings with the same few fonts and sizes.
+FONT_CACHE_SIZE = 32
+TEXT_METRICS_CACHE_SIZE = 4096
+
+# Scratch drawing context for measuring text (never drawn on)
+_MEASURE_DRAW = ImageDraw.Draw(Image.new('L', (1, 1)))
+
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def load_text_font(font_path, font_size):
+    """
+    Loads a TrueType font once per (path, size), falling back to Pillow's default font.
+
+    Args:
+        font_path (str): Path to a .ttf font file, or None.
+        font_size (int): Font size in points.
+
+    Returns:
+        ImageFont: The loaded font.
+    """
+    try:
+        if font_path and os.path.exists(font_path):
+            return ImageFont.truetype(font_path, font_size)
+        # Use default Pillow font if specific one not found/provided
+        log.warning("Font path not provided or invalid. Using default font.")
+        return ImageFont.load_default() # Note: Default font is small
+    except IOError:
+        log.error("Could not load font at %s. Using default.", font_path)
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=TEXT_METRICS_CACHE_SIZE)
+def measure_text(font_path, font_size, text_string):
+    """
+    Returns the (width, height) of the rendered text, cached per (path, size, text).
+    """
+    font = load_text_font(font_path, font_size)
+    # Use textbbox for more accurate positioning with newer Pillow versions
+    try:
+        # Pillow >= 9.2.0
+        bbox = _MEASURE_DRAW.textbbox((0, 0), text_string, font=font)
+        return bbox[2] - bbox[0], bbox[3] - bbox[1]
+    except AttributeError:
+        # Older Pillow versions
+        return _MEASURE_DRAW.textsize(text_string, font=font)
+
+
+def get_contours_from_texts(text_strings, font_path=None, font_size=60, image_size=(400, 400), detector=None,
+                            verbose=True):
+    """
+    Renders many strings with one font and detects the contours of each.
+
+    The font is loaded once (see load_text_font) and every string is drawn
+    into the same canvas, which is cleared between strings, so the per-name
+    cost is just drawing and detection.
+
+    Args:
+        text_strings (iterable): The strings to render.
+        font_path (str, optional): Path to a .ttf font file. Defaults to Pillow's basic font.
+        font_size (int): Font size in points.
+        image_size (tuple): (width, height) of the canvas to render each string on.
+        detector (ContourDetector, optional): Detection strategy. Default: Canny 50/150 without blur.
+        verbose (bool): Log the number of shapes found per string.
+
+    Returns:
+        list: (list of contours, tuple image_size) per string, (None, None) for strings that failed.
+    """
+    font = load_text_font(font_path, font_size)
+    detector = detector or TEXT_DETECTOR
+    # One black grayscale canvas for every string (detection only needs luminance)
+    img = Image.new('L', image_size, color=0)
+    draw = ImageDraw.Draw(img)
+
+    results = []
+    for text_string in text_strings:
+        try:
+            with stage("rasterise_text"):
+                img.paste(0, (0, 0) + tuple(image_size))
+
+                # Calculate text position (simple centering)
+                text_width, text_height = measure_text(font_path, font_size, text_string)
+                x = (image_size[0] - text_width) / 2
+                y = (image_size[1] - text_height) / 2
+
+                # Draw the text in white
+                draw.text((x, y), text_string, font=font, fill=255)
+
+            # Note: the default text detector skips blurring, which is detrimental for sharp text
+            contours = detector.detect(np.asarray(img))
+            if verbose:
+                log.info("Detected %d shapes from the text.", len(contours))
+            results.append((contours, image_size))
+
+        except Exception as e:
+            log.error("Could not process text string: %s", e)
+            results.append((None, None))
+    return results
+
+
+def get_contours_from_text(text_string, font_path=None, font_size=60, image_size=(400, 400), detector=None):
     """
     Renders text onto an image and detects contours.
 
@@ -108,61 +411,66 @@ def get_contours_from_text(text_string, font_path=None, font_size=60, image_size
         font_path (str, optional): Path to a .ttf font file. Defaults to Pillow's basic font.
         font_size (int): Font size in points.
         image_size (tuple): (width, height) of the canvas to render text on.
+        detector (ContourDetector, optional): Detection strategy. Default: Canny 50/150 without blur.
 
     Returns:
         tuple: (list of contours, tuple image_size) or (None, None) if error.
     """
-    try:
-        # Create a black canvas
-        img = Image.new('RGB', image_size, color = (0, 0, 0))
-        draw = ImageDraw.Draw(img)
+    return get_contours_from_texts([text_string], font_path, font_size, image_size, detector)[0]
 
-        # Load font
-        try:
-            if font_path and os.path.exists(font_path):
-                font = ImageFont.truetype(font_path, font_size)
-            else:
-                # Use default Pillow font if specific one not found/provided
-                print("Warning: Font path not provided or invalid. Using default font.")
-                font = ImageFont.load_default() # Note: Default font is small
-        except IOError:
-            print(f"Error: Could not load font at {font_path}. Using default.")
-            font = ImageFont.load_default()
-
-        # Calculate text position (simple centering)
-        # Use textbbox for more accurate positioning with newer Pillow versions
-        try:
-            # Pillow >= 9.2.0
-            bbox = draw.textbbox((0, 0), text_string, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-        except AttributeError:
-            # Older Pillow versions
-            text_width, text_height = draw.textsize(text_string, font=font)
-
-        x = (image_size[0] - text_width) / 2
-        y = (image_size[1] - text_height) / 2
-
-        # Draw the text in white
-        draw.text((x, y), text_string, font=font, fill=(255, 255, 255))
-
-        # Convert PIL image to OpenCV format (BGR)
-        open_cv_image = cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
-
-        # --- Use the same contour detection logic ---
-        gray = cv2.cvtColor(open_cv_image, cv2.COLOR_BGR2GRAY)
-        # Note: Blurring might be less necessary or even detrimental for sharp text
-        # blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        # Adjust Canny thresholds for text if needed
-        edges = cv2.Canny(gray, 50, 150) # Might need different thresholds than for general images
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        print(f"Detected {len(contours)} shapes from the text.")
-        return contours, image_size
+# --- Contour Simplification ---
+def simplify_contours(contours, epsilon=0.0, min_area=0.0, min_length=0.0, closed=False):
+    """
+    Simplifies contours and drops noise before drawing.
+
+    Applies Douglas-Peucker (cv2.approxPolyDP) to turn Canny's dense
+    staircases into a few straight runs, and removes contours whose length or
+    enclosed area is below the given thresholds. Works the same for image,
+    PDF and text contours (and float contours from SVG/.ncf files).
+
+    Args:
+        contours (list): Contours in OpenCV (N, 1, 2) layout.
+        epsilon (float): Max distance in pixels between a contour and its simplification (0 = off).
+        min_area (float): Drop contours enclosing less than this many square pixels (0 = off).
+        min_length (float): Drop contours shorter than this many pixels (0 = off).
+        closed (bool): Treat contours as closed loops for length and simplification.
+
+    Returns:
+        list: Simplified contours (OpenCV format).
+    """
+    if contours is None:
+        return None
+
+    with stage("simplify"):
+        kept = []
+        points_before = 0
+        dropped = 0
+        for contour in contours:
+            points = np.asarray(contour)
+            if points.dtype.kind == 'f' and points.dtype != np.float32:
+                points = points.astype(np.float32)
+            elif points.dtype.kind != 'f' and points.dtype != np.int32:
+                points = points.astype(np.int32)
+            points = points.reshape(-1, 1, 2)
+            points_before += len(points)
+
+            if min_length > 0 and cv2.arcLength(points, closed) < min_length:
+                dropped += 1
+                continue
+            if min_area > 0 and abs(cv2.contourArea(points)) < min_area:
+                dropped += 1
+                continue
+            if epsilon > 0 and len(points) > 2:
+                points = cv2.approxPolyDP(points, epsilon, closed)
+            kept.append(points)
+
+    points_after = sum(len(contour) for contour in kept)
+    removed = points_before - points_after
+    share = removed / points_before if points_before else 0.0
+    log.info("Simplified %d contours: %d -> %d points (%d removed, %.1f%%), dropped %d noise contours.",
+             len(contours), points_before, points_after, removed, share * 100, dropped)
+    return kept
 
-    except Exception as e:
-        print(f"Error processing text string: {e}")
-        return None, None
 
 # --- Original png_to_contours can now just call get_contours_from_image ---
 # --- Keeping it separate allows specific logic for PNGs if needed later ---
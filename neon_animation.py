@@ -0,0 +1,306 @@
+# neon_animation.py
+
+# Ensure necessary libraries are installed: pip install opencv-python numpy Pillow
+import os
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from glow_engine import apply_glow_to_array, gaussian_blur, glow_margin
+from neon_styling import draw_contours, parse_color, quality_draw_options
+from neon_profile import count_contours, get_logger, stage
+
+log = get_logger("neon_animation")
+
+ANIMATION_MODES = ("flicker", "poweron", "trace")
+ANIMATION_FORMATS = (".gif", ".png", ".webp")
+
+# Contours are split into at most this many tubes that flicker independently
+MAX_ANIMATION_GROUPS = 12
+# Memory for the tube groups' weight maps (1 byte per pixel each); big canvases get fewer groups
+ANIMATION_WEIGHTS_BUDGET_MB = 256
+
+
+def is_animation_output(output_path):
+    """True if output_path has an extension the animation writer supports."""
+    return os.path.splitext(output_path)[1].lower() in ANIMATION_FORMATS
+
+
+def group_contours(contours, closed, max_groups=MAX_ANIMATION_GROUPS):
+    """
+    Splits contours into up to max_groups runs of neighbouring contours (the "tubes" that flicker together).
+
+    Returns:
+        list: (list of contours, list of closed flags) per group.
+    """
+    closed_flags = [closed] * len(contours) if isinstance(closed, bool) else list(closed)
+    n_groups = max(1, min(max_groups, len(contours)))
+    bounds = np.linspace(0, len(contours), n_groups + 1).astype(int)
+    return [(contours[start:end], closed_flags[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def animation_group_count(image_size, max_groups=MAX_ANIMATION_GROUPS):
+    """Number of tube groups whose weight maps fit in ANIMATION_WEIGHTS_BUDGET_MB at this canvas size."""
+    map_bytes = image_size[0] * image_size[1]
+    return int(max(1, min(max_groups, ANIMATION_WEIGHTS_BUDGET_MB * 1024 * 1024 // max(map_bytes, 1))))
+
+
+def render_layer(contours, closed_flags, image_size, color, style):
+    """Draws and glows tubes on one canvas, returned as uint8 HxWx3 (all contours: the still)."""
+    canvas = np.zeros((image_size[1], image_size[0], 3), dtype=np.uint8)
+    for closed in (False, True):
+        selected = [contour for contour, flag in zip(contours, closed_flags) if flag == closed]
+        if selected:
+            draw_contours(canvas, selected, color, style["line_width"], closed=closed,
+                          **quality_draw_options(style["quality"]))
+    return apply_glow_to_array(canvas, style["glow_radius"], style["glow_alpha"],
+                               style["glow_engine"], style["glow_layers"], style["quality"])
+
+
+def _group_mask(contours, closed_flags, image_size, line_width, radius):
+    mask = np.zeros((image_size[1], image_size[0]), dtype=np.float32)
+    for contour, closed in zip(contours, closed_flags):
+        points = np.rint(np.asarray(contour, dtype=np.float64).reshape(-1, 1, 2)).astype(np.int32)
+        cv2.polylines(mask, [points], bool(closed), 1.0, max(1, int(line_width)))
+    mask = gaussian_blur(mask, radius)
+    mask += 1e-6 # The floor keeps the split defined far from every tube
+    return mask
+
+
+def group_weights(groups, image_size, line_width, radius):
+    """
+    Splits the light of the sign between the tube groups.
+
+    Each group's tubes are drawn as a mask and blurred as far as the glow
+    reaches; every pixel is shared out in proportion to those blurred masks,
+    so where glows overlap a pixel belongs partly to each tube. The weights
+    are stored as uint8 (255 = all of the pixel's light) and those of all
+    groups sum to about 255 everywhere (far from every tube they are equal).
+    The masks are blurred twice (once for the total, once to split it) rather
+    than all kept in float32.
+
+    Returns:
+        np.ndarray: (groups, H, W) uint8.
+    """
+    total = np.zeros((image_size[1], image_size[0]), dtype=np.float32)
+    for contours, closed_flags in groups:
+        total += _group_mask(contours, closed_flags, image_size, line_width, radius)
+    scale = 255.0 / total
+    weights = np.empty((len(groups), image_size[1], image_size[0]), dtype=np.uint8)
+    for weight, (contours, closed_flags) in zip(weights, groups):
+        share = _group_mask(contours, closed_flags, image_size, line_width, radius)
+        share *= scale
+        share += 0.5 # Rounded, not truncated
+        weight[...] = share
+    return weights
+
+
+def flicker_curves(n_groups, n_frames, mode, seed=0):
+    """
+    Brightness (0..1) of every tube group in every frame.
+
+    'flicker': tubes are lit with short random dips and dropouts.
+    'poweron': each tube stutters on at a random moment in the first two thirds of the clip, then stays lit.
+    'trace':   all tubes fully lit (the reveal comes from the arrival map instead).
+
+    Returns:
+        np.ndarray: (n_frames, n_groups) float32.
+    """
+    rng = np.random.default_rng(seed)
+    curves = np.ones((n_frames, n_groups), dtype=np.float32)
+    if mode == "flicker":
+        dips = rng.random((n_frames, n_groups)) < 0.08
+        curves[dips] = rng.uniform(0.0, 0.6, size=int(dips.sum()))
+    elif mode == "poweron":
+        on_frames = rng.integers(n_frames // 6, max(n_frames // 6 + 1, 2 * n_frames // 3), size=n_groups)
+        for group, on_frame in enumerate(on_frames):
+            curves[:on_frame, group] = 0.0
+            # A few stutters just before the tube catches
+            stutter = np.arange(max(0, on_frame - 6), on_frame)
+            curves[stutter, group] = (rng.random(len(stutter)) < 0.5) * rng.uniform(0.3, 1.0, len(stutter))
+    return curves
+
+
+def arrival_map(contours, image_size, line_width):
+    """
+    For every tube pixel, the fraction (0..1) of the total stroke length drawn before it lights up.
+
+    Contours are traced one after another in list order; each segment is
+    drawn once with its own arrival time.
+
+    Returns:
+        np.ndarray: HxW float32, 2.0 where there is no tube.
+    """
+    arrival = np.full((image_size[1], image_size[0]), 2.0, dtype=np.float32)
+    polylines = [np.asarray(contour, dtype=np.float64).reshape(-1, 2) for contour in contours]
+    lengths = [np.hypot(*np.diff(points, axis=0).T) for points in polylines]
+    total = sum(float(length.sum()) for length in lengths) or 1.0
+
+    drawn = 0.0
+    for points, segment_lengths in zip(polylines, lengths):
+        if len(points) == 1:
+            cv2.circle(arrival, tuple(int(round(v)) for v in points[0]), max(1, line_width // 2),
+                       float(drawn / total), -1)
+            continue
+        starts = (drawn + np.concatenate(([0.0], np.cumsum(segment_lengths)[:-1]))) / total
+        # Later segments must not overwrite earlier ones where they cross: draw latest first
+        for start, p0, p1 in reversed(list(zip(starts, points[:-1], points[1:]))):
+            cv2.line(arrival, tuple(int(round(v)) for v in p0), tuple(int(round(v)) for v in p1),
+                     float(start), max(1, line_width))
+        drawn += float(segment_lengths.sum())
+    return arrival
+
+
+def halo_layer(full, arrival):
+    """
+    The lit sign with its tubes painted over by the surrounding halo (cv2.inpaint), float32.
+
+    Used for tubes the trace has not reached yet, so they sit in the halo
+    instead of showing as dark cut-outs.
+    """
+    tubes = (arrival < 2.0).astype(np.uint8)
+    lit = np.clip(full, 0, 255).astype(np.uint8)
+    return cv2.inpaint(lit, tubes, 3, cv2.INPAINT_TELEA).astype(np.float32)
+
+
+def trace_frame(full, halo, arrival, t, radius):
+    """
+    The sign at trace time t (0..1).
+
+    Tube pixels the trace has passed show the lit sign, the rest of the
+    canvas shows the halo faded with the distance to the nearest passed tube
+    pixel (a Gaussian of the glow radius), so the glow follows the tip.
+    """
+    revealed = arrival <= t
+    distance = cv2.distanceTransform(np.where(revealed, 0, 255).astype(np.uint8), cv2.DIST_L2, 5)
+    weights = np.exp(-0.5 * (distance / max(radius, 1.0)) ** 2)
+    frame = np.where(revealed[:, :, None], full, halo)
+    frame *= weights[:, :, None]
+    return frame
+
+
+def compose_frames(still, weights, curves, arrival=None, glow_radius=10):
+    """
+    Yields uint8 frames of the still with each tube group's share of the light scaled by its brightness.
+
+    A frame only subtracts the groups that are dimmed in it, so a frame
+    where every tube is lit is the still itself. With an arrival map, each
+    frame is a trace_frame() instead. Only the frame being composed is float32.
+    """
+    full = still.astype(np.float32)
+    halo = halo_layer(full, arrival) if arrival is not None else None
+    n_frames = len(curves)
+    for frame_index, brightness in enumerate(curves):
+        if arrival is not None:
+            frame = trace_frame(full, halo, arrival, (frame_index + 1) / n_frames, glow_radius)
+        elif np.all(brightness >= 1.0):
+            yield still
+            continue
+        else:
+            factor = np.ones(still.shape[:2], dtype=np.float32)
+            for weight, value in zip(weights, brightness):
+                if value < 1.0:
+                    factor -= np.float32((1.0 - value) / 255.0) * weight
+            frame = full * factor[:, :, None]
+        np.clip(frame, 0, 255, out=frame)
+        yield frame.astype(np.uint8)
+
+
+def apply_neon_animation(contours, output_path, image_size=(400, 400),
+                         line_color="255,0,255", # Magenta
+                         line_width=5,
+                         glow_radius=10,
+                         glow_alpha=0.5,
+                         glow_engine="cv2",
+                         glow_layers=None,
+                         quality="normal",
+                         closed=False,
+                         mode="flicker",
+                         n_frames=60,
+                         fps=20,
+                         seed=0):
+    """
+    Writes an animated GIF/APNG/WebP of the neon sign.
+
+    The sign is drawn and glowed once, exactly as the still image, and its
+    light is shared out between groups of tubes (see group_weights). Every
+    frame scales each group's share by its brightness (flicker, power-on) or
+    masks the still (trace: strokes revealed in drawing order), so the cost
+    is one full render, one mask blur per group and cheap per-frame
+    arithmetic, and a fully lit frame is the still. Memory is the still
+    (3 bytes per pixel), one uint8 weight map per group (1 byte per pixel;
+    the group count shrinks to fit ANIMATION_WEIGHTS_BUDGET_MB on big
+    canvases), the float32 frame being composed and the frames Pillow keeps
+    for its encoder. Frames are composed one at a time as the encoder takes them.
+
+    Args:
+        contours (list): Contours (OpenCV (N, 1, 2) or (N, 2) arrays, int or float).
+        output_path (str): Path ending in .gif, .png (APNG) or .webp.
+        image_size (tuple): (width, height) of the canvas.
+        line_color, line_width, glow_radius, glow_alpha, glow_engine, glow_layers, quality: As for apply_neon_effect.
+        closed (bool or list): Closed-loop flag for all contours, or one per contour.
+        mode (str): 'flicker', 'poweron' or 'trace'.
+        n_frames (int): Number of frames.
+        fps (float): Frames per second.
+        seed (int): Seed for the flicker curves (same seed, same animation).
+
+    Returns:
+        bool: True if the animation was written, False if rendering or saving failed.
+    """
+    writing = False
+    try:
+        color = parse_color(line_color, (255, 0, 255)) # Default magenta
+        style = {"line_width": line_width, "glow_radius": glow_radius, "glow_alpha": glow_alpha,
+                 "glow_engine": glow_engine, "glow_layers": glow_layers, "quality": quality}
+        count_contours(contours)
+
+        groups = group_contours(contours, closed, 1 if mode == "trace" else animation_group_count(image_size))
+        still = render_layer(*group_contours(contours, closed, 1)[0], image_size, color, style)
+        # Widest glow radius: how far each tube's light reaches (and the halo past the traced tip)
+        reach = (glow_margin(line_width, glow_radius, glow_layers) - line_width / 2.0) / 3.0
+        weights = group_weights(groups, image_size, line_width, reach) if len(groups) > 1 else None
+        if weights is not None:
+            log.debug("Weight maps for %d tube groups: %.1f MB.", len(groups), weights.nbytes / 1e6)
+        curves = flicker_curves(len(groups), n_frames, mode, seed)
+        arrival = None
+        if mode == "trace":
+            # Trace left to right (detected contours come in no particular order)
+            order = sorted(range(len(contours)), key=lambda i: float(np.asarray(contours[i]).reshape(-1, 2)[:, 0].min()))
+            arrival = arrival_map([contours[i] for i in order], image_size, line_width)
+        log.info("Animating %d contours as %d tube groups: %d frames, mode=%s.", len(contours), len(groups),
+                 n_frames, mode)
+
+        if weights is None: # A single group: its share is the whole still
+            weights = np.full((1, 1, 1), 255, dtype=np.uint8)
+        # Composed lazily: each frame is built when the encoder asks for it
+        frames = (Image.fromarray(frame) for frame in compose_frames(still, weights, curves, arrival, reach))
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        duration = int(round(1000.0 / fps))
+        extension = os.path.splitext(output_path)[1].lower()
+        save_kwargs = {"save_all": True, "duration": duration, "loop": 0}
+        if extension == ".gif":
+            # One palette from the fully lit sign for every frame (dimmed frames reuse its darker entries)
+            palette = Image.fromarray(still).quantize(colors=256)
+            frames = (frame.quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames)
+            save_kwargs["optimize"] = False
+        elif extension == ".webp":
+            save_kwargs["lossless"] = False
+            save_kwargs["quality"] = 90
+        writing = True
+        with stage("encode"): # Includes composing the frames, which happens as they are encoded
+            first_frame = next(frames)
+            # Pillow's APNG writer walks append_images twice, so it needs a list
+            append_images = list(frames) if extension == ".png" else frames
+            first_frame.save(output_path, append_images=append_images, **save_kwargs)
+        return True
+
+    except Exception as e:
+        log.error("apply_neon_animation could not save %s: %s", output_path, e)
+        if writing and os.path.isfile(output_path):
+            os.remove(output_path) # Never leave a truncated animation behind
+        return False
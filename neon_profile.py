@@ -0,0 +1,186 @@
+# neon_profile.py
+
+# Logging and stage-level profiling shared by the pipeline modules.
+#
+# Every module logs through get_logger(); the CLIs call configure_logging() to
+# print those messages (by default, the INFO lines the scripts always printed).
+# Pipeline stages are wrapped in stage("name") and counted with count_contours(); both
+# do nothing unless a profile is active (apply_neon.py --profile), so the
+# disabled path is a global lookup and a shared no-op context manager.
+import contextlib
+import cProfile
+import json
+import logging
+import sys
+import threading
+import time
+
+try:
+    import resource # Peak RSS; not available on Windows
+except ImportError:
+    resource = None
+
+LOGGER_NAME = "neon"
+LOG_LEVELS = ("debug", "info", "warning", "error")
+
+# Stage names used across the pipeline, in pipeline order (reports list any others after these)
+PROFILE_STAGES = ("parse_svg", "flatten", "rasterise_pdf", "rasterise_text", "decode", "blur", "canny",
+                  "threshold", "find_contours", "simplify", "draw", "glow", "encode")
+
+_NO_STAGE = contextlib.nullcontext()
+_active_profile = None
+
+
+def get_logger(module_name):
+    """Returns the logger for one of this project's modules, under the shared 'neon' logger."""
+    return logging.getLogger(f"{LOGGER_NAME}.{module_name}")
+
+
+class _ScriptFormatter(logging.Formatter):
+    """Prints messages bare, as the scripts always did, with warnings and errors labelled by their level."""
+
+    LEVEL_PREFIXES = {logging.WARNING: "Warning: ", logging.ERROR: "Error: ", logging.CRITICAL: "Error: "}
+
+    def format(self, record):
+        return self.LEVEL_PREFIXES.get(record.levelno, "") + super().format(record)
+
+
+def configure_logging(level="info", stream=None):
+    """
+    Sends the project's log messages to stdout (or stream), as the scripts' output.
+
+    Args:
+        level (str): One of LOG_LEVELS; 'debug' also prefixes each line with its level and module.
+        stream (file, optional): Where to write. Default: sys.stdout.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stdout)
+    numeric_level = getattr(logging, level.upper())
+    handler.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s")
+                         if numeric_level <= logging.DEBUG else _ScriptFormatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(numeric_level)
+    logger.propagate = False
+
+
+def add_diagnostic_arguments(parser, profile=True):
+    """Adds --loglevel (and unless profile is False, --profile and --cprofile) to a command-line parser."""
+    parser.add_argument("--loglevel", choices=LOG_LEVELS, default="info",
+                        help="Messages to print: 'debug' adds per-path SVG and drawing details, 'warning' "
+                             "prints only problems (default: info).")
+    if not profile:
+        return
+    parser.add_argument("--profile", type=str, default=None, metavar="PATH",
+                        help="Write per-stage timings (decode, rasterise PDF, blur, Canny, findContours, draw, "
+                             "glow, encode, ...), contour/point counts and peak memory as JSON to PATH ('-' for stdout).")
+    parser.add_argument("--cprofile", type=str, default=None, metavar="PATH",
+                        help="Also dump a cProfile of the run to PATH (inspect with 'python -m pstats PATH').")
+
+
+class StageProfile:
+    """
+    Accumulates time per pipeline stage and counters for one run.
+
+    Stages may run on several threads at once (tiled rendering); their
+    seconds are summed over threads, so they can add up to more than the
+    wall time.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            total, calls = self.stages.get(name, (0.0, 0))
+            self.stages[name] = (total + seconds, calls + 1)
+
+    def add_count(self, name, amount):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def report(self, **extra):
+        """Returns the profile as a JSON-ready dict; extra keys (input, output, ...) are added first."""
+        order = {name: i for i, name in enumerate(PROFILE_STAGES)}
+        names = sorted(self.stages, key=lambda name: (order.get(name, len(order)), name))
+        return dict(extra,
+                    wall_seconds=round(time.perf_counter() - self._start, 6),
+                    stages={name: {"seconds": round(self.stages[name][0], 6), "calls": self.stages[name][1]}
+                            for name in names},
+                    counts=dict(self.counts),
+                    peak_rss_mb=peak_rss_mb(),
+                    peak_rss_children_mb=peak_rss_mb(children=True))
+
+
+def peak_rss_mb(children=False):
+    """Peak resident set size of this process (or its finished child processes, e.g. pdftoppm) in MB, or None."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF)
+    scale = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KB elsewhere
+    return round(usage.ru_maxrss * scale / 1e6, 1)
+
+
+def stage(name):
+    """Context manager timing one pipeline stage into the active profile; a shared no-op when not profiling."""
+    profile = _active_profile
+    return _NO_STAGE if profile is None else profile.stage(name)
+
+
+def count_contours(contours, prefix="drawn"):
+    """Counts contours and their points into the active profile as <prefix>_contours/_points; a no-op when not profiling."""
+    profile = _active_profile
+    if profile is None:
+        return
+    profile.add_count(f"{prefix}_contours", len(contours))
+    profile.add_count(f"{prefix}_points", sum(len(points) for points in contours))
+
+
+@contextlib.contextmanager
+def profiled(profile_path=None, cprofile_path=None, **extra):
+    """
+    Profiles the enclosed code when profile_path and/or cprofile_path is given.
+
+    Writes the StageProfile report as JSON to profile_path ('-' for stdout,
+    extra keys included) and a cProfile dump to cprofile_path.
+
+    Yields:
+        StageProfile: The active profile, or None when profiling is off.
+    """
+    global _active_profile
+    if profile_path is None and cprofile_path is None:
+        yield None
+        return
+    profile = StageProfile()
+    profiler = cProfile.Profile() if cprofile_path else None
+    previous, _active_profile = _active_profile, profile
+    if profiler:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(cprofile_path)
+            get_logger("profile").info("Wrote cProfile stats to %s", cprofile_path)
+        _active_profile = previous
+        if profile_path:
+            report = json.dumps(profile.report(**extra), indent=2)
+            if profile_path == "-":
+                print(report)
+            else:
+                with open(profile_path, "w", encoding="utf-8") as f:
+                    f.write(report + "\n")
+                get_logger("profile").info("Wrote stage profile to %s", profile_path)
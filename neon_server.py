@@ -0,0 +1,456 @@
+# neon_server.py
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qsl, urlsplit
+
+# apply_neon defers its input backends to first use; a resident server wants them
+# all up front, so OpenCV, Pillow, svgpathtools and fontTools are imported here
+# once per server process and forked workers inherit them already imported.
+import numpy as np
+
+from apply_neon import add_common_arguments, get_style_params, render_to_bytes
+from glyph_outlines import outline_font_error
+from input_handlers import load_pdf2image, load_text_font
+from neon_profile import LOG_LEVELS, configure_logging, get_logger
+from neon_styling import render_neon_effect
+
+log = get_logger("neon_server")
+
+# Input kinds accepted at POST /render/<kind>; the request body is the input file's bytes
+SERVER_INPUT_KINDS = ("circle", "svg", "png", "pdf", "txt", "text")
+# CLI options that write files, read server paths, manage their own workers or cache on disk; not offered
+# over the API. Text renders use the font the server was started with.
+SERVER_UNSUPPORTED_OPTIONS = ("pages", "tilesize", "threads", "animate", "frames", "fps", "cachedir", "cachemaxmb",
+                              "font")
+# Accepted range of the options that size the canvas or the work, so one request can't exhaust a worker
+SERVER_OPTION_LIMITS = {"width": (1, 8192), "height": (1, 8192), "dpi": (1, 600), "fontsize": (1, 1000),
+                        "linewidth": (1, 500), "glowradius": (0, 1000)}
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8750
+# Requests waiting for a worker; beyond this the server answers 503 instead of queueing
+DEFAULT_QUEUE_SIZE = 32
+# Largest accepted request body
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+# Default zlib level for response PNGs (fast; previews are sent once, not archived); 'compresslevel' overrides it
+PNG_COMPRESSION = 3
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error",
+                501: "Not Implemented", 503: "Service Unavailable"}
+
+
+class RequestError(Exception):
+    """A request the server rejects with an HTTP status and message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _RequestArgumentParser(argparse.ArgumentParser):
+    """Argument parser that raises instead of printing usage and exiting the server."""
+
+    def error(self, message):
+        raise RequestError(400, message)
+
+
+def build_request_parser(font_path=None):
+    """
+    Returns the parser for render options: the same options as apply_neon.py, minus SERVER_UNSUPPORTED_OPTIONS.
+
+    Args:
+        font_path (str, optional): The server's font, used by every text request.
+    """
+    parser = _RequestArgumentParser(add_help=False)
+    add_common_arguments(parser)
+    parser.set_defaults(compresslevel=PNG_COMPRESSION, font=font_path)
+    return parser
+
+
+def parse_render_options(parser, query):
+    """
+    Turns a query string ('color=0,255,255&linewidth=4&autofit') into parsed render options.
+
+    Keys are apply_neon.py's long option names without the dashes. Flags
+    (e.g. autofit) are set by a bare key or a true value ('1', 'true', 'yes').
+
+    Returns:
+        argparse.Namespace: Options as add_common_arguments() defines them.
+
+    Raises:
+        RequestError: For unknown, unsupported, invalid or out of range (SERVER_OPTION_LIMITS) options.
+    """
+    flags = {option[2:] for action in parser._actions if action.nargs == 0
+             for option in action.option_strings if option.startswith("--")}
+    argv = []
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key in SERVER_UNSUPPORTED_OPTIONS:
+            raise RequestError(400, f"Option '{key}' is not available from the render server.")
+        if key in flags:
+            if value.lower() in ("", "1", "true", "yes"):
+                argv.append(f"--{key}")
+            continue
+        argv.extend((f"--{key}", value))
+    args = parser.parse_args(argv)
+    for name, (low, high) in SERVER_OPTION_LIMITS.items():
+        value = getattr(args, name)
+        if value is not None and not low <= value <= high:
+            raise RequestError(400, f"Option '{name}' must be between {low} and {high}.")
+    try:
+        get_style_params(args) # Validates the colour
+    except argparse.ArgumentTypeError as e:
+        raise RequestError(400, str(e))
+    return args
+
+
+# --- Worker side ---
+def warm_worker(font_path=None, font_size=60):
+    """
+    Process pool initializer: loads fonts and runs one tiny render.
+
+    Most modules are already imported (they are imported with this module), so
+    this warms what is built lazily on first use: pdf2image, the font caches
+    and OpenCV's kernels and thread pool.
+    """
+    load_pdf2image()
+    load_text_font(font_path, font_size)
+    # Loads the outline font into the cache; only a font the operator chose is worth a warning
+    font_error = outline_font_error(font_path)
+    if font_error and font_path:
+        log.warning("Outline text will fall back to raster text: %s", font_error)
+    render_neon_effect([np.array([[[8, 8]], [[24, 24]]], dtype=np.int32)], (32, 32))
+
+
+def render_request(kind, payload, args):
+    """
+    Worker entry point: renders one request in memory and encodes it as PNG.
+
+    The body is the input file's content ('circle' ignores it); an empty
+    'txt'/'text' body renders 'Neon!'.
+
+    Returns:
+        bytes: PNG data, or None if the input produced nothing.
+    """
+    return render_to_bytes(kind, payload, args, image_format="png")
+
+
+# --- Server side ---
+async def read_chunked_body(reader):
+    """
+    Reads a 'Transfer-Encoding: chunked' request body, trailers included.
+
+    Returns:
+        bytes: The decoded body.
+
+    Raises:
+        RequestError: For malformed chunks or a body over MAX_REQUEST_BYTES.
+    """
+    body = bytearray()
+    try:
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            try:
+                size = int(size_line.split(b";", 1)[0].strip(), 16) # Chunk extensions are ignored
+            except ValueError:
+                size = -1
+            if size < 0:
+                raise RequestError(400, "Malformed chunk size.")
+            if size == 0:
+                break
+            if len(body) + size > MAX_REQUEST_BYTES:
+                raise RequestError(413, f"Request body larger than {MAX_REQUEST_BYTES} bytes.")
+            body += await reader.readexactly(size)
+            if await reader.readexactly(2) != b"\r\n":
+                raise RequestError(400, "Malformed chunk.")
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass # Trailer fields
+    except asyncio.LimitOverrunError:
+        raise RequestError(400, "Malformed chunk.")
+    return bytes(body)
+
+
+async def read_http_request(reader):
+    """
+    Reads one HTTP/1.x request.
+
+    Returns:
+        tuple: (method, target, headers dict with lower-case names, body bytes), or None at end of stream.
+
+    Raises:
+        RequestError: For malformed or oversized requests.
+    """
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    except asyncio.LimitOverrunError:
+        raise RequestError(400, "Request headers too large.")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise RequestError(400, "Malformed request line.")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    headers[":version"] = version
+
+    transfer_encoding = headers.get("transfer-encoding")
+    if transfer_encoding is not None:
+        if [coding.strip().lower() for coding in transfer_encoding.split(",")] != ["chunked"]:
+            raise RequestError(501, f"Transfer-Encoding '{transfer_encoding}' is not supported.")
+        if "content-length" in headers:
+            raise RequestError(400, "Content-Length and Transfer-Encoding can't be combined.")
+        return method.upper(), target, headers, await read_chunked_body(reader)
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise RequestError(400, "Invalid Content-Length.")
+    if length > MAX_REQUEST_BYTES:
+        raise RequestError(413, f"Request body larger than {MAX_REQUEST_BYTES} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+def write_http_response(writer, status, body, content_type="application/json", keep_alive=True, headers=None):
+    """Writes one HTTP/1.1 response (does not drain)."""
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+             f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+
+
+def json_body(payload):
+    """Encodes a JSON response body."""
+    return json.dumps(payload).encode("utf-8")
+
+
+class NeonRenderServer:
+    """
+    Resident render server: HTTP on TCP or a Unix socket in front of a warm process pool.
+
+    Requests are parsed on the event loop and put on a bounded queue; one
+    dispatcher task per worker feeds the pool, so at most `workers` renders
+    run at a time and at most `queue_size` wait. A full queue is answered
+    with 503 straight away (backpressure) instead of piling up work.
+    """
+
+    def __init__(self, workers=None, queue_size=DEFAULT_QUEUE_SIZE, font_path=None, font_size=60):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.warm_args = (font_path, font_size)
+        self.parser = build_request_parser(font_path)
+        self.pool = None
+        self.queue = None
+        self.dispatchers = []
+        self.stats = {"served": 0, "failed": 0, "invalid": 0, "rejected": 0, "in_flight": 0}
+
+    def _start_pool(self):
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker,
+                                        initargs=self.warm_args)
+
+    async def start(self):
+        """Starts the pool with every worker warmed up, and the dispatchers."""
+        self._start_pool()
+        loop = asyncio.get_running_loop()
+        # The pool starts workers on demand; submit one no-op per worker so all are warm before serving
+        await asyncio.gather(*(loop.run_in_executor(self.pool, time.sleep, 0.05) for _ in range(self.workers)))
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Stops the dispatchers and shuts the pool down."""
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            kind, payload, args, result = await self.queue.get()
+            self.stats["in_flight"] += 1
+            pool = self.pool
+            try:
+                png = await loop.run_in_executor(pool, render_request, kind, payload, args)
+                if not result.done():
+                    result.set_result(png)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed by the OS); every render on that pool fails. The first
+                # dispatcher to notice replaces the pool for later requests, the others leave it be.
+                if pool is self.pool:
+                    log.error("Render worker died (%s). Restarting the process pool.", e)
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    self._start_pool()
+                if not result.done():
+                    result.set_exception(RequestError(500, "Render worker died."))
+            except asyncio.CancelledError:
+                if pool is self.pool:
+                    raise # This dispatcher is being stopped
+                # The render was still queued on a broken pool that another dispatcher shut down
+                if not result.done():
+                    result.set_exception(RequestError(500, "Render worker died."))
+            except Exception as e:
+                if not result.done():
+                    result.set_exception(RequestError(500, f"{type(e).__name__}: {e}"))
+            finally:
+                self.stats["in_flight"] -= 1
+                self.queue.task_done()
+
+    async def render(self, kind, query, payload):
+        """
+        Queues a render and waits for its PNG.
+
+        Raises:
+            RequestError: For bad options, a full queue (503) or an input that produced nothing.
+        """
+        if kind not in SERVER_INPUT_KINDS:
+            raise RequestError(404, f"Unknown input kind '{kind}'. Use one of: {', '.join(SERVER_INPUT_KINDS)}.")
+        args = parse_render_options(self.parser, query)
+        result = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((kind, payload, args, result))
+        except asyncio.QueueFull:
+            self.stats["rejected"] += 1
+            raise RequestError(503, "Render queue is full, retry shortly.")
+        png = await result
+        if png is None:
+            raise RequestError(422, "No contours found or the input could not be read.")
+        return png
+
+    def health(self):
+        """Returns the /health JSON payload."""
+        return dict(self.stats, status="ok", workers=self.workers, queued=self.queue.qsize(),
+                    queue_size=self.queue_size)
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP requests on one connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await read_http_request(reader)
+                except RequestError as e:
+                    write_http_response(writer, e.status, json_body({"error": str(e)}), keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and headers[":version"] != "HTTP/1.0")
+                status, response, content_type, extra = await self.handle_request(method, target, body)
+                write_http_response(writer, status, response, content_type, keep_alive, extra)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, method, target, body):
+        """
+        Routes one request.
+
+        Returns:
+            tuple: (status, body bytes, content type, extra headers dict)
+        """
+        url = urlsplit(target)
+        path = url.path.rstrip("/")
+        if path == "/health":
+            return 200, json_body(self.health()), "application/json", None
+        if not path.startswith("/render/"):
+            return 404, json_body({"error": f"Unknown path '{url.path}'."}), "application/json", None
+        if method != "POST":
+            return 405, json_body({"error": "Use POST with the input file as the request body."}), \
+                "application/json", {"Allow": "POST"}
+
+        start = time.perf_counter()
+        try:
+            png = await self.render(path[len("/render/"):], url.query, body)
+        except RequestError as e:
+            # 503s are counted as rejected when queued; bad requests are the client's, not failed renders
+            if e.status >= 500 and e.status != 503:
+                self.stats["failed"] += 1
+            elif e.status < 500:
+                self.stats["invalid"] += 1
+            extra = {"Retry-After": "1"} if e.status == 503 else None
+            return e.status, json_body({"error": str(e)}), "application/json", extra
+        self.stats["served"] += 1
+        return 200, png, "image/png", {"X-Render-Seconds": f"{time.perf_counter() - start:.3f}"}
+
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+    """Runs the server until SIGINT/SIGTERM."""
+    await server.start()
+    if socket_path:
+        listener = await asyncio.start_unix_server(server.handle_connection, path=socket_path)
+        where = f"unix:{socket_path}"
+    else:
+        listener = await asyncio.start_server(server.handle_connection, host, port)
+        where = f"http://{host}:{port}"
+    print(f"Neon render server on {where} ({server.workers} warm workers, queue {server.queue_size}).")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass # Windows: Ctrl+C still raises KeyboardInterrupt
+    try:
+        await stop.wait()
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        await server.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("Neon render server stopped.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve neon renders over HTTP from warm worker processes.")
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST,
+                        help=f"Address to listen on (default: {DEFAULT_HOST}).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"TCP port to listen on (default: {DEFAULT_PORT}).")
+    parser.add_argument("--socket", type=str, default=None,
+                        help="Listen on this Unix socket path instead of TCP.")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="Number of render worker processes (default: number of CPU cores).")
+    parser.add_argument("--queuesize", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help=f"Requests allowed to wait for a worker before answering 503 (default: {DEFAULT_QUEUE_SIZE}).")
+    parser.add_argument("-f", "--font", type=str, default=None,
+                        help="Font for text requests, preloaded in every worker (requests can't choose another).")
+    parser.add_argument("-fs", "--fontsize", type=int, default=60,
+                        help="Font size to preload with --font (requests may still pick their own 'fontsize').")
+    parser.add_argument("--loglevel", choices=LOG_LEVELS, default="warning",
+                        help="Messages to print; 'info' also logs every render's progress (default: warning).")
+    args = parser.parse_args()
+    configure_logging(args.loglevel)
+
+    server = NeonRenderServer(args.workers, max(1, args.queuesize), args.font, args.fontsize)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
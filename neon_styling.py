@@ -1,10 +1,52 @@
 # neon_styling.py
 
 # Ensure necessary libraries are installed: pip install Pillow svgpathtools numpy
-from PIL import Image, ImageDraw, ImageFilter
-# --- Corrected Import Line (Removed 'Move') ---
-from svgpathtools import svg2paths, Line, Arc, CubicBezier, QuadraticBezier
+from PIL import Image, ImageColor, ImageDraw
+import cv2
+import numpy as np
+import io
+import logging
 import os
+import re
+import xml.etree.ElementTree as ET
+
+from glow_engine import apply_glow_to_array, apply_glow_to_image, glow_margin
+from neon_profile import count_contours, get_logger, stage
+
+log = get_logger("neon_styling")
+
+# svgpathtools (and the SciPy it pulls in) is imported by _require_svgpathtools() on
+# first SVG or outline use; it costs more start-up time than everything else here.
+svg2paths = Line = Arc = CubicBezier = QuadraticBezier = None
+
+
+def _require_svgpathtools():
+    """Imports svgpathtools' parser and segment classes into this module on first use."""
+    global svg2paths, Line, Arc, CubicBezier, QuadraticBezier
+    if svg2paths is None:
+        from svgpathtools import svg2paths, Line, Arc, CubicBezier, QuadraticBezier
+
+# Sub-pixel bits used when drawing float coordinates with cv2 (1/16 px precision)
+DRAW_SHIFT_BITS = 4
+
+# Tube mask resolution factor for --quality high (area-downsampled afterwards)
+HIGH_QUALITY_SUPERSAMPLE = 3
+
+# Encoder defaults: zlib level for PNG (Pillow's default) and quality for WebP/JPEG (WebP > 100 is lossless)
+DEFAULT_COMPRESS_LEVEL = 6
+DEFAULT_IMAGE_QUALITY = 90
+# Output formats encode_image handles with OpenCV; anything else is saved with Pillow
+ENCODED_IMAGE_FORMATS = ("png", "webp", "jpg", "jpeg")
+
+# SVG/CSS properties that style a neon tube
+SVG_STYLE_PROPERTIES = ("stroke", "stroke-width")
+
+# Shape elements svg2paths converts, in the order it returns them (document order within each tag)
+SVG_SHAPE_TAGS = ("path", "polyline", "polygon", "line", "ellipse", "circle", "rect")
+
+# CSS pixels per absolute SVG length unit (96 dpi)
+SVG_UNIT_PIXELS = {"": 1.0, "px": 1.0, "pt": 96.0 / 72.0, "pc": 16.0, "in": 96.0, "cm": 96.0 / 2.54,
+                   "mm": 96.0 / 25.4, "q": 96.0 / 101.6}
 
 # Helper function to parse color strings (R,G,B)
 def parse_color(color_str, default_color=(255, 255, 255)):
@@ -14,15 +56,295 @@ def parse_color(color_str, default_color=(255, 255, 255)):
         r, g, b = map(int, color_str.split(','))
         return (r, g, b)
     except Exception:
-        print(f"Warning: Invalid color string '{color_str}'. Using default {default_color}.")
+        log.warning("Invalid color string '%s'. Using default %s.", color_str, default_color)
         return default_color
 
+def draw_contours(canvas, contours, color, line_width, closed=False, antialias=True, supersample=1):
+    """
+    Rasterises all contours onto an RGB array in bulk.
+
+    Contours are passed to OpenCV as NumPy arrays, so there is no per-point
+    Python work. All centre lines go into one single-channel mask with a
+    single thin cv2.polylines call, the mask is dilated with a round kernel
+    to the tube width (round joins and caps, like a thick pen), and the mask
+    is then colorized onto the canvas. This is much cheaper than drawing
+    every short staircase segment of a Canny contour as its own thick line.
+
+    With supersample > 1 the mask is instead drawn with thick lines at that
+    many times the resolution, over the contours' bounding box only, and
+    area-downsampled, which gives smooth tube edges and joins instead of the
+    dilated staircase of a 1x mask.
+
+    Args:
+        canvas (np.ndarray): HxWx3 uint8 image, drawn on in place.
+        contours (list): Contours as (N, 1, 2) or (N, 2) arrays. Integer contours
+                         (OpenCV format) are drawn as-is; float contours (e.g. from
+                         float32 .ncf files) are drawn with sub-pixel precision.
+        color (tuple): (R, G, B) tube color.
+        line_width (int): Width/thickness of the neon tube.
+        closed (bool): Connect each contour's last point back to its first.
+        antialias (bool): Use anti-aliased lines (cv2.LINE_AA).
+        supersample (int): Mask resolution factor (1 = draw at canvas resolution).
+
+    Returns:
+        np.ndarray: canvas
+    """
+    with stage("draw"):
+        if len(contours) == 0:
+            return canvas
+        line_type = cv2.LINE_AA if antialias else cv2.LINE_8
+        if supersample > 1:
+            offset, region = _group_region([(np.asarray(contour).reshape(-1, 2), closed) for contour in contours],
+                                           line_width, canvas.shape)
+            if region is None:
+                return canvas
+            x0, y0, x1, y1 = region
+            mask = _supersampled_tube_mask(contours, (y1 - y0, x1 - x0), offset, line_width, closed, int(supersample))
+            _colorize_mask(canvas[y0:y1, x0:x1], mask, color)
+            return canvas
+
+        mask = np.zeros(canvas.shape[:2], dtype=np.uint8)
+        int_polylines = []
+        float_polylines = []
+
+        for contour in contours:
+            points = np.asarray(contour)
+            if len(points) == 1:
+                # polylines draws nothing for a single point
+                x, y = points.reshape(2)
+                cv2.circle(mask, (int(round(x)), int(round(y))), 0, 255, -1)
+            elif len(points) > 1:
+                if points.dtype.kind == 'f':
+                    float_polylines.append(points)
+                elif points.dtype != np.int32:
+                    int_polylines.append(points.astype(np.int32))
+                else:
+                    int_polylines.append(points)
+
+        if int_polylines:
+            cv2.polylines(mask, int_polylines, closed, 255, 1, line_type)
+        if float_polylines:
+            scale = 1 << DRAW_SHIFT_BITS
+            fixed = [np.round(points * scale).astype(np.int32) for points in float_polylines]
+            cv2.polylines(mask, fixed, closed, 255, 1, line_type, DRAW_SHIFT_BITS)
+
+        width = int(line_width)
+        if width > 1:
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (width, width))
+            cv2.dilate(mask, kernel, dst=mask)
+
+        _colorize_mask(canvas, mask, color)
+        return canvas
+
+
+def _supersampled_tube_mask(contours, region_shape, offset, line_width, closed, factor):
+    """
+    Draws the tube mask of a region at `factor`x resolution and area-downsamples it.
+
+    At that resolution the tubes are drawn directly as thick lines (round
+    caps and joins) rather than dilated, and the area filter turns the hard
+    edges into coverage. Pixel centres are kept aligned: canvas pixel
+    (i + 0.5) maps to (i - offset + 0.5) * factor in the supersampled grid.
+
+    Returns:
+        np.ndarray: region_shape uint8 coverage mask.
+    """
+    height, width = region_shape
+    big = np.zeros((height * factor, width * factor), dtype=np.uint8)
+    scale = factor << DRAW_SHIFT_BITS
+    tube = max(1, int(round(line_width * factor)))
+    fixed = []
+    for contour in contours:
+        points = np.asarray(contour, dtype=np.float64).reshape(-1, 2)
+        if len(points) == 0:
+            continue
+        points = np.round((points - offset + 0.5) * scale - (1 << DRAW_SHIFT_BITS) * 0.5).astype(np.int32)
+        if len(points) == 1:
+            # polylines draws nothing for a single point
+            radius = max(scale // 2, (tube << DRAW_SHIFT_BITS) // 2)
+            cv2.circle(big, tuple(int(v) for v in points[0]), radius, 255, -1, cv2.LINE_8, DRAW_SHIFT_BITS)
+        else:
+            fixed.append(points)
+    if fixed:
+        cv2.polylines(big, fixed, closed, 255, tube, cv2.LINE_8, DRAW_SHIFT_BITS)
+    return cv2.resize(big, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def _colorize_mask(canvas, mask, color):
+    """Colorizes a coverage mask (0..255 scales the tube color) onto canvas with max(), in place."""
+    ramp = np.arange(256, dtype=np.float32).reshape(1, 256, 1) / 255.0
+    lut = np.round(ramp * np.asarray(color, dtype=np.float32)).astype(np.uint8)
+    colored = cv2.LUT(cv2.cvtColor(mask, cv2.COLOR_GRAY2RGB), lut)
+    cv2.max(canvas, colored, dst=canvas)
+
+
+def quality_draw_options(quality):
+    """
+    Returns the draw_contours options for a rendering quality.
+
+    'draft' draws aliased 1x tubes, 'normal' anti-aliased 1x tubes and
+    'high' supersamples them HIGH_QUALITY_SUPERSAMPLE times.
+
+    Returns:
+        dict: antialias and supersample keyword arguments.
+    """
+    if quality == "draft":
+        return {"antialias": False, "supersample": 1}
+    if quality == "high":
+        return {"antialias": True, "supersample": HIGH_QUALITY_SUPERSAMPLE}
+    return {"antialias": True, "supersample": 1}
+
+
+def fit_canvas_to_content(contours, margin):
+    """
+    Crops the canvas to the bounding box of the contours plus `margin` on every side.
+
+    Args:
+        contours (list): Contours as (N, 1, 2) / (N, 2) arrays, int or float.
+        margin (int): Pixels of empty border to keep (see glow_engine.glow_margin).
+
+    Returns:
+        tuple: (shifted contours, (width, height)), or (contours, None) if there are no points.
+    """
+    non_empty = [np.asarray(contour).reshape(-1, 2) for contour in contours if len(contour)]
+    if not non_empty:
+        return contours, None
+    all_points = np.concatenate(non_empty)
+    low = np.floor(all_points.min(axis=0)).astype(np.int64) - margin
+    high = np.ceil(all_points.max(axis=0)).astype(np.int64) + margin
+    # Whole-pixel shift keeps int contours int and float contours on the same sub-pixel grid
+    shifted = [np.asarray(contour) - low.astype(np.asarray(contour).dtype) for contour in contours]
+    return shifted, (int(high[0] - low[0]) + 1, int(high[1] - low[1]) + 1)
+
+
+def autofit_canvas(contours, image_size, line_width, glow_radius, glow_layers=None):
+    """
+    Fits the canvas to the contours with room for the tube and its glow (keeps image_size if empty).
+
+    Returns:
+        tuple: (shifted contours, (width, height))
+    """
+    fitted, fitted_size = fit_canvas_to_content(contours, glow_margin(line_width, glow_radius, glow_layers))
+    if fitted_size is None:
+        return contours, image_size
+    log.info("Auto-fit canvas: %dx%d (was %dx%d).", fitted_size[0], fitted_size[1], image_size[0], image_size[1])
+    return fitted, fitted_size
+
+
+def encode_image(canvas, image_format="png", compress_level=DEFAULT_COMPRESS_LEVEL, quality=DEFAULT_IMAGE_QUALITY):
+    """
+    Encodes an RGB image to PNG/WebP/JPEG bytes in memory with OpenCV.
+
+    Args:
+        canvas (np.ndarray): HxWx3 uint8 RGB image.
+        image_format (str): 'png', 'webp', 'jpg' or 'jpeg' (a leading dot is ignored).
+        compress_level (int): PNG zlib level, 0 (fastest) to 9 (smallest).
+        quality (int): WebP/JPEG quality 1-100; above 100 WebP is lossless.
+
+    Returns:
+        bytes: The encoded image.
+
+    Raises:
+        ValueError: For an unsupported format or if encoding fails.
+    """
+    image_format = image_format.lower().lstrip(".")
+    if image_format not in ENCODED_IMAGE_FORMATS:
+        raise ValueError(f"Cannot encode '{image_format}'; use one of {', '.join(ENCODED_IMAGE_FORMATS)}.")
+    if image_format == "png":
+        params = [cv2.IMWRITE_PNG_COMPRESSION, int(compress_level)]
+    elif image_format == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    else:
+        params = [cv2.IMWRITE_JPEG_QUALITY, min(100, int(quality))]
+    with stage("encode"):
+        ok, encoded = cv2.imencode("." + image_format, cv2.cvtColor(canvas, cv2.COLOR_RGB2BGR), params)
+    if not ok:
+        raise ValueError(f"OpenCV could not encode the image as '{image_format}'.")
+    return encoded.tobytes()
+
+
+def save_image(canvas, output_path, compress_level=DEFAULT_COMPRESS_LEVEL, quality=DEFAULT_IMAGE_QUALITY):
+    """
+    Writes an RGB image, encoded in memory by encode_image (Pillow for other formats).
+
+    The output directory is only created if it is missing.
+    """
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.isdir(output_dir):
+        os.makedirs(output_dir, exist_ok=True)
+    image_format = os.path.splitext(output_path)[1].lower().lstrip(".")
+    if image_format not in ENCODED_IMAGE_FORMATS:
+        with stage("encode"):
+            Image.fromarray(canvas).save(output_path)
+        return
+    with open(output_path, "wb") as f:
+        f.write(encode_image(canvas, image_format, compress_level, quality))
+
+
+def render_neon_circle(size=(400, 400),
+                       line_color="255,255,255", # White
+                       line_width=5,
+                       glow_radius=10,
+                       glow_alpha=0.5,
+                       glow_engine="cv2",
+                       glow_layers=None,
+                       quality="normal"):
+    """
+    Renders the neon test circle in memory (see create_neon_circle).
+
+    At 'high' quality the circle is drawn as a supersampled polyline (see
+    draw_contours) instead of Pillow's aliased ellipse outline.
+
+    Returns:
+        np.ndarray: HxWx3 uint8 RGB image.
+    """
+    color = parse_color(line_color, (255, 255, 255)) # Default white
+    background_color = (0, 0, 0)  # Black background
+    img = Image.new("RGB", size, background_color)
+    draw = ImageDraw.Draw(img)
+
+    circle_center = (size[0] // 2, size[1] // 2)
+    # Adjust radius based on size, ensure width doesn't exceed radius
+    circle_radius = min(size[0], size[1]) // 2 - (line_width * 2)
+    circle_radius = max(10, circle_radius) # Ensure minimum radius
+
+    # Define bounding box for the ellipse
+    bounding_box = [
+        circle_center[0] - circle_radius,
+        circle_center[1] - circle_radius,
+        circle_center[0] + circle_radius,
+        circle_center[1] + circle_radius,
+    ]
+    # Draw the sharp outline
+    if quality == "high":
+        points, closed = circle_subpath(size, line_width)
+        canvas = draw_contours(np.array(img), [points], color, line_width, closed=closed,
+                               **quality_draw_options(quality))
+        img = Image.fromarray(canvas)
+    else:
+        with stage("draw"):
+            draw.ellipse(
+                bounding_box,
+                fill=None, # No fill
+                outline=color, # Use parsed color
+                width=line_width, # Use parameter
+            )
+
+    # Apply glow effect using Gaussian Blur and Blending
+    final_img = apply_glow_to_image(img, glow_radius, glow_alpha, glow_engine, glow_layers,
+                                    quality) # Use parameters
+    return np.asarray(final_img)
+
+
 def create_neon_circle(output_path,
                        line_color="255,255,255", # White
                        line_width=5,
                        glow_radius=10,
                        glow_alpha=0.5,
-                       size=(400, 400)):
+                       size=(400, 400),
+                       glow_engine="cv2",
+                       glow_layers=None,
+                       quality="normal"):
     """
     Creates an image file with a simple neon circle effect.
 
@@ -33,183 +355,846 @@ def create_neon_circle(output_path,
         glow_radius (int): Radius for the Gaussian blur glow effect.
         glow_alpha (float): Blending alpha for the glow (0=sharp, 1=blur).
         size (tuple): (width, height) of the output image.
+        glow_engine (str): 'cv2' (NumPy/OpenCV compositor) or 'pil' (original blur-and-blend).
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        quality (str): 'draft', 'normal' or 'high' (see quality_draw_options and apply_glow_to_array).
+
+    Returns:
+        bool: True if the image was written, False if rendering or saving failed.
     """
     try:
-        color = parse_color(line_color, (255, 255, 255)) # Default white
-        background_color = (0, 0, 0)  # Black background
-        img = Image.new("RGB", size, background_color)
-        draw = ImageDraw.Draw(img)
-
-        circle_center = (size[0] // 2, size[1] // 2)
-        # Adjust radius based on size, ensure width doesn't exceed radius
-        circle_radius = min(size[0], size[1]) // 2 - (line_width * 2)
-        circle_radius = max(10, circle_radius) # Ensure minimum radius
-
-        # Define bounding box for the ellipse
-        bounding_box = [
-            circle_center[0] - circle_radius,
-            circle_center[1] - circle_radius,
-            circle_center[0] + circle_radius,
-            circle_center[1] + circle_radius,
-        ]
-        # Draw the sharp outline
-        draw.ellipse(
-            bounding_box,
-            fill=None, # No fill
-            outline=color, # Use parsed color
-            width=line_width, # Use parameter
-        )
-
-        # Apply glow effect using Gaussian Blur and Blending
-        blurred_img = img.filter(ImageFilter.GaussianBlur(radius=glow_radius)) # Use parameter
-        # Blend the sharp image with the blurred image
-        final_img = Image.blend(img, blurred_img, alpha=glow_alpha) # Use parameter
-
-        # Ensure output directory exists before saving
-        output_dir = os.path.dirname(output_path)
-        if output_dir: # Check if path includes a directory
-             os.makedirs(output_dir, exist_ok=True)
-
-        final_img.save(output_path)
+        canvas = render_neon_circle(size, line_color, line_width, glow_radius, glow_alpha, glow_engine,
+                                    glow_layers, quality)
+
+        save_image(canvas, output_path)
+        return True
 
     except Exception as e:
-        print(f"Error in create_neon_circle saving to {output_path}: {e}")
+        log.error("create_neon_circle could not save %s: %s", output_path, e)
+        return False
+
+
+def render_neon_effect(contours, image_size=(400, 400),
+                       line_color="255,0,255", # Magenta
+                       line_width=5,
+                       glow_radius=10,
+                       glow_alpha=0.5,
+                       glow_engine="cv2",
+                       glow_layers=None,
+                       closed=False,
+                       autofit=False,
+                       quality="normal"):
+    """
+    Renders the neon effect of a list of contours in memory (see apply_neon_effect).
+
+    Returns:
+        np.ndarray: HxWx3 uint8 RGB image.
+    """
+    color = parse_color(line_color, (255, 0, 255)) # Default magenta
+    count_contours(contours)
+    if autofit:
+        contours, image_size = autofit_canvas(contours, image_size, line_width, glow_radius, glow_layers)
+    width, height = image_size
+    canvas = np.zeros((height, width, 3), dtype=np.uint8) # Black background, RGB
+
+    # Draw all contours in bulk
+    draw_contours(canvas, contours, color, line_width, closed=closed, **quality_draw_options(quality))
+
+    # Apply glow effect
+    return apply_glow_to_array(canvas, glow_radius, glow_alpha, glow_engine, glow_layers,
+                               quality) # Use parameters
 
 
 def apply_neon_effect(contours, output_path, image_size=(400, 400),
                       line_color="255,0,255", # Magenta
                       line_width=5,
                       glow_radius=10,
-                      glow_alpha=0.5):
+                      glow_alpha=0.5,
+                      glow_engine="cv2",
+                      glow_layers=None,
+                      closed=False,
+                      autofit=False,
+                      quality="normal"):
     """
     Applies neon effect to a list of contours (e.g., from OpenCV).
 
     Args:
-        contours (list): List of contours from OpenCV.
+        contours (list): List of contours from OpenCV (NumPy arrays, int or float).
         output_path (str): Path to save the output PNG image.
         image_size (tuple): (width, height) of the canvas.
         line_color (str/tuple): Color for the neon tube.
         line_width (int): Width/thickness of the neon tube.
         glow_radius (int): Radius for the Gaussian blur glow effect.
         glow_alpha (float): Blending alpha for the glow (0=sharp, 1=blur).
+        glow_engine (str): 'cv2' (NumPy/OpenCV compositor) or 'pil' (original blur-and-blend).
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        closed (bool): Draw each contour as a closed loop.
+        autofit (bool): Replace image_size with the contours' bounding box plus the glow margin.
+        quality (str): 'draft', 'normal' or 'high' (see quality_draw_options and apply_glow_to_array).
+
+    Returns:
+        bool: True if the image was written, False if rendering or saving failed.
     """
     try:
-        color = parse_color(line_color, (255, 0, 255)) # Default magenta
-        background_color = (0, 0, 0)  # Black background
-        img = Image.new("RGB", image_size, background_color)
-        draw = ImageDraw.Draw(img)
+        canvas = render_neon_effect(contours, image_size, line_color, line_width, glow_radius, glow_alpha,
+                                    glow_engine, glow_layers, closed, autofit, quality)
 
-        # Draw each contour
-        for contour in contours:
-            points = [tuple(point[0]) for point in contour]
-            if len(points) > 1:
-                draw.line(points, fill=color, width=line_width) # Use parameters
-            elif len(points) == 1:
-                draw.point(points[0], fill=color) # Use parameter
+        save_image(canvas, output_path)
+        return True
 
-        # Apply glow effect
-        blurred_img = img.filter(ImageFilter.GaussianBlur(radius=glow_radius)) # Use parameter
-        final_img = Image.blend(img, blurred_img, alpha=glow_alpha) # Use parameter
+    except Exception as e:
+        log.error("apply_neon_effect could not save %s: %s", output_path, e)
+        return False
 
-        # Ensure output directory exists
-        output_dir = os.path.dirname(output_path)
-        if output_dir:
-             os.makedirs(output_dir, exist_ok=True)
 
-        final_img.save(output_path)
+def render_neon_subpaths(subpaths, image_size=(400, 400),
+                         line_color="0,255,255", # Cyan
+                         line_width=3,
+                         glow_radius=8,
+                         glow_alpha=0.6,
+                         glow_engine="cv2",
+                         glow_layers=None,
+                         autofit=False,
+                         styles=None,
+                         quality="normal"):
+    """
+    Renders the neon effect of flattened vector paths in memory (see apply_neon_to_subpaths).
 
-    except Exception as e:
-        print(f"Error in apply_neon_effect saving to {output_path}: {e}")
+    Returns:
+        np.ndarray: HxWx3 uint8 RGB image.
+    """
+    color = parse_color(line_color, (0, 255, 255)) # Default cyan
+    count_contours([points for points, _ in subpaths])
+    if autofit:
+        widest = max([width for _, width in styles or () if width] + [line_width])
+        points, image_size = autofit_canvas([points for points, _ in subpaths], image_size,
+                                            widest, glow_radius, glow_layers)
+        subpaths = [(shifted, closed) for shifted, (_, closed) in zip(points, subpaths)]
+    groups = group_subpaths_by_style(subpaths, styles, color, line_width)
+    draw_options = quality_draw_options(quality)
+    width, height = image_size
+    canvas = np.zeros((height, width, 3), dtype=np.uint8) # Black background, RGB
 
+    # Sub-pixel polylines, open and closed ones in one pass each per style group
+    for (group_color, group_width), group in groups.items():
+        # Draw within the group's bounding box (plus the tube) so small groups stay cheap
+        offset, region = _group_region(group, group_width, canvas.shape)
+        if region is None:
+            continue
+        x0, y0, x1, y1 = region
+        shifted = [(points - offset, closed) for points, closed in group]
+        target = canvas[y0:y1, x0:x1]
+        draw_contours(target, [points for points, closed in shifted if not closed], group_color, group_width,
+                      **draw_options)
+        draw_contours(target, [points for points, closed in shifted if closed], group_color, group_width,
+                      closed=True, **draw_options)
 
-# ==============================================================================
-# === apply_neon_to_svg function with Parameterization ===
-# ==============================================================================
-def apply_neon_to_svg(svg_path, output_path, canvas_size=(400, 400), num_steps=25,
-                      line_color="0,255,255", # Cyan
-                      line_width=3,
-                      glow_radius=8,
-                      glow_alpha=0.6):
+    return apply_glow_to_array(canvas, glow_radius, glow_alpha, glow_engine, glow_layers, quality)
+
+
+def apply_neon_to_subpaths(subpaths, output_path, image_size=(400, 400),
+                           line_color="0,255,255", # Cyan
+                           line_width=3,
+                           glow_radius=8,
+                           glow_alpha=0.6,
+                           glow_engine="cv2",
+                           glow_layers=None,
+                           autofit=False,
+                           styles=None,
+                           quality="normal"):
     """
-    Apply neon effects to SVG paths by discretizing segments and drawing them.
+    Applies neon effect to flattened vector paths (SVG paths, glyph outlines).
+
+    With per-subpath styles, subpaths are grouped by (colour, width) and each
+    group is drawn in bulk onto the same canvas. The glow blurs each colour
+    channel independently, so one glow pass lights every group in its own
+    colour and a multi-colour sign costs about the same as a single-colour one.
 
     Args:
-        svg_path (str): Path to the input SVG file.
+        subpaths (list): (points (N, 2) float array, closed bool) per subpath, in canvas pixels.
         output_path (str): Path to save the output PNG image.
-        canvas_size (tuple): (width, height) of the output image.
-        num_steps (int): Number of points to sample along curves/arcs.
+        image_size (tuple): (width, height) of the canvas.
         line_color (str/tuple): Color for the neon tube.
         line_width (int): Width/thickness of the neon tube.
         glow_radius (int): Radius for the Gaussian blur glow effect.
         glow_alpha (float): Blending alpha for the glow (0=sharp, 1=blur).
+        glow_engine (str): 'cv2' (NumPy/OpenCV compositor) or 'pil' (original blur-and-blend).
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        autofit (bool): Replace image_size with the paths' bounding box plus the glow margin.
+        styles (list, optional): (color tuple or None, width or None) per subpath, e.g. from
+                                 svg_to_subpaths(with_styles=True); None entries use line_color/line_width.
+        quality (str): 'draft', 'normal' or 'high' (see quality_draw_options and apply_glow_to_array).
+
+    Returns:
+        bool: True if the image was written, False if rendering or saving failed.
     """
-    print("DEBUG: Entered apply_neon_to_svg function.")
     try:
-        print(f"DEBUG: Parsing SVG file '{svg_path}'...")
-        paths, attributes = svg2paths(svg_path)
-        print(f"Found {len(paths)} paths in the SVG.")
+        canvas = render_neon_subpaths(subpaths, image_size, line_color, line_width, glow_radius, glow_alpha,
+                                      glow_engine, glow_layers, autofit, styles, quality)
+
+        save_image(canvas, output_path)
+        return True
+
     except Exception as e:
-        print(f"Error parsing SVG file '{svg_path}': {e}")
-        return
+        log.error("apply_neon_to_subpaths could not save %s: %s", output_path, e)
+        return False
+
+
+def _group_region(subpaths, line_width, canvas_shape):
+    """
+    Bounding box of subpaths grown by the tube width, clipped to the canvas.
+
+    Returns:
+        tuple: (offset (2,) array of the box origin, (x0, y0, x1, y1)), or (None, None) if off-canvas.
+    """
+    non_empty = [points for points, _ in subpaths if len(points)]
+    if not non_empty:
+        return None, None
+    all_points = np.concatenate(non_empty)
+    pad = int(line_width) + 2
+    x0, y0 = np.maximum(np.floor(all_points.min(axis=0)).astype(int) - pad, 0)
+    x1, y1 = np.ceil(all_points.max(axis=0)).astype(int) + pad + 1
+    x1, y1 = min(x1, canvas_shape[1]), min(y1, canvas_shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return None, None
+    return np.array([x0, y0], dtype=float), (x0, y0, x1, y1)
+
+
+# --- Vectorised SVG Sampling ---
+def sample_segment(segment, num_steps):
+    """
+    Evaluates an SVG segment at t = 1/num_steps, ..., 1 in one NumPy pass.
+
+    Lines only need their end point; Béziers use the Bernstein form over a `t`
+    vector and arcs the same centre parametrisation as svgpathtools' Arc.point.
+
+    Args:
+        segment: svgpathtools Line, QuadraticBezier, CubicBezier or Arc.
+        num_steps (int): Number of points to sample along curves/arcs.
+
+    Returns:
+        np.ndarray: Complex array of sampled points (segment.start excluded).
+    """
+    _require_svgpathtools()
+    if isinstance(segment, Line):
+        return np.array([segment.end], dtype=complex)
+
+    t = np.arange(1, num_steps + 1, dtype=float) / num_steps
+    mt = 1.0 - t
+    if isinstance(segment, CubicBezier):
+        p0, p1, p2, p3 = segment.bpoints()
+        return mt * mt * mt * p0 + 3 * mt * mt * t * p1 + 3 * mt * t * t * p2 + t * t * t * p3
+    if isinstance(segment, QuadraticBezier):
+        p0, p1, p2 = segment.bpoints()
+        return mt * mt * p0 + 2 * mt * t * p1 + t * t * p2
+    if isinstance(segment, Arc):
+        angle = np.radians(segment.theta + t * segment.delta)
+        cos_phi, sin_phi = segment.rot_matrix.real, segment.rot_matrix.imag
+        rx, ry = segment.radius.real, segment.radius.imag
+        cos_a, sin_a = np.cos(angle), np.sin(angle)
+        x = rx * cos_phi * cos_a - ry * sin_phi * sin_a + segment.center.real
+        y = rx * sin_phi * cos_a + ry * cos_phi * sin_a + segment.center.imag
+        return x + 1j * y
+
+    # Unknown segment type: fall back to its own point() method
+    return np.array([segment.point(ti) for ti in t], dtype=complex)
+
 
+# Upper bound on points per curve in adaptive mode (guards against degenerate input)
+MAX_ADAPTIVE_STEPS = 1024
+
+
+def adaptive_step_counts(segments, tolerance, scale=1.0):
+    """
+    Picks a step count per curve so the flattened polyline stays within `tolerance` output pixels.
+
+    Béziers use Wang's bound n = sqrt(d(d-1)/8 * max|P[i] - 2P[i+1] + P[i+2]| / tolerance),
+    arcs the sagitta r(1 - cos(step/2)) <= tolerance. Both scale with the
+    on-canvas size, so small details get few points and large curves many.
+
+    Args:
+        segments (list): Non-Line svgpathtools segments.
+        tolerance (float): Maximum deviation from the true curve, in output pixels.
+        scale (float): Output pixels per SVG user unit.
+
+    Returns:
+        np.ndarray: int step count (>= 1) per segment.
+    """
+    _require_svgpathtools()
+    counts = np.ones(len(segments), dtype=np.int64)
+    tolerance = max(float(tolerance), 1e-3)
+    for i, segment in enumerate(segments):
+        if isinstance(segment, (CubicBezier, QuadraticBezier)):
+            control_points = np.array(segment.bpoints(), dtype=complex) * scale
+            degree = len(control_points) - 1
+            second_diff = np.abs(control_points[:-2] - 2 * control_points[1:-1] + control_points[2:]).max()
+            steps = np.sqrt(degree * (degree - 1) / 8.0 * second_diff / tolerance)
+        elif isinstance(segment, Arc):
+            radius = max(segment.radius.real, segment.radius.imag) * scale
+            if radius <= tolerance:
+                steps = 1
+            else:
+                step_angle = 2 * np.arccos(1 - tolerance / radius)
+                steps = abs(np.radians(segment.delta)) / step_angle
+        else:
+            steps = 16 # Unknown segment type, nothing to bound it with
+        counts[i] = min(MAX_ADAPTIVE_STEPS, max(1, int(np.ceil(steps))))
+    return counts
+
+
+def sample_subpath(subpath, num_steps=25, tolerance=None, scale=1.0):
+    """
+    Samples every segment of a continuous subpath into one complex array.
+
+    Segments are grouped by type and each group is evaluated at once over a
+    flat `t` vector (one run of t values per segment): Béziers in Bernstein
+    form, arcs with the same centre parametrisation as svgpathtools'
+    Arc.point. Points are written straight into their final position, so
+    segment order is preserved.
+
+    Args:
+        subpath: Continuous svgpathtools Path.
+        num_steps (int): Number of points to sample along each curve/arc (fixed mode).
+        tolerance (float, optional): Max deviation in output pixels; when given, the
+                                     step count is chosen per curve (see adaptive_step_counts).
+        scale (float): Output pixels per SVG user unit, used by the tolerance.
+
+    Returns:
+        np.ndarray: Complex points, starting with subpath.start.
+    """
+    _require_svgpathtools()
+    segments = list(subpath)
+    is_line = np.array([isinstance(segment, Line) for segment in segments], dtype=bool)
+    curve_idx = np.flatnonzero(~is_line)
+    counts = np.ones(len(segments), dtype=np.int64)
+    if tolerance is not None:
+        counts[curve_idx] = adaptive_step_counts([segments[i] for i in curve_idx], tolerance, scale)
+    else:
+        counts[curve_idx] = num_steps
+    starts = np.concatenate(([1], 1 + np.cumsum(counts)[:-1]))
+    points = np.empty(1 + int(counts.sum()), dtype=complex)
+    points[0] = subpath.start
+
+    line_idx = np.flatnonzero(is_line)
+    if len(line_idx):
+        points[starts[line_idx]] = [segments[i].end for i in line_idx]
+
+    groups = {CubicBezier: [], QuadraticBezier: [], Arc: [], None: []}
+    for i in curve_idx:
+        segment_type = type(segments[i])
+        groups[segment_type if segment_type in groups else None].append(i)
+
+    def flat_t(idx):
+        # For segments idx with n_k steps: t = 1/n_k .. 1 for each, back to back
+        n = counts[idx]
+        owner = np.repeat(np.arange(len(idx)), n)
+        local = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+        t = (local + 1) / n[owner]
+        return owner, t, starts[idx][owner] + local
+
+    for segment_type in (CubicBezier, QuadraticBezier):
+        idx = np.array(groups[segment_type], dtype=np.int64)
+        if len(idx):
+            control_points = np.array([segments[i].bpoints() for i in idx], dtype=complex)
+            owner, t, positions = flat_t(idx)
+            mt = 1.0 - t
+            cp = control_points[owner]
+            if segment_type is CubicBezier:
+                points[positions] = (mt * mt * mt * cp[:, 0] + 3 * mt * mt * t * cp[:, 1]
+                                     + 3 * mt * t * t * cp[:, 2] + t * t * t * cp[:, 3])
+            else:
+                points[positions] = mt * mt * cp[:, 0] + 2 * mt * t * cp[:, 1] + t * t * cp[:, 2]
+
+    idx = np.array(groups[Arc], dtype=np.int64)
+    if len(idx):
+        arcs = [segments[i] for i in idx]
+        owner, t, positions = flat_t(idx)
+        theta = np.array([arc.theta for arc in arcs])[owner]
+        delta = np.array([arc.delta for arc in arcs])[owner]
+        rotation = np.array([arc.rot_matrix for arc in arcs])[owner]
+        radius = np.array([arc.radius for arc in arcs])[owner]
+        center = np.array([arc.center for arc in arcs])[owner]
+        angle = np.radians(theta + t * delta)
+        x = radius.real * np.cos(angle)
+        y = radius.imag * np.sin(angle)
+        points[positions] = center + rotation * (x + 1j * y)
+
+    for i in groups[None]:
+        points[starts[i]:starts[i] + counts[i]] = sample_segment(segments[i], int(counts[i]))
+    return points
+
+
+def path_to_subpaths(path, num_steps=25, tolerance=None, scale=1.0):
+    """
+    Converts an svgpathtools Path into one coordinate array per subpath.
+
+    The path is split at every move (discontinuity). A subpath that ends where
+    it started (an SVG 'Z', or an explicit line back) is reported as closed,
+    with the duplicate end point dropped so it can be drawn as a closed loop.
+
+    Args:
+        path: svgpathtools Path.
+        num_steps (int): Number of points to sample along curves/arcs.
+        tolerance (float, optional): Adaptive flattening tolerance in output pixels.
+        scale (float): Output pixels per SVG user unit, used by the tolerance.
+
+    Returns:
+        list: (points (N, 2) float64 array, closed bool) per subpath.
+    """
+    _require_svgpathtools()
+    subpaths = []
+    for subpath in path.continuous_subpaths():
+        if len(subpath) == 0:
+            continue
+        points = sample_subpath(subpath, num_steps, tolerance, scale)
+        closed = subpath.start == subpath.end and len(points) > 2
+        if closed:
+            points = points[:-1]
+        subpaths.append((np.column_stack((points.real, points.imag)), closed))
+    return subpaths
+
+
+# --- SVG Stroke Styles ---
+def parse_css_declarations(declarations):
+    """Parses 'stroke: #f00; stroke-width: 3' into a dict of the tube properties."""
+    properties = {}
+    for declaration in declarations.split(";"):
+        name, _, value = declaration.partition(":")
+        name = name.strip().lower()
+        if name in SVG_STYLE_PROPERTIES and value.strip():
+            properties[name] = value.replace("!important", "").strip()
+    return properties
+
+
+def read_svg_class_rules(svg_path, root=None):
+    """
+    Collects the tube properties of '.class { ... }' rules in the SVG's <style> elements.
+
+    Only plain class selectors are supported (also in selector lists like
+    '.a, .b'); other selectors are ignored.
+
+    Args:
+        svg_path (str): Path to the SVG file.
+        root (ET.Element, optional): Already parsed root element; svg_path is not read when given.
+
+    Returns:
+        dict: class name -> {property: value}.
+    """
+    rules = {}
+    if root is None:
+        try:
+            root = ET.parse(svg_path).getroot()
+        except (ET.ParseError, OSError):
+            return rules
+    for element in root.iter():
+        if not isinstance(element.tag, str) or element.tag.rsplit("}", 1)[-1] != "style":
+            continue
+        css = re.sub(r"/\*.*?\*/", "", "".join(element.itertext()), flags=re.S)
+        for selectors, declarations in re.findall(r"([^{}]+)\{([^}]*)\}", css):
+            properties = parse_css_declarations(declarations)
+            for selector in selectors.split(","):
+                match = re.fullmatch(r"\s*\.([\w-]+)\s*", selector)
+                if match and properties:
+                    rules.setdefault(match.group(1), {}).update(properties)
+    return rules
+
+
+def parse_svg_stroke(value):
+    """
+    Converts an SVG stroke value to an (r, g, b) tube colour.
+
+    Returns None for 'none', 'currentColor', gradients/patterns, unparseable
+    values and black, which would be an invisible tube on the black background;
+    those paths use the default colour instead.
+    """
+    value = (value or "").strip()
+    if not value or value.lower() in ("none", "currentcolor", "inherit") or value.startswith("url("):
+        return None
     try:
-        color = parse_color(line_color, (0, 255, 255)) # Default cyan
-        print(f"DEBUG: Creating image canvas {canvas_size}...")
-        img = Image.new("RGB", canvas_size, (0, 0, 0)) # Black background
-        draw = ImageDraw.Draw(img)
+        color = ImageColor.getrgb(value)[:3]
+    except ValueError:
+        return None
+    return color if max(color) > 0 else None
+
+
+def parse_svg_stroke_width(value, scale=1.0):
+    """
+    Converts an SVG stroke-width ('3', '2.5px') to a whole tube width in pixels, or None.
+
+    `scale` is the canvas pixels per user unit of the path (see svg_matrix_scale).
+    """
+    match = re.match(r"\s*([0-9]*\.?[0-9]+)\s*(px)?\s*$", value or "")
+    if not match:
+        return None
+    return max(1, int(round(float(match.group(1)) * scale)))
+
+
+def svg_element_properties(attributes, class_rules, inherited=None):
+    """
+    Resolves the tube properties of one SVG element, on top of those it inherits.
+
+    Precedence follows CSS: the inline style attribute, then class rules
+    (later classes win), then the stroke/stroke-width presentation attributes,
+    then the values inherited from ancestor groups. 'inherit' keeps the
+    inherited value.
+
+    Returns:
+        dict: property -> value, for the properties set anywhere along the way.
+    """
+    own = {name: attributes[name] for name in SVG_STYLE_PROPERTIES if name in attributes}
+    for class_name in attributes.get("class", "").split():
+        own.update(class_rules.get(class_name, {}))
+    own.update(parse_css_declarations(attributes.get("style", "")))
+    properties = dict(inherited or {})
+    properties.update((name, value) for name, value in own.items() if value.strip().lower() != "inherit")
+    return properties
+
+
+def svg_path_style(attributes, class_rules, scale=1.0, inherited=None):
+    """
+    Resolves the tube (colour, width) of one SVG path from its attributes.
+
+    Properties the path doesn't set itself come from its ancestor groups
+    (`inherited`, see svg_shape_matrices). A stroke of 'none' still draws
+    the path as a tube, in the default colour (see parse_svg_stroke), so
+    fill-only artwork gets outlined. The stroke width is scaled to canvas
+    pixels by `scale`.
+
+    Returns:
+        tuple: (color tuple or None, width int or None); None means "use the default".
+    """
+    properties = svg_element_properties(attributes, class_rules, inherited)
+    return (parse_svg_stroke(properties.get("stroke")),
+            parse_svg_stroke_width(properties.get("stroke-width"), scale))
+
+
+# --- SVG Viewport and Transforms ---
+def parse_svg_transform(value):
+    """
+    Parses an SVG transform attribute into a 3x3 affine matrix.
 
-        print(f"DEBUG: Processing SVG paths with color={color}, width={line_width}...")
-        for path_index, path in enumerate(paths):
-            print(f"DEBUG: Processing Path {path_index+1}/{len(paths)}")
+    Supports matrix, translate, scale, rotate (with optional centre), skewX
+    and skewY; a list of transforms is composed left to right, as in SVG.
+    Unknown or malformed entries are ignored.
+
+    Returns:
+        np.ndarray: 3x3 float64 matrix mapping element coordinates to parent coordinates.
+    """
+    matrix = np.eye(3)
+    for name, args in re.findall(r"([a-zA-Z]+)\s*\(([^)]*)\)", value or ""):
+        try:
+            numbers = [float(number) for number in re.split(r"[\s,]+", args.strip()) if number]
+        except ValueError:
+            continue
+        step = np.eye(3)
+        name = name.lower()
+        if name == "matrix" and len(numbers) == 6:
+            a, b, c, d, e, f = numbers
+            step[:2] = [[a, c, e], [b, d, f]]
+        elif name == "translate" and numbers:
+            step[0, 2] = numbers[0]
+            step[1, 2] = numbers[1] if len(numbers) > 1 else 0.0
+        elif name == "scale" and numbers:
+            step[0, 0] = numbers[0]
+            step[1, 1] = numbers[1] if len(numbers) > 1 else numbers[0]
+        elif name == "rotate" and numbers:
+            angle = np.radians(numbers[0])
+            cx, cy = numbers[1:3] if len(numbers) >= 3 else (0.0, 0.0)
+            cos_a, sin_a = np.cos(angle), np.sin(angle)
+            step[:2] = [[cos_a, -sin_a, cx - cos_a * cx + sin_a * cy],
+                        [sin_a, cos_a, cy - sin_a * cx - cos_a * cy]]
+        elif name == "skewx" and numbers:
+            step[0, 1] = np.tan(np.radians(numbers[0]))
+        elif name == "skewy" and numbers:
+            step[1, 0] = np.tan(np.radians(numbers[0]))
+        else:
+            continue
+        matrix = matrix @ step
+    return matrix
+
+
+def parse_svg_length(value):
+    """Converts an absolute SVG length ('400', '10cm', '72pt') to pixels, or None (percentages, em, bad values)."""
+    match = re.match(r"\s*([+-]?[0-9]*\.?[0-9]+(?:[eE][+-]?[0-9]+)?)\s*([a-zA-Z]*)\s*$", value or "")
+    if not match or match.group(2).lower() not in SVG_UNIT_PIXELS:
+        return None
+    return float(match.group(1)) * SVG_UNIT_PIXELS[match.group(2).lower()]
+
+
+def svg_viewport_matrix(svg_attributes, canvas_size):
+    """
+    Builds the matrix mapping the SVG's user space onto the output canvas.
+
+    The viewBox (or, without one, the 0 0 width height viewport) is fitted
+    into canvas_size honouring preserveAspectRatio (default 'xMidYMid meet').
+    An SVG with neither a viewBox nor absolute width/height keeps one user
+    unit per pixel.
+
+    Args:
+        svg_attributes (dict): Attributes of the root <svg> element.
+        canvas_size (tuple): (width, height) of the output canvas.
+
+    Returns:
+        np.ndarray: 3x3 float64 matrix.
+    """
+    view_box = None
+    try:
+        numbers = [float(number) for number in re.split(r"[\s,]+", svg_attributes.get("viewBox", "").strip())
+                   if number]
+        if len(numbers) == 4 and numbers[2] > 0 and numbers[3] > 0:
+            view_box = numbers
+    except ValueError:
+        pass
+    if view_box is None:
+        width = parse_svg_length(svg_attributes.get("width"))
+        height = parse_svg_length(svg_attributes.get("height"))
+        if not width or not height or width <= 0 or height <= 0:
+            return np.eye(3)
+        view_box = [0.0, 0.0, width, height]
+
+    min_x, min_y, box_width, box_height = view_box
+    scale_x, scale_y = canvas_size[0] / box_width, canvas_size[1] / box_height
+    aspect = svg_attributes.get("preserveAspectRatio", "").split()
+    if aspect and aspect[0] == "defer":
+        aspect = aspect[1:]
+    align = aspect[0] if aspect else "xMidYMid"
+    if align != "none":
+        scale_x = scale_y = (max if aspect[1:2] == ["slice"] else min)(scale_x, scale_y)
+    # Alignment shifts the scaled viewBox within the canvas (Min = 0, Mid = 1/2, Max = 1 of the slack)
+    fractions = {"Min": 0.0, "Mid": 0.5, "Max": 1.0}
+    match = re.fullmatch(r"x(Min|Mid|Max)Y(Min|Mid|Max)", align)
+    fraction_x, fraction_y = (fractions[match.group(1)], fractions[match.group(2)]) if match else (0.5, 0.5)
+    offset_x = (canvas_size[0] - box_width * scale_x) * fraction_x - min_x * scale_x
+    offset_y = (canvas_size[1] - box_height * scale_y) * fraction_y - min_y * scale_y
+    return np.array([[scale_x, 0.0, offset_x], [0.0, scale_y, offset_y], [0.0, 0.0, 1.0]])
+
+
+def svg_shape_matrices(root, base_matrix, class_rules=None):
+    """
+    Composes the canvas matrix of every shape element, in svg2paths' order.
+
+    Each matrix is base_matrix times the transforms of all ancestor groups
+    and of the element itself, so one matrix product per shape maps its
+    sampled points straight to canvas pixels. With class_rules, the same walk
+    also resolves the tube properties each shape inherits from its ancestors
+    (see svg_element_properties).
+
+    Returns:
+        list: 3x3 float64 matrix per path returned by svg2paths. With class_rules, a
+              tuple (matrices, inherited) with one inherited property dict per path.
+    """
+    shapes = {tag: [] for tag in SVG_SHAPE_TAGS}
+
+    def walk(element, matrix, inherited):
+        if "transform" in element.attrib:
+            matrix = matrix @ parse_svg_transform(element.attrib["transform"])
+        tag = element.tag.rsplit("}", 1)[-1] if isinstance(element.tag, str) else None
+        if tag in shapes:
+            shapes[tag].append((matrix, inherited))
+        if class_rules is not None and len(element):
+            inherited = svg_element_properties(element.attrib, class_rules, inherited)
+        for child in element:
+            walk(child, matrix, inherited)
+
+    walk(root, base_matrix, {})
+    ordered = [shape for tag in SVG_SHAPE_TAGS for shape in shapes[tag]]
+    matrices = [matrix for matrix, _ in ordered]
+    if class_rules is None:
+        return matrices
+    return matrices, [inherited for _, inherited in ordered]
+
+
+def svg_matrix_scale(matrix):
+    """Largest stretch of a 3x3 affine matrix (canvas pixels per user unit along the worst direction)."""
+    return float(np.linalg.norm(matrix[:2, :2], 2))
+
+
+def transform_points(points, matrix):
+    """Maps (N, 2) points through a 3x3 affine matrix in one NumPy pass."""
+    return points @ matrix[:2, :2].T + matrix[:2, 2]
+
+
+def group_subpaths_by_style(subpaths, styles, line_color, line_width):
+    """
+    Groups subpaths by their resolved (colour, width), filling unset values from the defaults.
+
+    Returns:
+        dict: (color tuple, width int) -> list of (points, closed), in first-seen order.
+    """
+    default = (tuple(line_color), int(line_width))
+    if styles is None:
+        return {default: list(subpaths)}
+    groups = {}
+    for subpath, (color, width) in zip(subpaths, styles):
+        key = (color or default[0], width or default[1])
+        groups.setdefault(key, []).append(subpath)
+    return groups
+
+
+def svg_to_subpaths(svg_path, num_steps=25, tolerance=None, with_styles=False, canvas_size=None):
+    """
+    Parses an SVG file and flattens every path (see path_to_subpaths).
+
+    Each path is sampled in its own user space and its points are then
+    mapped to canvas pixels with one composed affine (viewBox -> canvas and
+    every group/element transform, see svg_shape_matrices), applied to the
+    whole sampled array at once. Points stay float, so drawing is sub-pixel.
+
+    Args:
+        svg_path (str or bytes): Path to the input SVG file, or the SVG document itself.
+        num_steps (int): Number of points to sample along curves/arcs.
+        tolerance (float, optional): Adaptive flattening tolerance in output pixels.
+        with_styles (bool): Also return each subpath's stroke style (see svg_path_style).
+        canvas_size (tuple, optional): (width, height) to fit the viewBox into; None keeps
+                                       one user unit per pixel (transforms still apply).
+
+    Returns:
+        list: (points (N, 2) float64, closed bool) per subpath, or None if the SVG can't be read.
+              With with_styles, a tuple (subpaths, styles) with one (color, width) per subpath.
+    """
+    _require_svgpathtools()
+    in_memory = isinstance(svg_path, (bytes, bytearray))
+    source_name = "<in-memory SVG>" if in_memory else svg_path
+    try:
+        log.debug("Parsing SVG file '%s'...", source_name)
+        # svg2paths and ElementTree each read the document, so bytes get a fresh stream per parser
+        with stage("parse_svg"):
+            paths, attributes = svg2paths(io.BytesIO(svg_path) if in_memory else svg_path)
+            root = ET.parse(io.BytesIO(svg_path) if in_memory else svg_path).getroot()
+        log.info("Found %d paths in the SVG.", len(paths))
+    except Exception as e:
+        log.error("Could not parse SVG file '%s': %s", source_name, e)
+        return None
+
+    base_matrix = svg_viewport_matrix(root.attrib, canvas_size) if canvas_size else np.eye(3)
+    class_rules = read_svg_class_rules(svg_path, root) if with_styles else {}
+    if with_styles:
+        matrices, inherited_styles = svg_shape_matrices(root, base_matrix, class_rules)
+    else:
+        matrices = svg_shape_matrices(root, base_matrix)
+    if len(matrices) != len(paths):
+        # Prefixed (svg:path) elements are missed by svg2paths; transforms can't be matched up
+        log.warning("Could not match SVG transforms to paths; applying only the viewBox mapping.")
+        matrices = [base_matrix] * len(paths)
+        inherited_styles = [{}] * len(paths)
+    subpaths = []
+    styles = []
+    drawn_paths = 0
+    total_points = 0
+    debug = log.isEnabledFor(logging.DEBUG) # Checked once, not per path
+    with stage("flatten"):
+        for path_index, (path, path_attributes, matrix) in enumerate(zip(paths, attributes, matrices)):
+            if debug:
+                log.debug("Processing Path %d/%d", path_index + 1, len(paths))
             if not path: continue
 
-            points_in_current_subpath = []
-            start_of_current_subpath = None
+            drawn_paths += 1
+            scale = svg_matrix_scale(matrix)
+            path_subpaths = path_to_subpaths(path, num_steps, tolerance, scale)
+            if not np.array_equal(matrix, np.eye(3)):
+                # One matrix product for the whole path, then split back into subpaths
+                sampled = [points for points, _ in path_subpaths]
+                transformed = transform_points(np.concatenate(sampled), matrix)
+                splits = np.cumsum([len(points) for points in sampled])[:-1]
+                path_subpaths = [(points, closed) for points, (_, closed)
+                                 in zip(np.split(transformed, splits), path_subpaths)]
+            subpaths.extend(path_subpaths)
+            if with_styles:
+                style = svg_path_style(path_attributes, class_rules, scale, inherited_styles[path_index])
+                styles.extend([style] * len(path_subpaths))
+            total_points += sum(len(points) for points, _ in path_subpaths)
 
-            for segment_index, segment in enumerate(path):
-                if not points_in_current_subpath:
-                    if hasattr(segment, 'start'):
-                         current_point = segment.start
-                    else:
-                         print(f"Warning: Cannot determine start point for segment type {type(segment)} at index {segment_index} in Path {path_index+1}")
-                         continue
+    mode = f"tolerance={tolerance}px" if tolerance is not None else f"num_steps={num_steps}"
+    points_per_path = total_points / drawn_paths if drawn_paths else 0.0
+    log.info("Flattened %d paths into %d points (%.1f points/path, %s).",
+             drawn_paths, total_points, points_per_path, mode)
+    if with_styles:
+        return subpaths, styles
+    return subpaths
 
-                    start_of_current_subpath = current_point
-                    points_in_current_subpath.append((int(current_point.real), int(current_point.imag)))
 
-                if isinstance(segment, Line):
-                    points_in_current_subpath.append((int(segment.end.real), int(segment.end.imag)))
-                elif isinstance(segment, (Arc, CubicBezier, QuadraticBezier)):
-                    for i in range(1, num_steps + 1):
-                        t = i / num_steps
-                        p = segment.point(t)
-                        points_in_current_subpath.append((int(p.real), int(p.imag)))
-                elif isinstance(segment, Close):
-                     if start_of_current_subpath is not None:
-                         points_in_current_subpath.append((int(start_of_current_subpath.real), int(start_of_current_subpath.imag)))
+def circle_subpath(size, line_width, num_points=256):
+    """
+    Returns the test circle of create_neon_circle as a closed polyline.
 
-                     if len(points_in_current_subpath) > 1:
-                         draw.line(points_in_current_subpath, fill=color, width=line_width) # Use parameters
+    Returns:
+        tuple: (points (num_points, 2) float64, True)
+    """
+    circle_radius = max(10, min(size[0], size[1]) // 2 - (line_width * 2))
+    angle = np.linspace(0, 2 * np.pi, num_points, endpoint=False)
+    center = (size[0] // 2, size[1] // 2)
+    return np.column_stack((center[0] + circle_radius * np.cos(angle),
+                            center[1] + circle_radius * np.sin(angle))), True
 
-                     points_in_current_subpath = []
-                     start_of_current_subpath = None
 
-            if len(points_in_current_subpath) > 1:
-                draw.line(points_in_current_subpath, fill=color, width=line_width) # Use parameters
+# ==============================================================================
+# === apply_neon_to_svg function with Parameterization ===
+# ==============================================================================
+def apply_neon_to_svg(svg_path, output_path, canvas_size=(400, 400), num_steps=25,
+                      line_color="0,255,255", # Cyan
+                      line_width=3,
+                      glow_radius=8,
+                      glow_alpha=0.6,
+                      glow_engine="cv2",
+                      glow_layers=None,
+                      tolerance=None,
+                      autofit=False,
+                      svg_styles=True,
+                      fit_viewbox=True,
+                      quality="normal"):
+    """
+    Apply neon effects to SVG paths by discretizing segments and drawing them.
+
+    Curves are sampled in batch (see path_to_subpaths), mapped to the canvas
+    through the viewBox and group transforms (see svg_to_subpaths), and every
+    subpath is drawn as one sub-pixel polyline, closed subpaths as closed loops. With svg_styles,
+    each path takes its tube colour and width from its SVG stroke and
+    stroke-width (attribute, inline style or <style> class rule); paths
+    without them use line_color/line_width.
 
-        print(f"DEBUG: Applying glow effect (radius={glow_radius}, alpha={glow_alpha})...")
-        blurred_img = img.filter(ImageFilter.GaussianBlur(radius=glow_radius)) # Use parameter
-        final_img = Image.blend(img, blurred_img, alpha=glow_alpha) # Use parameter
+    Args:
+        svg_path (str): Path to the input SVG file.
+        output_path (str): Path to save the output PNG image.
+        canvas_size (tuple): (width, height) of the output image.
+        num_steps (int): Number of points to sample along curves/arcs.
+        line_color (str/tuple): Color for the neon tube.
+        line_width (int): Width/thickness of the neon tube.
+        glow_radius (int): Radius for the Gaussian blur glow effect.
+        glow_alpha (float): Blending alpha for the glow (0=sharp, 1=blur).
+        glow_engine (str): 'cv2' (NumPy/OpenCV compositor) or 'pil' (original blur-and-blend).
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        tolerance (float, optional): Adaptive flattening: max deviation from the true curve in
+                                     output pixels. Overrides num_steps when given.
+        autofit (bool): Size the canvas to the paths' bounding box plus the glow margin
+                        instead of canvas_size (nothing outside canvas_size is clipped).
+        svg_styles (bool): Use the SVG's per-path stroke colour and width.
+        fit_viewbox (bool): Scale the SVG's viewBox (or width/height) to canvas_size; False
+                            draws one user unit per pixel. Group transforms apply either way.
+        quality (str): 'draft', 'normal' or 'high' (see quality_draw_options and apply_glow_to_array).
 
-        output_dir = os.path.dirname(output_path)
-        if output_dir:
-             os.makedirs(output_dir, exist_ok=True)
+    Returns:
+        bool: True if the image was written, False if the SVG couldn't be read or rendering failed.
+    """
+    parsed = svg_to_subpaths(svg_path, num_steps, tolerance, with_styles=svg_styles,
+                             canvas_size=canvas_size if fit_viewbox else None)
+    if parsed is None:
+        return False
+    subpaths, styles = parsed if svg_styles else (parsed, None)
 
-        print(f"DEBUG: Saving final image to {output_path}...")
-        final_img.save(output_path)
-        print(f"Saved neon SVG visualization to {output_path}")
+    try:
+        color = parse_color(line_color, (0, 255, 255)) # Default cyan
+        log.debug("Drawing and applying glow effect (color=%s, width=%s, radius=%s, alpha=%s)...",
+                  color, line_width, glow_radius, glow_alpha)
+        if not apply_neon_to_subpaths(subpaths, output_path, canvas_size,
+                                      line_color=color, line_width=line_width, glow_radius=glow_radius,
+                                      glow_alpha=glow_alpha, glow_engine=glow_engine, glow_layers=glow_layers,
+                                      autofit=autofit, styles=styles, quality=quality):
+            return False
+        log.info("Saved neon SVG visualization to %s", output_path)
+        return True
 
     except Exception as e:
-        print(f"Error processing or saving neon SVG image for {svg_path}: {e}")
+        log.error("Could not process or save the neon SVG image for %s: %s", svg_path, e)
+        return False
 
 # ==============================================================================
@@ -0,0 +1,317 @@
+# render_cache.py
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+from contour_format import CONTOUR_FILE_EXTENSION, load_contours, pack_contours, write_packed_contours
+
+# Bump whenever a change to detection or rendering changes the output pixels,
+# so stale cache entries stop matching. Edits to the modules below change the
+# keys on their own (see engine_fingerprint); the version covers the rest.
+RENDER_ENGINE_VERSION = "4"
+
+# Modules whose code decides the detected contours and the rendered pixels
+RENDERING_MODULES = ("contour_detection.py", "input_handlers.py", "glyph_outlines.py", "neon_styling.py",
+                     "glow_engine.py", "tiled_render.py", "vector_export.py", "neon_animation.py")
+
+DEFAULT_CACHE_MAX_MB = 512
+
+STATS_FILE = "stats.log"
+
+
+def _hash_file(path, hasher):
+    """Feeds the bytes of a file into `hasher` in chunks."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+
+
+@functools.lru_cache(maxsize=None)
+def engine_fingerprint():
+    """
+    Identifies the rendering code: RENDER_ENGINE_VERSION plus a hash of the
+    source of RENDERING_MODULES, so a cache never serves renders made by
+    other code even when nobody remembered to bump the version.
+
+    Returns:
+        str: e.g. '4:1f2e3d4c5b6a7988'.
+    """
+    hasher = hashlib.sha256()
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in RENDERING_MODULES:
+        path = os.path.join(module_dir, name)
+        hasher.update(name.encode())
+        if os.path.isfile(path):
+            _hash_file(path, hasher)
+    return f"{RENDER_ENGINE_VERSION}:{hasher.hexdigest()[:16]}"
+
+
+def make_source_key(input_path=None, text=None, font_path=None, font_size=None,
+                    canvas_size=None, page=None, dpi=None, extra=None):
+    """
+    Builds the cache key for the contours extracted from an input.
+
+    The key covers the input content (not its name or mtime), the text
+    override, the font file content and every parameter that changes the
+    detected contours, plus the engine_fingerprint().
+
+    Args:
+        input_path (str, optional): Input file whose bytes are hashed.
+        text (str, optional): Direct text or text override.
+        font_path (str, optional): Font file whose bytes are hashed if it exists.
+        font_size (int, optional): Font size for text rendering.
+        canvas_size (tuple, optional): (width, height) of the canvas.
+        page (int, optional): PDF page number.
+        dpi (int, optional): PDF rasterisation resolution.
+        extra (dict, optional): Any other options that change the geometry (e.g. flattening tolerance).
+
+    Returns:
+        str: Hex digest.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"engine={engine_fingerprint()}\n".encode())
+    if input_path is not None and os.path.isfile(input_path):
+        hasher.update(os.path.splitext(input_path)[1].lower().encode())
+        _hash_file(input_path, hasher)
+    elif input_path is not None:
+        hasher.update(f"input={input_path.lower()}\n".encode())
+    if text is not None:
+        hasher.update(f"text={text}\n".encode('utf-8'))
+    if font_path and os.path.isfile(font_path):
+        _hash_file(font_path, hasher)
+    else:
+        hasher.update(f"font={font_path}\n".encode())
+    hasher.update(f"fontsize={font_size}|canvas={canvas_size}|page={page}|dpi={dpi}\n".encode())
+    if extra:
+        hasher.update(json.dumps(extra, sort_keys=True, default=str).encode())
+    return hasher.hexdigest()
+
+
+def make_render_key(source_key, style_params):
+    """
+    Builds the cache key for a final rendered image.
+
+    Args:
+        source_key (str): Key from make_source_key().
+        style_params (dict): Styling keyword arguments passed to neon_styling.
+
+    Returns:
+        str: Hex digest.
+    """
+    style_json = json.dumps(style_params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{source_key}|{style_json}".encode()).hexdigest()
+
+
+class RenderCache:
+    """
+    On-disk cache of extracted contours and final neon PNGs.
+
+    Entries are plain files under `cache_dir` (images/<key>.png and
+    contours/<key>.ncf), written atomically so several batch workers can share
+    one cache. A hit refreshes the entry's mtime; when the cache grows past
+    `max_bytes` the least recently used entries are deleted.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.images_dir = os.path.join(cache_dir, "images")
+        self.contours_dir = os.path.join(cache_dir, "contours")
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.contours_dir, exist_ok=True)
+
+    # --- Stats ---
+    def _record(self, kind, hit, size=0):
+        # One short O_APPEND write per lookup, safe enough across processes
+        line = f"{kind} {'hit' if hit else 'miss'} {size}\n"
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), 'a', encoding='utf-8') as f:
+                f.write(line)
+        except OSError:
+            pass
+
+    def stats(self):
+        """
+        Returns hit/miss counts, hit rates, bytes served from cache and current size.
+
+        Returns:
+            dict: Aggregated statistics.
+        """
+        counts = {"image": [0, 0], "contours": [0, 0]}
+        bytes_saved = 0
+        stats_path = os.path.join(self.cache_dir, STATS_FILE)
+        if os.path.exists(stats_path):
+            with open(stats_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) != 3 or parts[0] not in counts:
+                        continue
+                    counts[parts[0]][0 if parts[1] == "hit" else 1] += 1
+                    if parts[1] == "hit":
+                        bytes_saved += int(parts[2])
+
+        result = {"bytes_saved": bytes_saved}
+        for kind, (hits, misses) in counts.items():
+            lookups = hits + misses
+            result[f"{kind}_hits"] = hits
+            result[f"{kind}_misses"] = misses
+            result[f"{kind}_hit_rate"] = hits / lookups if lookups else 0.0
+        entries = self._entries()
+        result["entries"] = len(entries)
+        result["size_bytes"] = sum(size for _, size, _ in entries)
+        result["max_bytes"] = self.max_bytes
+        return result
+
+    # --- Storage helpers ---
+    def _entries(self):
+        entries = []
+        for folder in (self.images_dir, self.contours_dir):
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue # Removed by another process
+                entries.append((path, st.st_size, st.st_mtime))
+        return entries
+
+    def _atomic_write(self, final_path, write_func, suffix):
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(final_path), suffix=suffix + ".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write_func(f)
+            os.replace(temp_path, final_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def _touch(self, path):
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Deletes least recently used entries until the cache fits in max_bytes."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+            if path.endswith(".tmp"):
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        """Removes every entry and the stats log."""
+        shutil.rmtree(self.images_dir, ignore_errors=True)
+        shutil.rmtree(self.contours_dir, ignore_errors=True)
+        stats_path = os.path.join(self.cache_dir, STATS_FILE)
+        if os.path.exists(stats_path):
+            os.remove(stats_path)
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.contours_dir, exist_ok=True)
+
+    # --- Final images ---
+    def fetch_image(self, render_key, output_path):
+        """
+        Copies a cached PNG to output_path.
+
+        Returns:
+            bool: True on a cache hit.
+        """
+        cached_path = os.path.join(self.images_dir, f"{render_key}.png")
+        try:
+            shutil.copyfile(cached_path, output_path)
+        except OSError:
+            self._record("image", False)
+            return False
+        self._touch(cached_path)
+        self._record("image", True, os.path.getsize(cached_path))
+        return True
+
+    def store_image(self, render_key, image_path):
+        """Stores a rendered PNG under render_key (ignored if the render wrote nothing)."""
+        if not os.path.isfile(image_path):
+            return
+        final_path = os.path.join(self.images_dir, f"{render_key}.png")
+
+        def write(f):
+            with open(image_path, 'rb') as src:
+                shutil.copyfileobj(src, f)
+        self._atomic_write(final_path, write, ".png")
+
+    # --- Contours ---
+    def fetch_contours(self, source_key):
+        """
+        Loads cached contours.
+
+        Returns:
+            tuple: (list of contours, tuple image_size) or None on a cache miss.
+        """
+        cached_path = os.path.join(self.contours_dir, f"{source_key}{CONTOUR_FILE_EXTENSION}")
+        try:
+            contours, image_size = load_contours(cached_path)
+        except (OSError, ValueError):
+            self._record("contours", False)
+            return None
+        self._touch(cached_path)
+        self._record("contours", True, os.path.getsize(cached_path))
+        return contours, image_size
+
+    def store_contours(self, source_key, contours, image_size):
+        """Stores contours (OpenCV format) and the canvas size they belong to."""
+        if contours is None or image_size is None:
+            return
+        points, offsets = pack_contours(contours)
+        final_path = os.path.join(self.contours_dir, f"{source_key}{CONTOUR_FILE_EXTENSION}")
+        self._atomic_write(final_path, lambda f: write_packed_contours(f, points, offsets, image_size),
+                           CONTOUR_FILE_EXTENSION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the neon render cache.")
+    parser.add_argument("command", choices=["stats", "clear"], help="'stats' prints hit rates, 'clear' empties the cache.")
+    parser.add_argument("cache_dir", help="Cache directory (the --cachedir given to apply_neon.py).")
+    parser.add_argument("--json", action="store_true", help="Print stats as JSON.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.cache_dir):
+        print(f"Error: Cache directory '{args.cache_dir}' not found.")
+        sys.exit(1)
+
+    cache = RenderCache(args.cache_dir)
+    if args.command == "clear":
+        cache.clear()
+        print(f"Cleared cache at {args.cache_dir}")
+        return
+
+    stats = cache.stats()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return
+    print(f"Cache: {args.cache_dir}")
+    print(f"Entries: {stats['entries']}  Size: {stats['size_bytes'] / 1e6:.2f} MB")
+    print(f"Images:   {stats['image_hits']} hits / {stats['image_misses']} misses "
+          f"({stats['image_hit_rate']:.1%} hit rate)")
+    print(f"Contours: {stats['contours_hits']} hits / {stats['contours_misses']} misses "
+          f"({stats['contours_hit_rate']:.1%} hit rate)")
+    print(f"Bytes served from cache: {stats['bytes_saved'] / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
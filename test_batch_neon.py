@@ -0,0 +1,46 @@
+# test_batch_neon.py
+
+# Every job must get its own output, named so it can be traced back to its input,
+# and a failing job must not stop the batch while Ctrl+C still does.
+import os
+
+import pytest
+
+import batch_neon
+from batch_neon import assign_output_paths, run_job
+
+
+def test_output_names_keep_the_input_extension():
+    jobs = [("example.pdf", None), ("example.png", None), ("signs/example.svg", None), ("circle", None)]
+    assert [output for _, output in assign_output_paths(jobs, "out")] == [
+        os.path.join("out", "example_pdf_neon.png"), os.path.join("out", "example_png_neon.png"),
+        os.path.join("out", "example_svg_neon.png"), os.path.join("out", "circle_neon.png")]
+
+
+def test_output_names_never_collide():
+    jobs = [("a/sign.svg", None), ("b/sign.svg", None), ("x.png", "sign_svg_neon.png"),
+            ("y.png", "sign_svg_neon.png"), ("z.png", os.path.abspath("abs.png"))]
+    outputs = [output for _, output in assign_output_paths(jobs, "out")]
+    assert len(set(outputs)) == len(jobs)
+    # Explicit paths are claimed before generated names, in job order
+    assert outputs[2] == os.path.join("out", "sign_svg_neon.png")
+    assert outputs[3] == os.path.join("out", "sign_svg_neon_1.png")
+    assert outputs[4] == os.path.abspath("abs.png")
+
+
+@pytest.mark.parametrize("error", [RuntimeError("boom"), SystemExit(2)])
+def test_failed_job_is_reported(monkeypatch, error):
+    def failing_render(*args):
+        raise error
+    monkeypatch.setattr(batch_neon, "render_input", failing_render)
+    _, _, success, message, _ = run_job("circle", "out.png", None)
+    assert not success
+    assert message.startswith(type(error).__name__)
+
+
+def test_ctrl_c_is_not_swallowed(monkeypatch):
+    def interrupted_render(*args):
+        raise KeyboardInterrupt
+    monkeypatch.setattr(batch_neon, "render_input", interrupted_render)
+    with pytest.raises(KeyboardInterrupt):
+        run_job("circle", "out.png", None)
@@ -0,0 +1,53 @@
+# test_contour_format.py
+
+# Contours must survive a save/load round trip unchanged, and damaged files must be
+# refused with a ValueError rather than read as garbage.
+import numpy as np
+import pytest
+
+from contour_format import CONTOUR_FILE_MAGIC, load_contours, save_contours
+
+
+@pytest.fixture
+def shapes(contours):
+    """The shared contours plus a single-point one."""
+    return contours + [np.array([[[5, 5]]], dtype=np.int32)]
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("dtype", [np.int32, np.float32])
+def test_round_trip(tmp_path, shapes, image_size, dtype, mmap):
+    contours = [(contour + 0.25).astype(dtype) if dtype is np.float32 else contour for contour in shapes]
+    path = str(tmp_path / "shapes.ncf")
+    save_contours(path, contours, image_size, dtype=dtype)
+
+    loaded, loaded_size = load_contours(path, mmap=mmap)
+    assert loaded_size == image_size
+    assert len(loaded) == len(contours)
+    for original, contour in zip(contours, loaded):
+        assert contour.dtype == np.dtype(dtype)
+        assert contour.shape == original.shape
+        np.testing.assert_array_equal(contour, original)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_round_trip_without_contours(tmp_path, image_size, mmap):
+    path = str(tmp_path / "empty.ncf")
+    save_contours(path, [], image_size)
+    assert load_contours(path, mmap=mmap) == ([], image_size)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_contours.ncf"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(64))
+    with pytest.raises(ValueError, match="not a neon contour file"):
+        load_contours(str(path))
+
+
+@pytest.mark.parametrize("keep_bytes, message", [(len(CONTOUR_FILE_MAGIC), "too short"), (-4, "truncated")])
+def test_rejects_truncated_files(tmp_path, shapes, image_size, keep_bytes, message):
+    path = tmp_path / "shapes.ncf"
+    save_contours(str(path), shapes, image_size)
+    path.write_bytes(path.read_bytes()[:keep_bytes]) # Cut into the header, or into the points
+    with pytest.raises(ValueError, match=message):
+        load_contours(str(path))
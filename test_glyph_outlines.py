@@ -0,0 +1,101 @@
+# test_glyph_outlines.py
+
+# Outline text needs a real font: glyphs come straight from its outlines with its
+# kerning applied, and a font that can't be read is reported up front.
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("fontTools")
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import newTable
+from fontTools.ttLib.tables._k_e_r_n import KernTable_format_0
+
+from glyph_outlines import DEFAULT_FONT_PATH, get_outlines_from_text, layout_text, outline_font_error
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+UNITS_PER_EM = 1000
+ADVANCE = 600
+KERN_AV = -200
+
+
+def boxes_glyph(*boxes):
+    pen = TTGlyphPen(None)
+    for left, bottom, right, top in boxes:
+        pen.moveTo((left, bottom))
+        pen.lineTo((left, top))
+        pen.lineTo((right, top))
+        pen.lineTo((right, bottom))
+        pen.closePath()
+    return pen.glyph()
+
+
+def build_font(path, kerning=True):
+    """Writes a small TrueType font: 'A' (one box), 'V' (two boxes), space, and an A/V kerning pair."""
+    builder = FontBuilder(UNITS_PER_EM, isTTF=True)
+    builder.setupGlyphOrder([".notdef", "space", "A", "V"])
+    builder.setupCharacterMap({ord(" "): "space", ord("A"): "A", ord("V"): "V"})
+    builder.setupGlyf({".notdef": boxes_glyph(), "space": boxes_glyph(), "A": boxes_glyph((50, 0, 550, 700)),
+                       "V": boxes_glyph((50, 0, 250, 700), (350, 0, 550, 700))})
+    builder.setupHorizontalMetrics({name: (ADVANCE, 0) for name in (".notdef", "space", "A", "V")})
+    builder.setupHorizontalHeader(ascent=800, descent=-200)
+    builder.setupNameTable({"familyName": "Neon Test", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    if kerning:
+        kern = newTable("kern")
+        kern.version = 0
+        table = KernTable_format_0()
+        table.coverage, table.format, table.kernTable = 1, 0, {("A", "V"): KERN_AV}
+        kern.kernTables = [table]
+        builder.font["kern"] = kern
+    builder.save(path)
+    return path
+
+
+@pytest.fixture
+def font_path(tmp_path):
+    return build_font(str(tmp_path / "neon_test.ttf"))
+
+
+def test_outlines_come_from_the_font(font_path):
+    subpaths, image_size = get_outlines_from_text("AV A", font_path=font_path, font_size=100, image_size=(500, 200))
+    assert image_size == (500, 200)
+    assert len(subpaths) == 4 # A, the two boxes of V, A; the space has no outline
+    assert all(closed for _, closed in subpaths)
+    first = subpaths[0][0]
+    # The A box is 500x700 font units: 50x70 px at 100 px per em
+    assert first[:, 0].max() - first[:, 0].min() == pytest.approx(50)
+    assert first[:, 1].max() - first[:, 1].min() == pytest.approx(70)
+
+
+def test_kerning_pairs_are_applied(font_path, tmp_path):
+    plain_path = build_font(str(tmp_path / "plain.ttf"), kerning=False)
+    kerned = {name: x for name, x, _ in layout_text("AV", font_path, 100)}
+    plain = {name: x for name, x, _ in layout_text("AV", plain_path, 100)}
+    assert plain["V"] - plain["A"] == pytest.approx(ADVANCE / 10)
+    assert kerned["V"] - kerned["A"] == pytest.approx((ADVANCE + KERN_AV) / 10)
+    # Only the pair is kerned: "VA" keeps its full advance
+    reversed_pair = {name: x for name, x, _ in layout_text("VA", font_path, 100)}
+    assert reversed_pair["A"] - reversed_pair["V"] == pytest.approx(ADVANCE / 10)
+
+
+def test_unreadable_font_is_reported(font_path, tmp_path):
+    assert outline_font_error(font_path) is None
+    placeholder = tmp_path / "placeholder.ttf"
+    placeholder.write_text("not a font")
+    for path in (str(placeholder), str(tmp_path / "missing.ttf")):
+        assert path in outline_font_error(path)
+
+
+@pytest.mark.skipif(outline_font_error() is None, reason="the default font is a real font")
+def test_cli_stops_without_a_usable_font(tmp_path):
+    command = [sys.executable, os.path.join(HERE, "apply_neon.py"), os.path.join(HERE, "example.txt"),
+               str(tmp_path / "out.png"), "--textmode", "outline"]
+    result = subprocess.run(command, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert DEFAULT_FONT_PATH in result.stderr
+    assert not (tmp_path / "out.png").exists()
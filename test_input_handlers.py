@@ -1,32 +1,138 @@
+# test_input_handlers.py
+
+# Contour extraction from the sample PNG, PDF and text inputs, and PDF pages streamed
+# from a rasteriser running a bounded distance ahead.
 import os
-from input_handlers import parse_svg, pdf_to_images, png_to_contours, text_to_image
+import threading
+import time
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import input_handlers
+from input_handlers import (PDF_LOOKAHEAD_PAGES, get_contours_from_image, get_contours_from_pdf,
+                            get_contours_from_text, iter_pdf_pages, png_to_contours, simplify_contours)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PNG_FILE = os.path.join(HERE, "example.png")
+PDF_FILE = os.path.join(HERE, "example.pdf")
+FONT_FILE = os.path.join(HERE, "arial.ttf")
+
+
+class FakePdf2image:
+    """Stands in for pdf2image: writes each page as a tiny image whose pixels are its page number."""
+
+    def __init__(self, n_pages, fail_from_page=None):
+        self.n_pages = n_pages
+        self.fail_from_page = fail_from_page
+        self.runs = [] # (first_page, last_page) per convert_from_path call
+        self.max_files = 0 # Most page files on disk at once
+        self.threads = set() # Threads that called convert_from_path
+
+    def pdfinfo_from_path(self, pdf_path):
+        return {"Pages": self.n_pages}
+
+    def convert_from_path(self, pdf_path, dpi, output_folder, first_page, last_page, output_file, paths_only):
+        if self.fail_from_page is not None and last_page >= self.fail_from_page:
+            raise RuntimeError("pdftoppm crashed")
+        self.runs.append((first_page, last_page))
+        self.threads.add(threading.current_thread())
+        for page in range(first_page, last_page + 1):
+            Image.new("L", (4, 4), page).save(os.path.join(output_folder, f"{output_file}-{page:02d}.png"))
+        self.max_files = max(self.max_files, len(os.listdir(output_folder)))
+        return []
+
+
+@pytest.fixture
+def fake_pdf2image(monkeypatch):
+    def install(n_pages, fail_from_page=None):
+        fake = FakePdf2image(n_pages, fail_from_page)
+        monkeypatch.setattr(input_handlers, "load_pdf2image", lambda: fake)
+        return fake
+    return install
+
+
+def assert_same_contours(contours_a, contours_b):
+    assert len(contours_a) == len(contours_b)
+    for a, b in zip(contours_a, contours_b):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_png_to_contours():
+    contours = png_to_contours(PNG_FILE)
+    assert contours
+    assert all(contour.ndim == 3 and contour.shape[1:] == (1, 2) for contour in contours)
+
+
+def test_contours_from_path_bytes_and_array_agree():
+    from_path, image_size = get_contours_from_image(PNG_FILE, return_size=True)
+    with open(PNG_FILE, "rb") as f:
+        from_bytes = get_contours_from_image(f.read())
+    image = cv2.cvtColor(cv2.imread(PNG_FILE, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+    from_array = get_contours_from_image(image)
+    assert image_size == (image.shape[1], image.shape[0])
+    assert_same_contours(from_bytes, from_path)
+    assert_same_contours(from_array, from_path)
+
+
+def test_unreadable_image_returns_none(tmp_path):
+    missing = str(tmp_path / "missing.png")
+    assert get_contours_from_image(missing) is None
+
+
+def test_text_to_contours():
+    contours, image_size = get_contours_from_text("Hello Neon", FONT_FILE)
+    assert contours
+    assert image_size == (400, 400)
+
+
+def test_simplify_contours_drops_small_contours():
+    contours = get_contours_from_image(PNG_FILE)
+    simplified = simplify_contours(contours, epsilon=1.0)
+    assert 0 < len(simplified) <= len(contours)
+    assert sum(len(c) for c in simplified) <= sum(len(c) for c in contours)
+    assert simplify_contours(contours, min_area=1e12) == []
+
+
+def test_pdf_to_contours():
+    pytest.importorskip("pdf2image")
+    contours, image_size = get_contours_from_pdf(PDF_FILE)
+    if contours is None:
+        pytest.skip("PDF could not be rasterised (is poppler installed?)")
+    assert contours
+    assert image_size[0] > 0 and image_size[1] > 0
 
-# Sample files
-SVG_FILE = 'example.svg'
-PDF_FILE = 'example.pdf'
-PNG_FILE = 'example.png'
-FONT_FILE = 'arial.ttf'
 
-# Output directories
-OUTPUT_DIR_PDF = './output_images'
-OUTPUT_TEXT_IMAGE = 'output_text.png'
+def test_pdf_pages_come_in_order(fake_pdf2image):
+    fake = fake_pdf2image(11)
+    pages = [(page_num, image.getpixel((0, 0))) for page_num, image in iter_pdf_pages("sign.pdf", first_page=1)]
+    assert pages == [(page_num, page_num + 1) for page_num in range(1, 11)]
+    assert fake.runs[0] == (2, 1 + PDF_LOOKAHEAD_PAGES)
+    assert fake.max_files <= 2 * PDF_LOOKAHEAD_PAGES
 
-# Ensure output directories exist
-if not os.path.exists(OUTPUT_DIR_PDF):
-    os.makedirs(OUTPUT_DIR_PDF)
 
-# Test SVG parsing
-print("Testing SVG parsing...")
-parse_svg(SVG_FILE)
+def test_pdf_rasteriser_waits_for_the_caller(fake_pdf2image):
+    fake = fake_pdf2image(30)
+    pages = iter_pdf_pages("sign.pdf", paths_only=True, poll_interval=0.01)
+    page_num, page_path = next(pages)
+    assert page_num == 0 and os.path.exists(page_path)
+    time.sleep(0.3) # Plenty of time for an unbounded rasteriser to reach the end
+    assert fake.runs[-1][1] == 2 * PDF_LOOKAHEAD_PAGES
 
-# Test PDF to images conversion
-print("\nTesting PDF to images conversion...")
-pdf_to_images(PDF_FILE, OUTPUT_DIR_PDF)
+    # Closing early stops the thread and removes the rasterised pages
+    pages.close()
+    assert fake.runs[-1][1] == 2 * PDF_LOOKAHEAD_PAGES
+    assert not os.path.exists(os.path.dirname(page_path))
+    assert not any(thread.is_alive() for thread in fake.threads)
 
-# Test PNG contour detection
-print("\nTesting PNG contour detection...")
-png_to_contours(PNG_FILE)
 
-# Test text rendering to image
-print("\nTesting text rendering to image...")
-text_to_image('Hello Neon', FONT_FILE, OUTPUT_TEXT_IMAGE)
+def test_pdf_rasteriser_error_ends_the_pages(fake_pdf2image, monkeypatch):
+    errors = []
+    monkeypatch.setattr(input_handlers.log, "error", lambda message, *args: errors.append(message % args))
+    fake_pdf2image(10, fail_from_page=PDF_LOOKAHEAD_PAGES + 1)
+    pages = [page_num for page_num, _ in iter_pdf_pages("sign.pdf", paths_only=True, poll_interval=0.01)]
+    assert pages == list(range(PDF_LOOKAHEAD_PAGES))
+    assert any("pdftoppm crashed" in error for error in errors)
@@ -0,0 +1,68 @@
+# test_neon_animation.py
+
+# Animated output: every format gets the whole clip, a fully lit frame is the still image,
+# each tube dims only its own light, and failures are reported.
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+
+from neon_animation import (MAX_ANIMATION_GROUPS, animation_group_count, apply_neon_animation, compose_frames,
+                            flicker_curves, group_contours, group_weights)
+from neon_styling import apply_neon_effect
+
+CONTOURS = [np.array([[[10 + 20 * i, 10]], [[10 + 20 * i, 90]]], dtype=np.int32) for i in range(4)]
+
+
+@pytest.mark.parametrize("extension", [".gif", ".png", ".webp"])
+@pytest.mark.parametrize("mode", ["flicker", "trace"])
+def test_writes_whole_clip(tmp_path, extension, mode):
+    output_path = str(tmp_path / f"sign{extension}")
+    assert apply_neon_animation(CONTOURS, output_path, image_size=(100, 100), mode=mode, n_frames=5, fps=20)
+    with Image.open(output_path) as image:
+        assert image.size == (100, 100)
+        assert 1 < image.n_frames <= 5
+        if extension != ".webp": # Pillow doesn't report WebP frame durations
+            # Identical consecutive frames are merged and their durations added up
+            assert sum(frame.info["duration"] for frame in ImageSequence.Iterator(image)) == 5 * 50
+
+
+def test_lit_frame_is_the_still(tmp_path):
+    still_path, animation_path = str(tmp_path / "still.png"), str(tmp_path / "sign.png")
+    assert apply_neon_effect(CONTOURS, still_path, image_size=(100, 100))
+    # Power-on starts with every tube dimmed and ends with all of them lit
+    assert apply_neon_animation(CONTOURS, animation_path, image_size=(100, 100), mode="poweron", n_frames=12)
+    with Image.open(animation_path) as image:
+        frames = [np.asarray(frame.convert("RGB"), dtype=np.int32) for frame in ImageSequence.Iterator(image)]
+    with Image.open(still_path) as image:
+        still = np.asarray(image.convert("RGB"), dtype=np.int32)
+    assert frames[0].sum() < still.sum()
+    np.testing.assert_array_equal(frames[-1], still)
+
+
+def test_poweron_ends_lit():
+    curves = flicker_curves(5, 30, "poweron", seed=3)
+    assert np.all(curves[0] < 1.0)
+    assert np.all(curves[-10:] == 1.0)
+
+
+def test_dimming_a_tube_leaves_the_others_lit():
+    groups = group_contours(CONTOURS, False, len(CONTOURS))
+    weights = group_weights(groups, (100, 100), line_width=5, radius=4)
+    # Every pixel's light is shared out in full, up to rounding
+    assert np.abs(weights.sum(axis=0, dtype=np.int32) - 255).max() <= len(groups)
+    still = np.full((100, 100, 3), 200, dtype=np.uint8)
+    frame = next(compose_frames(still, weights, np.array([[0.0, 1.0, 1.0, 1.0]], dtype=np.float32)))
+    assert frame[50, 10].max() < 10 # On the first tube, now off
+    assert frame[50, 70].min() >= 198 # On the last tube, still lit
+
+
+def test_group_count_shrinks_with_canvas():
+    assert animation_group_count((400, 400)) == MAX_ANIMATION_GROUPS
+    assert 1 < animation_group_count((8000, 8000)) < MAX_ANIMATION_GROUPS
+    assert animation_group_count((100000, 100000)) == 1
+
+
+@pytest.mark.parametrize("extension", [".gif", ".png", ".webp"])
+def test_failure_returns_false(unwritable_path, extension):
+    output_path = unwritable_path(f"sign{extension}")
+    assert apply_neon_animation(CONTOURS, output_path, image_size=(100, 100), n_frames=3) is False
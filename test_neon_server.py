@@ -0,0 +1,64 @@
+# test_neon_server.py
+
+# Request bodies must be read exactly (so keep-alive connections stay in step), and
+# query options must never reach server paths or unbounded canvas sizes.
+import asyncio
+
+import pytest
+
+from neon_server import RequestError, build_request_parser, parse_render_options, read_http_request
+
+
+def read_request(raw):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_http_request(reader), await reader.read()
+    return asyncio.run(read())
+
+
+def test_reads_content_length_body():
+    (method, target, headers, body), rest = read_request(
+        b"POST /render/text HTTP/1.1\r\nContent-Length: 4\r\n\r\nOpenGET /health HTTP/1.1\r\n\r\n")
+    assert (method, target, body) == ("POST", "/render/text", b"Open")
+    assert rest == b"GET /health HTTP/1.1\r\n\r\n"
+
+
+def test_reads_chunked_body():
+    (_, _, _, body), rest = read_request(
+        b"POST /render/text HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"4;ext=1\r\nOpen\r\n4\r\n 24h\r\n0\r\nTrailer: x\r\n\r\nGET /health HTTP/1.1\r\n\r\n")
+    assert body == b"Open 24h"
+    assert rest == b"GET /health HTTP/1.1\r\n\r\n"
+
+
+@pytest.mark.parametrize("head, body, status", [
+    (b"Transfer-Encoding: gzip, chunked", b"", 501),
+    (b"Transfer-Encoding: chunked\r\nContent-Length: 3", b"0\r\n\r\n", 400),
+    (b"Transfer-Encoding: chunked", b"zz\r\nOpen\r\n0\r\n\r\n", 400),
+    (b"Transfer-Encoding: chunked", b"4\r\nOpenXX0\r\n\r\n", 400),
+])
+def test_rejects_bad_transfer_encoding(head, body, status):
+    with pytest.raises(RequestError) as error:
+        read_request(b"POST /render/text HTTP/1.1\r\n" + head + b"\r\n\r\n" + body)
+    assert error.value.status == status
+
+
+def test_text_uses_the_server_font():
+    parser = build_request_parser("/srv/fonts/sign.ttf")
+    assert parse_render_options(parser, "fontsize=80").font == "/srv/fonts/sign.ttf"
+    with pytest.raises(RequestError, match="font"):
+        parse_render_options(parser, "font=/etc/passwd")
+
+
+@pytest.mark.parametrize("query", ["width=100000", "height=0", "dpi=2000", "fontsize=5000", "glowradius=-1"])
+def test_rejects_out_of_range_options(query):
+    with pytest.raises(RequestError) as error:
+        parse_render_options(build_request_parser(), query)
+    assert error.value.status == 400
+
+
+def test_accepts_options_in_range():
+    args = parse_render_options(build_request_parser(), "width=8192&height=300&dpi=300&autofit")
+    assert (args.width, args.height, args.dpi, args.autofit) == (8192, 300, 300, True)
@@ -1,28 +1,178 @@
-# --- Start of test_neon_styling.py ---
-from neon_styling import create_neon_circle, apply_neon_effect, apply_neon_to_svg
-from input_handlers import png_to_contours
-import os # Good practice
+# test_neon_styling.py
 
-print("--- Script Start ---")
+# Renders the sample inputs through the neon_styling entry points and checks
+# that each writes a lit image of the expected size.
+import io
+import os
+from xml.etree import ElementTree
 
-output_dir = 'output_images'
-os.makedirs(output_dir, exist_ok=True)
+import numpy as np
+import pytest
+from PIL import Image
 
-# Test neon circle
-print("DEBUG: Calling create_neon_circle...")
-create_neon_circle(os.path.join(output_dir, 'neon_circle.png'))
-print("DEBUG: Returned from create_neon_circle.")
+from input_handlers import get_contours_from_image
+from neon_styling import (apply_neon_effect, apply_neon_to_svg, create_neon_circle, encode_image,
+                          parse_svg_transform, render_neon_circle, svg_shape_matrices, svg_to_subpaths,
+                          svg_viewport_matrix, transform_points)
+from tiled_render import apply_neon_effect_tiled
 
-# Test neon effect for contours
-print("DEBUG: Calling png_to_contours...")
-png_to_contours('example.png', output_path=os.path.join(output_dir, 'neon_contours.png'))
-print("DEBUG: Returned from png_to_contours.") # Will print after function finishes
+HERE = os.path.dirname(os.path.abspath(__file__))
 
-# Test neon effect for SVG paths
-print("DEBUG: About to call apply_neon_to_svg...") # <-- ADD THIS LINE
-apply_neon_to_svg('example.svg', os.path.join(output_dir, 'neon_svg.png'))
-print("DEBUG: Returned from apply_neon_to_svg.") # <-- ADD THIS LINE
 
-print("--- Script End ---")
-# --- End of test_neon_styling.py ---
+def read_image(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
 
+
+def test_create_neon_circle(tmp_path):
+    output_path = str(tmp_path / "neon_circle.png")
+    create_neon_circle(output_path)
+    image = read_image(output_path)
+    assert image.shape == (400, 400, 3)
+    assert image.max() > 0
+
+
+def test_apply_neon_effect_on_png_contours(tmp_path):
+    contours, image_size = get_contours_from_image(os.path.join(HERE, "example.png"), return_size=True)
+    assert contours
+    output_path = str(tmp_path / "neon_contours.png")
+    apply_neon_effect(contours, output_path, image_size=image_size)
+    image = read_image(output_path)
+    assert image.shape == (image_size[1], image_size[0], 3)
+    assert image.max() > 0
+
+
+def test_apply_neon_to_svg(tmp_path):
+    output_path = str(tmp_path / "neon_svg.png")
+    apply_neon_to_svg(os.path.join(HERE, "example.svg"), output_path)
+    image = read_image(output_path)
+    assert image.shape == (400, 400, 3)
+    assert image.max() > 0
+
+
+def test_svg_to_subpaths_accepts_bytes():
+    svg_path = os.path.join(HERE, "example.svg")
+    with open(svg_path, "rb") as f:
+        from_bytes = svg_to_subpaths(f.read())
+    from_path = svg_to_subpaths(svg_path)
+    assert from_path
+    assert len(from_bytes) == len(from_path)
+    for (points_a, closed_a), (points_b, closed_b) in zip(from_bytes, from_path):
+        assert closed_a == closed_b
+        np.testing.assert_array_equal(points_a, points_b)
+
+
+# (transform attribute, point in element space, expected point in parent space)
+TRANSFORM_CASES = [
+    ("", (3, 4), (3, 4)),
+    ("translate(10)", (3, 4), (13, 4)),
+    ("translate(10, -5)", (3, 4), (13, -1)),
+    ("scale(2)", (3, 4), (6, 8)),
+    ("scale(2 -1)", (3, 4), (6, -4)),
+    ("rotate(90)", (1, 0), (0, 1)),
+    ("rotate(90, 10, 10)", (20, 10), (10, 20)),
+    ("rotate(180 10 10)", (0, 0), (20, 20)),
+    ("skewX(45)", (0, 2), (2, 2)),
+    ("skewY(45)", (2, 0), (2, 2)),
+    ("matrix(1, 2, 3, 4, 5, 6)", (1, 1), (9, 12)),
+    ("translate(10, 0) scale(2)", (1, 1), (12, 2)), # Applied right to left to the point
+    ("scale(2) translate(10, 0)", (1, 1), (22, 2)),
+    ("scale(2) bogus(1) translate(a, b)", (1, 1), (2, 2)), # Unknown and malformed entries are skipped
+]
+
+
+@pytest.mark.parametrize("transform, point, expected", TRANSFORM_CASES)
+def test_parse_svg_transform(transform, point, expected):
+    mapped = transform_points(np.array([point], dtype=np.float64), parse_svg_transform(transform))
+    np.testing.assert_allclose(mapped[0], expected, atol=1e-9)
+
+
+# (root <svg> attributes, canvas size, user-space point, expected canvas point)
+VIEWPORT_CASES = [
+    ({}, (400, 400), (7, 9), (7, 9)), # No viewBox and no size: one unit per pixel
+    ({"width": "200", "height": "100"}, (400, 200), (200, 100), (400, 200)),
+    ({"width": "1in", "height": "1in"}, (192, 192), (96, 96), (192, 192)),
+    ({"viewBox": "100 50 200 100"}, (400, 200), (100, 50), (0, 0)),
+    ({"viewBox": "100 50 200 100"}, (400, 400), (100, 50), (0, 100)), # meet, centred vertically
+    ({"viewBox": "100 50 200 100", "preserveAspectRatio": "xMinYMin"}, (400, 400), (300, 150), (400, 200)),
+    ({"viewBox": "100 50 200 100", "preserveAspectRatio": "xMaxYMax meet"}, (400, 400), (100, 50), (0, 200)),
+    ({"viewBox": "100 50 200 100", "preserveAspectRatio": "xMidYMid slice"}, (400, 400), (100, 50), (-200, 0)),
+    ({"viewBox": "100 50 200 100", "preserveAspectRatio": "none"}, (400, 400), (300, 150), (400, 400)),
+    ({"viewBox": "0 0 0 100", "width": "50", "height": "50"}, (100, 100), (50, 50), (100, 100)), # Bad viewBox
+]
+
+
+@pytest.mark.parametrize("attributes, canvas_size, point, expected", VIEWPORT_CASES)
+def test_svg_viewport_matrix(attributes, canvas_size, point, expected):
+    mapped = transform_points(np.array([point], dtype=np.float64), svg_viewport_matrix(attributes, canvas_size))
+    np.testing.assert_allclose(mapped[0], expected, atol=1e-9)
+
+
+NESTED_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" viewBox="100 50 200 100">
+  <g transform="translate(10, 0)">
+    <g transform="scale(2)">
+      <path d="M 50 30 L 60 30"/>
+      <circle cx="0" cy="0" r="1" transform="translate(5, 5)"/>
+    </g>
+    <path d="M 0 0 L 1 0"/>
+  </g>
+</svg>"""
+
+
+def test_svg_shape_matrices_compose_nested_groups():
+    matrices = svg_shape_matrices(ElementTree.fromstring(NESTED_SVG), np.eye(3))
+    origin = np.zeros((1, 2))
+    # svg2paths order: every <path> first, then the circle
+    assert len(matrices) == 3
+    np.testing.assert_allclose(transform_points(origin, matrices[0])[0], (10, 0))
+    np.testing.assert_allclose(matrices[0][:2, :2], 2 * np.eye(2))
+    np.testing.assert_allclose(transform_points(origin, matrices[1])[0], (10, 0))
+    np.testing.assert_allclose(matrices[1][:2, :2], np.eye(2))
+    np.testing.assert_allclose(transform_points(origin, matrices[2])[0], (20, 10))
+    np.testing.assert_allclose(matrices[2][:2, :2], 2 * np.eye(2))
+
+
+def test_svg_to_subpaths_maps_onto_the_canvas():
+    # viewBox 200x100 at 100,50 meets a 400x400 canvas at scale 2, centred vertically
+    (points, closed), *_ = svg_to_subpaths(NESTED_SVG, canvas_size=(400, 400))
+    assert not closed
+    np.testing.assert_allclose(points[[0, -1]], [(20, 120), (60, 120)])
+
+
+GROUP_STYLED_SVG = b"""<svg xmlns="http://www.w3.org/2000/svg" width="100" height="100">
+  <style>.thin { stroke-width: 2 }</style>
+  <g stroke="#00ff00" stroke-width="8">
+    <path d="M 0 0 L 10 0"/>
+    <g class="thin">
+      <path d="M 0 5 L 10 5" stroke="inherit"/>
+      <path d="M 0 9 L 10 9" style="stroke: #ff0000"/>
+    </g>
+    <path d="M 0 7 L 10 7" stroke="none"/>
+  </g>
+  <path d="M 1 1 L 2 2"/>
+</svg>"""
+
+
+def test_svg_styles_inherit_from_groups():
+    _, styles = svg_to_subpaths(GROUP_STYLED_SVG, with_styles=True, canvas_size=(100, 100))
+    assert styles == [((0, 255, 0), 8), # From the group
+                      ((0, 255, 0), 2), # Width from the inner group's class rule
+                      ((255, 0, 0), 2), # Own style over inherited values
+                      (None, 8), # stroke="none" still draws, in the default colour
+                      (None, None)] # Outside the group
+
+
+@pytest.mark.parametrize("image_format", ["png", "webp", "jpg"])
+def test_encode_image(image_format):
+    data = encode_image(render_neon_circle((64, 48)), image_format)
+    with Image.open(io.BytesIO(data)) as image:
+        assert image.size == (64, 48)
+
+
+def test_file_renderers_report_failure(tmp_path, contours, image_size, unwritable_path):
+    unwritable = unwritable_path("taken.png")
+    assert create_neon_circle(unwritable) is False
+    assert apply_neon_effect(contours, unwritable, image_size=image_size) is False
+    assert apply_neon_to_svg(os.path.join(HERE, "example.svg"), unwritable) is False
+    assert apply_neon_effect_tiled(contours, unwritable, image_size=image_size, tile_size=64) is False
+    assert create_neon_circle(str(tmp_path / "ok.png")) is True
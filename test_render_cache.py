@@ -0,0 +1,122 @@
+# test_render_cache.py
+
+# Cache keys must change with everything that changes the output (and nothing
+# else), entries must be written atomically, and eviction must drop the least
+# recently used entries first.
+import os
+
+import numpy as np
+import pytest
+
+import render_cache
+from apply_neon import make_render_args, render_input
+from glow_engine import parse_glow_layers
+from render_cache import RenderCache, make_render_key, make_source_key
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONTOURS = [np.array([[[20, 30]], [[180, 40]], [[150, 170]]], dtype=np.int32)]
+STYLE = {"line_color": (255, 0, 255), "line_width": 5, "glow_radius": 10, "glow_alpha": 0.5,
+         "glow_engine": "cv2", "glow_layers": None, "quality": "normal"}
+
+
+def test_source_key_hashes_content_not_name(tmp_path):
+    first, second = tmp_path / "a.png", tmp_path / "b.png"
+    first.write_bytes(b"same bytes")
+    second.write_bytes(b"same bytes")
+    assert make_source_key(input_path=str(first)) == make_source_key(input_path=str(second))
+    second.write_bytes(b"other bytes")
+    assert make_source_key(input_path=str(first)) != make_source_key(input_path=str(second))
+
+
+def test_source_key_hashes_font_content(tmp_path):
+    font_path = tmp_path / "font.ttf"
+    font_path.write_bytes(b"font v1")
+    before = make_source_key(text="NEON", font_path=str(font_path), font_size=60)
+    font_path.write_bytes(b"font v2")
+    assert make_source_key(text="NEON", font_path=str(font_path), font_size=60) != before
+
+
+@pytest.mark.parametrize("change", [{"text": "NEON!"}, {"font_size": 61}, {"canvas_size": (400, 401)},
+                                    {"page": 1}, {"dpi": 300}, {"extra": {"simplify": 1.0}}])
+def test_source_key_tracks_geometry_options(change):
+    options = {"text": "NEON", "font_size": 60, "canvas_size": (400, 400), "page": 0, "dpi": 200, "extra": None}
+    assert make_source_key(**dict(options, **change)) != make_source_key(**options)
+
+
+def test_source_key_tracks_engine(monkeypatch):
+    before = make_source_key(input_path="circle")
+    monkeypatch.setattr(render_cache, "engine_fingerprint", lambda: "other engine")
+    assert make_source_key(input_path="circle") != before
+
+
+@pytest.mark.parametrize("name, value", [("line_color", (0, 255, 255)), ("line_width", 6), ("glow_radius", 11),
+                                         ("glow_alpha", 0.6), ("glow_engine", "pil"),
+                                         ("glow_layers", parse_glow_layers("neon")), ("quality", "high")])
+def test_render_key_tracks_style(name, value):
+    source_key = make_source_key(input_path="circle")
+    assert make_render_key(source_key, dict(STYLE, **{name: value})) != make_render_key(source_key, STYLE)
+    assert make_render_key(source_key, dict(STYLE)) == make_render_key(source_key, STYLE)
+
+
+@pytest.mark.parametrize("options", [{"color": "0,255,255"}, {"linewidth": 6}, {"glowradius": 11},
+                                     {"glowalpha": 0.6}, {"glowengine": "pil"},
+                                     {"glowlayers": parse_glow_layers("neon")}, {"quality": "high"},
+                                     {"compresslevel": 1}, {"autofit": True}])
+def test_changed_style_option_misses_the_cache(tmp_path, options):
+    # Through render_input, so an option left out of the key it builds is caught too
+    cache_dir = str(tmp_path / "cache")
+    assert render_input("circle", str(tmp_path / "first.png"), make_render_args(cachedir=cache_dir))
+    assert render_input("circle", str(tmp_path / "second.png"), make_render_args(cachedir=cache_dir, **options))
+    stats = RenderCache(cache_dir).stats()
+    assert (stats["image_hits"], stats["image_misses"]) == (0, 2)
+
+
+def test_store_and_fetch_image(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    image_path = tmp_path / "render.png"
+    image_path.write_bytes(b"\x89PNG rendered")
+    assert not cache.fetch_image("key", str(tmp_path / "miss.png"))
+
+    cache.store_image("key", str(image_path))
+    assert os.listdir(cache.images_dir) == ["key.png"] # No temporary file left behind
+    assert cache.fetch_image("key", str(tmp_path / "hit.png"))
+    assert (tmp_path / "hit.png").read_bytes() == image_path.read_bytes()
+    stats = cache.stats()
+    assert (stats["image_hits"], stats["image_misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_store_and_fetch_contours(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"))
+    assert cache.fetch_contours("key") is None
+    cache.store_contours("key", CONTOURS, (200, 210))
+    contours, image_size = cache.fetch_contours("key")
+    assert image_size == (200, 210)
+    np.testing.assert_array_equal(contours[0], CONTOURS[0])
+
+
+def test_failed_store_leaves_nothing(tmp_path, monkeypatch):
+    def failing_write(f, *args):
+        f.write(b"partial")
+        raise OSError("disk full")
+    monkeypatch.setattr(render_cache, "write_packed_contours", failing_write)
+
+    cache = RenderCache(str(tmp_path / "cache"))
+    with pytest.raises(OSError):
+        cache.store_contours("key", CONTOURS, (200, 210))
+    assert os.listdir(cache.contours_dir) == []
+    assert cache.fetch_contours("key") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=250)
+    image_path = tmp_path / "render.png"
+    image_path.write_bytes(bytes(100))
+    for age, key in enumerate(["old", "older"]):
+        cache.store_image(key, str(image_path))
+        past = os.path.getmtime(os.path.join(cache.images_dir, f"{key}.png")) - 100 * (age + 1)
+        os.utime(os.path.join(cache.images_dir, f"{key}.png"), (past, past))
+    # A hit makes "older" the most recently used entry, so "old" goes first
+    assert cache.fetch_image("older", str(tmp_path / "hit.png"))
+
+    cache.store_image("new", str(image_path))
+    assert sorted(os.listdir(cache.images_dir)) == ["new.png", "older.png"]
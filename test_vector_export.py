@@ -0,0 +1,55 @@
+# test_vector_export.py
+
+# SVG/PDF export: per-path tube styles and closed flags.
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from vector_export import write_neon_vector
+
+CONTOURS = [np.array([[10.0, 10.0], [90.0, 90.0]]), np.array([[10.0, 50.0], [90.0, 50.0]])]
+STYLES = [((0, 255, 0), 2), (None, None)]
+
+
+def test_svg_keeps_per_path_styles(tmp_path):
+    output_path = str(tmp_path / "sign.svg")
+    assert write_neon_vector(CONTOURS, output_path, (100, 100), line_color="255,0,255", line_width=5,
+                             styles=STYLES)
+    with open(output_path, encoding="utf-8") as f:
+        svg = f.read()
+    sharp = re.findall(r'<use xlink:href="#(tubes\d)" stroke="([^"]+)" stroke-width="(\d+)" style', svg)
+    assert sharp == [("tubes0", "rgb(0,255,0)", "2"), ("tubes1", "rgb(255,0,255)", "5")]
+
+
+def test_pdf_keeps_per_path_styles(tmp_path):
+    output_path = str(tmp_path / "sign.pdf")
+    assert write_neon_vector(CONTOURS, output_path, (100, 100), line_color="255,0,255", line_width=5,
+                             styles=STYLES)
+    strokes = [line for line in read_pdf_ops(output_path) if line.endswith(" RG")]
+    assert strokes[-2:] == ["/GS1 gs 2.00 w 0.0000 1.0000 0.0000 RG", "/GS1 gs 5.00 w 1.0000 0.0000 1.0000 RG"]
+
+
+def read_pdf_ops(path):
+    with open(path, "rb") as f:
+        stream = re.search(rb"stream\n(.*)\nendstream", f.read(), re.S).group(1)
+    return zlib.decompress(stream).decode().splitlines()
+
+
+def test_closed_flags_close_only_their_paths(tmp_path, contours, image_size):
+    svg_path, pdf_path = str(tmp_path / "sign.svg"), str(tmp_path / "sign.pdf")
+    for output_path in (svg_path, pdf_path):
+        assert write_neon_vector(contours, output_path, image_size, closed=[True, False])
+    with open(svg_path, encoding="utf-8") as f:
+        paths = re.findall(r'<path d="([^"]+)"/>', f.read())
+    assert [path.endswith(" Z") for path in paths] == [True, False]
+    # Every glow layer and the tube strokes both paths: the quadrilateral closed, the line open
+    ops = read_pdf_ops(pdf_path)
+    closed_strokes, open_strokes = ops.count("h S"), ops.count("S")
+    assert closed_strokes == open_strokes > 1
+
+
+@pytest.mark.parametrize("extension", [".svg", ".pdf"])
+def test_failed_export_returns_false(unwritable_path, extension):
+    assert write_neon_vector(CONTOURS, unwritable_path(f"sign{extension}"), (100, 100)) is False
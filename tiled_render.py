@@ -0,0 +1,222 @@
+# tiled_render.py
+
+# Ensure necessary libraries are installed: pip install opencv-python numpy Pillow
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from glow_engine import apply_glow_to_array, glow_margin
+from neon_styling import draw_contours, parse_color, quality_draw_options
+from neon_profile import count_contours, get_logger, stage
+
+log = get_logger("tiled_render")
+
+DEFAULT_TILE_SIZE = 1024
+# Tile origins and overlaps are multiples of this, so the glow's downsampled
+# (pyramid) grids line up with the ones a full-frame render would use.
+TILE_ALIGN = 32
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class PNGStreamWriter:
+    """
+    Writes an 8-bit RGB PNG a band of rows at a time.
+
+    Rows are Sub-filtered and fed through one zlib stream; each band's
+    compressed bytes go out as an IDAT chunk straight away, so only the
+    current band is ever held in memory.
+    """
+
+    def __init__(self, path, width, height, compress_level=6):
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        # 8 bits per channel, colour type 2 (RGB), no interlace
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def _write_chunk(self, chunk_type, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF))
+
+    def write_rows(self, rows):
+        """Appends an HxWx3 uint8 band of rows."""
+        band_height = rows.shape[0]
+        filtered = np.empty((band_height, 1 + self.width * 3), dtype=np.uint8)
+        filtered[:, 0] = 1 # Sub filter: each byte minus the byte one pixel to the left
+        flat = rows.reshape(band_height, self.width * 3)
+        filtered[:, 1:4] = flat[:, :3]
+        np.subtract(flat[:, 3:], flat[:, :-3], out=filtered[:, 4:]) # uint8 wraps modulo 256 as PNG expects
+        data = self._compressor.compress(filtered.tobytes())
+        if data:
+            self._write_chunk(b"IDAT", data)
+        self.rows_written += band_height
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._write_chunk(b"IDAT", self._compressor.flush())
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expected {self.height} rows, got {self.rows_written}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+
+def _bounding_boxes(contours):
+    """Returns an (N, 4) float array of x0, y0, x1, y1 per contour (NaN for empty contours)."""
+    boxes = np.full((len(contours), 4), np.nan)
+    for i, contour in enumerate(contours):
+        points = np.asarray(contour).reshape(-1, 2)
+        if len(points):
+            boxes[i, :2] = points.min(axis=0)
+            boxes[i, 2:] = points.max(axis=0)
+    return boxes
+
+
+def _render_tile(contours, closed_flags, boxes, x0, y0, x1, y1, overlap, image_size, color, style):
+    """Draws and glows one tile plus its overlap, returns the (y1-y0)x(x1-x0)x3 centre."""
+    width, height = image_size
+    # Tile with its overlap, clipped to the image
+    ox0, oy0 = max(0, x0 - overlap), max(0, y0 - overlap)
+    ox1, oy1 = min(width, x1 + overlap), min(height, y1 + overlap)
+    canvas = np.zeros((oy1 - oy0, ox1 - ox0, 3), dtype=np.uint8)
+
+    # Only contours whose bounding box (grown by the tube width) touches this tile
+    pad = style["line_width"]
+    hits = np.flatnonzero((boxes[:, 0] - pad < ox1) & (boxes[:, 2] + pad >= ox0)
+                          & (boxes[:, 1] - pad < oy1) & (boxes[:, 3] + pad >= oy0))
+    offset = np.array([ox0, oy0])
+    for closed in (False, True):
+        selected = [np.asarray(contours[i]) - offset.astype(np.asarray(contours[i]).dtype)
+                    for i in hits if closed_flags[i] == closed]
+        if selected:
+            draw_contours(canvas, selected, color, style["line_width"], closed=closed,
+                          **quality_draw_options(style["quality"]))
+
+    canvas = apply_glow_to_array(canvas, style["glow_radius"], style["glow_alpha"],
+                                 style["glow_engine"], style["glow_layers"], style["quality"])
+    return canvas[y0 - oy0:y1 - oy0, x0 - ox0:x1 - ox0]
+
+
+def apply_neon_effect_tiled(contours, output_path, image_size=(400, 400),
+                            line_color="255,0,255", # Magenta
+                            line_width=5,
+                            glow_radius=10,
+                            glow_alpha=0.5,
+                            glow_engine="cv2",
+                            glow_layers=None,
+                            quality="normal",
+                            closed=False,
+                            tile_size=DEFAULT_TILE_SIZE,
+                            workers=None,
+                            compress_level=6):
+    """
+    Renders the neon effect tile by tile, for canvases too large to hold several full copies of.
+
+    Each tile is drawn and glowed with an overlap equal to the glow's support
+    (glow_engine.glow_margin), so seams match a full-frame render. Tiles of a
+    band are rendered on a thread pool (OpenCV releases the GIL) and each
+    finished band is written straight to the PNG, so peak memory is one band
+    of rows plus the tiles in flight. Non-PNG outputs are assembled in memory
+    and saved with Pillow.
+
+    Args:
+        contours (list): Contours (OpenCV (N, 1, 2) or (N, 2) arrays, int or float).
+        output_path (str): Path to save the output image.
+        image_size (tuple): (width, height) of the canvas.
+        line_color (str/tuple): Color for the neon tube.
+        line_width (int): Width/thickness of the neon tube.
+        glow_radius (int): Radius for the Gaussian blur glow effect.
+        glow_alpha (float): Blending alpha for the glow (0=sharp, 1=blur).
+        glow_engine (str): 'cv2' (NumPy/OpenCV compositor) or 'pil' (original blur-and-blend).
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        quality (str): 'draft', 'normal' or 'high' (see neon_styling.quality_draw_options).
+        closed (bool or list): Draw contours as closed loops (one flag for all, or one per contour).
+        tile_size (int): Tile edge in pixels (rounded up to a multiple of 32).
+        workers (int, optional): Threads rendering tiles of a band. Defaults to the number of CPU cores.
+        compress_level (int): zlib level for PNG output.
+
+    Returns:
+        bool: True if the image was written, False if rendering or saving failed.
+    """
+    writing = False
+    bands = None
+    try:
+        color = parse_color(line_color, (255, 0, 255)) # Default magenta
+        width, height = image_size
+        style = {"line_width": line_width, "glow_radius": glow_radius, "glow_alpha": glow_alpha,
+                 "glow_engine": glow_engine, "glow_layers": glow_layers, "quality": quality}
+        closed_flags = [closed] * len(contours) if isinstance(closed, bool) else list(closed)
+
+        tile_size = max(TILE_ALIGN, -(-int(tile_size) // TILE_ALIGN) * TILE_ALIGN)
+        overlap = -(-glow_margin(line_width, glow_radius, glow_layers) // TILE_ALIGN) * TILE_ALIGN
+        workers = workers or os.cpu_count() or 1
+        log.info("Tiled render: %dx%d in %dpx tiles (%dpx overlap), %d threads.", width, height, tile_size, overlap,
+                 workers)
+        count_contours(contours)
+        bands = _render_bands(contours, closed_flags, image_size, color, style, tile_size, overlap, workers)
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+        writing = True
+        if os.path.splitext(output_path)[1].lower() == ".png":
+            with PNGStreamWriter(output_path, width, height, compress_level) as writer:
+                for _, band in bands:
+                    with stage("encode"):
+                        writer.write_rows(band)
+                with stage("encode"):
+                    writer.close()
+        else:
+            full_frame = np.empty((height, width, 3), dtype=np.uint8)
+            for y0, band in bands:
+                full_frame[y0:y0 + band.shape[0]] = band
+            with stage("encode"):
+                Image.fromarray(full_frame).save(output_path)
+        return True
+
+    except Exception as e:
+        log.error("apply_neon_effect_tiled could not save %s: %s", output_path, e)
+        if writing and os.path.isfile(output_path):
+            os.remove(output_path) # Never leave a truncated image behind
+        return False
+    finally:
+        if bands is not None:
+            bands.close() # Waits for tiles still in flight
+
+
+def _render_bands(contours, closed_flags, image_size, color, style, tile_size, overlap, workers):
+    """Yields (y0, HxWx3 band) per row of tiles, the tiles of each band rendered on a thread pool."""
+    width, height = image_size
+    boxes = _bounding_boxes(contours)
+    n_tiles_x = -(-width // tile_size)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for y0 in range(0, height, tile_size):
+            y1 = min(height, y0 + tile_size)
+            band = np.empty((y1 - y0, width, 3), dtype=np.uint8)
+            spans = [(x0, min(width, x0 + tile_size)) for x0 in range(0, n_tiles_x * tile_size, tile_size)]
+            tiles = executor.map(lambda span: _render_tile(contours, closed_flags, boxes, span[0], y0,
+                                                           span[1], y1, overlap, image_size, color, style),
+                                 spans)
+            for (x0, x1), tile in zip(spans, tiles):
+                band[:, x0:x1] = tile
+            yield y0, band
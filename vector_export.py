@@ -0,0 +1,246 @@
+# vector_export.py
+
+# Writes the neon result as vector artwork (SVG or PDF) instead of a raster.
+# Only the tube centre lines are stored, so file size follows path complexity,
+# not output resolution.
+import os
+import zlib
+
+import numpy as np
+
+from neon_styling import group_subpaths_by_style, parse_color
+from neon_profile import count_contours, get_logger, stage
+
+log = get_logger("vector_export")
+
+VECTOR_FORMATS = (".svg", ".pdf")
+
+# PDF has no blur: the glow is approximated by this many wider, fainter strokes
+PDF_GLOW_STEPS = 6
+
+
+def is_vector_output(output_path):
+    """True if output_path asks for SVG/PDF output."""
+    return os.path.splitext(output_path)[1].lower() in VECTOR_FORMATS
+
+
+def _glow_layers(glow_radius, glow_alpha, glow_layers):
+    """Normalises single/layered glow settings to (radius, intensity, color_shift) tuples."""
+    if glow_layers:
+        return [(float(layer["radius"]), float(layer["intensity"]), float(layer.get("color_shift", 0.0)))
+                for layer in sorted(glow_layers, key=lambda layer: layer["radius"])]
+    if glow_alpha <= 0 or glow_radius <= 0:
+        return []
+    return [(float(glow_radius), float(glow_alpha), 0.0)]
+
+
+def _shift_color(color, color_shift):
+    """Moves an (r, g, b) colour towards white by color_shift (0..1), like the raster glow stack."""
+    brightest = max(color)
+    return tuple(int(round(c + color_shift * (brightest - c))) for c in color)
+
+
+def _style_groups(contours, closed, styles, color, line_width):
+    """
+    Groups the contours by tube style (see neon_styling.group_subpaths_by_style).
+
+    Returns:
+        list: ((r, g, b), width, [(points, closed), ...]) per style, in first-seen order.
+    """
+    closed_flags = [closed] * len(contours) if isinstance(closed, bool) else closed
+    subpaths, kept_styles = [], []
+    for index, (contour, is_closed) in enumerate(zip(contours, closed_flags)):
+        points = np.asarray(contour, dtype=float).reshape(-1, 2)
+        if len(points):
+            subpaths.append((points, is_closed))
+            kept_styles.append(None if styles is None else styles[index])
+    groups = group_subpaths_by_style(subpaths, None if styles is None else kept_styles, color, line_width)
+    return [(group_color, group_width, group) for (group_color, group_width), group in groups.items()]
+
+
+def _svg_path_data(points, closed):
+    if len(points) == 1:
+        points = np.vstack((points, points)) # Zero-length segment: drawn as a round dot
+    return "M" + " L".join(f"{x:.2f} {y:.2f}" for x, y in points) + (" Z" if closed else "")
+
+
+def write_neon_svg(contours, output_path, image_size=(400, 400),
+                   line_color="255,0,255", # Magenta
+                   line_width=5,
+                   glow_radius=10,
+                   glow_alpha=0.5,
+                   glow_layers=None,
+                   closed=False,
+                   styles=None,
+                   **_raster_only):
+    """
+    Writes the neon tubes as an SVG: a black background, one blurred copy of
+    the tubes per glow layer (feGaussianBlur) and the sharp tubes on top.
+
+    The tube paths are stored once in <defs>, one group per tube style, and
+    every layer references each group with that style's stroke and stroke-width.
+
+    Args:
+        contours (list): Contours (OpenCV (N, 1, 2) or (N, 2) arrays, int or float), in pixels.
+        output_path (str): Path to save the .svg file.
+        image_size (tuple): (width, height) of the canvas.
+        line_color (str/tuple): Color for the neon tube.
+        line_width (int): Width/thickness of the neon tube.
+        glow_radius (int): Gaussian blur radius (standard deviation) of the glow.
+        glow_alpha (float): Opacity of the glow layer.
+        glow_layers (list, optional): Layered glow stack (core/halo/bloom) replacing glow_radius/glow_alpha.
+        closed (bool or list): Closed-loop flag for all contours, or one per contour.
+        styles (list, optional): (color tuple or None, width or None) per contour, e.g. SVG
+                                 stroke styles; None entries use line_color/line_width.
+    """
+    color = parse_color(line_color, (255, 0, 255)) # Default magenta
+    width, height = image_size
+    groups = _style_groups(contours, closed, styles, color, line_width)
+    layers = _glow_layers(glow_radius, glow_alpha, glow_layers)
+
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        '<defs>',
+    ]
+    for group_index, (_, _, group) in enumerate(groups):
+        lines.append(f'<g id="tubes{group_index}" fill="none" stroke-linecap="round" stroke-linejoin="round">')
+        lines.extend(f'<path d="{_svg_path_data(points, is_closed)}"/>' for points, is_closed in group)
+        lines.append('</g>')
+    for index, (radius, _, _) in enumerate(layers):
+        # userSpaceOnUse: the blur may spread over the whole canvas without being clipped
+        lines.append(f'<filter id="glow{index}" filterUnits="userSpaceOnUse" x="0" y="0" '
+                     f'width="{width}" height="{height}"><feGaussianBlur stdDeviation="{radius:g}"/></filter>')
+    lines.append('</defs>')
+    lines.append(f'<rect width="{width}" height="{height}" fill="#000"/>')
+
+    # Glow layers add light, so they are screen-blended over each other
+    for index, (_, intensity, color_shift) in enumerate(reversed(layers)):
+        layer_index = len(layers) - 1 - index
+        for group_index, (group_color, group_width, _) in enumerate(groups):
+            r, g, b = _shift_color(group_color, color_shift)
+            lines.append(f'<use xlink:href="#tubes{group_index}" stroke="rgb({r},{g},{b})" '
+                         f'stroke-width="{group_width}" filter="url(#glow{layer_index})" '
+                         f'opacity="{min(1.0, intensity):.3f}" style="mix-blend-mode:screen"/>')
+    for group_index, ((r, g, b), group_width, _) in enumerate(groups):
+        lines.append(f'<use xlink:href="#tubes{group_index}" stroke="rgb({r},{g},{b})" '
+                     f'stroke-width="{group_width}" style="mix-blend-mode:screen"/>')
+    lines.append('</svg>')
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+
+def _pdf_path_ops(points, closed):
+    ops = [f"{points[0][0]:.2f} {points[0][1]:.2f} m"]
+    ops.extend(f"{x:.2f} {y:.2f} l" for x, y in points[1:])
+    if len(points) == 1:
+        ops.append(f"{points[0][0]:.2f} {points[0][1]:.2f} l") # Zero-length segment: drawn as a round dot
+    ops.append("h S" if closed else "S")
+    return "\n".join(ops)
+
+
+def write_neon_pdf(contours, output_path, image_size=(400, 400),
+                   line_color="255,0,255", # Magenta
+                   line_width=5,
+                   glow_radius=10,
+                   glow_alpha=0.5,
+                   glow_layers=None,
+                   closed=False,
+                   styles=None,
+                   **_raster_only):
+    """
+    Writes the neon tubes as a one-page PDF (1 px = 1 pt).
+
+    PDF has no blur operator, so each glow layer is approximated by
+    PDF_GLOW_STEPS strokes that get wider and fainter out to 2x its radius,
+    drawn under the sharp tube. The paths are stored once per stroke pass in
+    a single compressed content stream, once per tube style.
+
+    Args:
+        See write_neon_svg().
+    """
+    color = parse_color(line_color, (255, 0, 255)) # Default magenta
+    width, height = image_size
+    groups = [(group_color, group_width,
+               "\n".join(_pdf_path_ops(points, is_closed) for points, is_closed in group))
+              for group_color, group_width, group in _style_groups(contours, closed, styles, color, line_width)]
+
+    passes = [] # (stroke width, (r, g, b), opacity, path ops), drawn in order
+    for radius, intensity, color_shift in reversed(_glow_layers(glow_radius, glow_alpha, glow_layers)):
+        for step in range(PDF_GLOW_STEPS, 0, -1):
+            spread = 2.0 * radius * step / PDF_GLOW_STEPS
+            # Overlapping passes add up to roughly `intensity` at the tube
+            passes.extend((group_width + 2 * spread, _shift_color(group_color, color_shift),
+                           min(1.0, intensity / PDF_GLOW_STEPS), path_ops)
+                          for group_color, group_width, path_ops in groups)
+    passes.extend((group_width, group_color, 1.0, path_ops) for group_color, group_width, path_ops in groups)
+
+    opacities = sorted({opacity for _, _, opacity, _ in passes})
+    gstate_names = {opacity: f"/GS{i}" for i, opacity in enumerate(opacities)}
+    content = [
+        "0 0 0 rg", f"0 0 {width} {height} re f", # Black background
+        f"1 0 0 -1 0 {height} cm", # Image coordinates: y down
+        "1 J 1 j", # Round caps and joins
+    ]
+    for stroke_width, (r, g, b), opacity, path_ops in passes:
+        content.append(f"{gstate_names[opacity]} gs {stroke_width:.2f} w "
+                       f"{r / 255:.4f} {g / 255:.4f} {b / 255:.4f} RG")
+        content.append(path_ops)
+    stream = zlib.compress("\n".join(content).encode("ascii"))
+
+    gstates = " ".join(f"{name} << /CA {opacity:.4f} >>" for opacity, name in gstate_names.items())
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+         f"/Resources << /ExtGState << {gstates} >> >> /Contents 4 0 R >>").encode("ascii"),
+        f"<< /Length {len(stream)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + stream + b"\nendstream",
+    ]
+    with open(output_path, 'wb') as f:
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in offsets:
+            f.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n"
+                .encode("ascii"))
+
+
+def write_neon_vector(contours, output_path, image_size=(400, 400), **style_params):
+    """
+    Writes SVG or PDF depending on the output extension.
+
+    Args:
+        contours (list): Contours or flattened path points, in pixels.
+        output_path (str): Path ending in .svg or .pdf.
+        image_size (tuple): (width, height) of the canvas.
+        **style_params: Styling keyword arguments (glow_engine is ignored), `closed` and `styles`.
+
+    Returns:
+        bool: True if the file was written, False if writing failed (a partial file is removed).
+    """
+    writing = False
+    try:
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        count_contours(contours)
+        writing = True
+        with stage("encode"):
+            if os.path.splitext(output_path)[1].lower() == ".pdf":
+                write_neon_pdf(contours, output_path, image_size, **style_params)
+            else:
+                write_neon_svg(contours, output_path, image_size, **style_params)
+        log.info("Wrote vector output (%d bytes) to %s", os.path.getsize(output_path), output_path)
+        return True
+    except Exception as e:
+        log.error("Could not write vector output to %s: %s", output_path, e)
+        if writing and os.path.isfile(output_path):
+            os.remove(output_path)
+        return False